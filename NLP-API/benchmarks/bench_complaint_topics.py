@@ -0,0 +1,81 @@
+"""Time and peak memory of complaint topic clustering.
+
+For each corpus size, embeds the synthetic reviews (benchmarks/corpus.py) once
+with the local KeyBERT model, outside the timing, and clusters all of them
+with TopicClusterer as if every review were a complaint, the worst case for
+updated_api, with the rating standing in for the negativity. The embeddings
+are projected to --dim dimensions by a fixed random matrix, so the stand-in
+model of a test setup is timed at the width of all-MiniLM-L6-v2 (384).
+Reports the best of --repeat runs in seconds, the peak traced memory of one
+more run, and the top topics.
+
+Run from NLP-API/:  python benchmarks/bench_complaint_topics.py [--sizes 1000 5000 10000 --dim 384]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from corpus import generate_reviews  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 5000, 10000])
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    from keybert import KeyBERT
+    from complaint_topics import TopicClusterer
+    from model_store import KEYWORD_DIR, require_local_model
+
+    kw_model = KeyBERT(model=require_local_model(KEYWORD_DIR, "KeyBERT"))
+    clusterer = TopicClusterer()
+
+    report = {"dim": args.dim, "sizes": {}}
+    for size in args.sizes:
+        reviews = [r for r in generate_reviews(size, seed=args.seed) if r["review"]]
+        texts = [r["review"] for r in reviews]
+        negativity = [(5 - (r["rating"] or 3)) / 4 for r in reviews]
+
+        start = time.perf_counter()
+        embeddings = kw_model.model.embed(texts)
+        embed_seconds = time.perf_counter() - start
+        projection = np.random.default_rng(args.seed).standard_normal((embeddings.shape[1], args.dim))
+        vectors = (embeddings @ projection).astype(np.float32)
+
+        times = []
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            topics = clusterer.cluster(texts, vectors, negativity)
+            times.append(time.perf_counter() - start)
+        tracemalloc.start()
+        clusterer.cluster(texts, vectors, negativity)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+        row = {
+            "reviews": len(texts),
+            "embed_seconds": round(embed_seconds, 3),
+            "cluster_seconds": round(min(times), 4),
+            "embeddings_mib": round(vectors.nbytes / 2 ** 20, 2),
+            "peak_mib": round(peak / 2 ** 20, 2),
+            "topics": len(topics),
+            "top_topics": [{key: topic[key] for key in ("label", "reviews", "negativity")} for topic in topics[:3]]
+        }
+        report["sizes"][str(size)] = row
+        print(f"{size} reviews: {row['cluster_seconds']}s", file=sys.stderr)
+
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""Load generator for comparing /analyze throughput between server setups.
+
+Fires --requests POSTs at --url from --concurrency client threads, each
+carrying --reviews synthetic reviews, and reports requests/sec, reviews/sec
+and latency percentiles.
+
+    python benchmarks/bench_concurrency.py --url http://localhost:5001/analyze
+"""
+import argparse
+import json
+import random
+import statistics
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+WORDS = (
+    "the app is good but it keeps crashing when i open the camera and support never replies "
+    "which is annoying because i paid for premium after the last update battery drains fast "
+    "love the new design works well great features easy to use"
+).split()
+
+
+def make_payload(rng, n_reviews):
+    reviews = [
+        {
+            "user": f"user {rng.randint(1, 10**6)}",
+            "rating": rng.randint(1, 5),
+            "review": " ".join(rng.choice(WORDS) for _ in range(rng.randint(4, 60)))
+        }
+        for _ in range(n_reviews)
+    ]
+    return {"uid": "bench", "title": "Bench", "icon": "", "description": "Benchmark app.", "reviews": reviews}
+
+
+def post(url, payload, timeout):
+    body = json.dumps(payload).encode("utf-8")
+    request = urllib.request.Request(url, data=body, headers={"Content-Type": "application/json"})
+    start = time.perf_counter()
+    with urllib.request.urlopen(request, timeout=timeout) as response:
+        response.read()
+    return time.perf_counter() - start
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://localhost:5001/analyze")
+    parser.add_argument("--requests", type=int, default=40)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--reviews", type=int, default=100)
+    parser.add_argument("--timeout", type=float, default=600)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    payloads = [make_payload(rng, args.reviews) for _ in range(args.requests)]
+
+    # One untimed request so lazy initialization doesn't count against the server
+    post(args.url, payloads[0], args.timeout)
+
+    latencies = []
+    errors = 0
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        futures = [pool.submit(post, args.url, payload, args.timeout) for payload in payloads]
+        for future in futures:
+            try:
+                latencies.append(future.result())
+            except Exception as e:
+                errors += 1
+                print(f"Request failed: {e}")
+    wall = time.perf_counter() - start
+
+    done = len(latencies)
+    print(json.dumps({
+        "url": args.url,
+        "concurrency": args.concurrency,
+        "requests": args.requests,
+        "reviews_per_request": args.reviews,
+        "errors": errors,
+        "wall_seconds": round(wall, 3),
+        "requests_per_second": round(done / wall, 3),
+        "reviews_per_second": round(done * args.reviews / wall, 1),
+        "latency_p50": round(statistics.median(latencies), 3) if latencies else None,
+        "latency_p95": round(percentile(latencies, 95), 3) if latencies else None,
+        "latency_max": round(max(latencies), 3) if latencies else None
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
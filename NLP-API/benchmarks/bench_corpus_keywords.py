@@ -0,0 +1,77 @@
+"""Per-review KeyBERT keywords against the corpus keyword mode.
+
+For each corpus size, extracts keywords from the same synthetic reviews
+(benchmarks/corpus.py) the two ways updated_api can: KeyBERT top-5 per
+review in one batched call (KEYWORD_MODE=keybert, the keywords stage), and
+one KeywordRanker pass over all of them grouped by sentiment
+(KEYWORD_MODE=corpus). The rating stands in for the sentiment label here, as
+the ranking cost doesn't depend on it. Reports seconds, reviews/sec and the
+speedup.
+
+Run from NLP-API/:  python benchmarks/bench_corpus_keywords.py [--sizes 1000 5000 10000]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from corpus import generate_reviews  # noqa: E402
+
+
+def sentiment_of(rating):
+    if rating is None or rating == 3:
+        return "NEUTRAL"
+    return "NEGATIVE" if rating < 3 else "POSITIVE"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 5000, 10000])
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--skip-keybert-over", type=int, default=None,
+                        help="only time the corpus mode for larger sizes")
+    args = parser.parse_args()
+
+    from keybert import KeyBERT
+    from corpus_keywords import KeywordRanker
+    from model_store import KEYWORD_DIR, require_local_model
+
+    kw_model = KeyBERT(model=require_local_model(KEYWORD_DIR, "KeyBERT"))
+    ranker = KeywordRanker()
+    # Warm up lazy initialization before timing
+    kw_model.extract_keywords(["Warmup review, the app works well."] * 2, top_n=5, stop_words="english")
+
+    report = {}
+    for size in args.sizes:
+        reviews = [r for r in generate_reviews(size, seed=args.seed) if r["review"]]
+        texts = [r["review"] for r in reviews]
+        groups = [sentiment_of(r["rating"]) for r in reviews]
+
+        start = time.perf_counter()
+        ranking, _ = ranker.rank(texts, groups, per_text=5)
+        corpus_seconds = time.perf_counter() - start
+        row = {
+            "reviews": len(texts),
+            "corpus_seconds": round(corpus_seconds, 4),
+            "corpus_reviews_per_second": round(len(texts) / corpus_seconds, 1),
+            "top_negative": [item["keyword"] for item in ranking.get("NEGATIVE", [])[:5]]
+        }
+
+        if args.skip_keybert_over is None or size <= args.skip_keybert_over:
+            start = time.perf_counter()
+            kw_model.extract_keywords(texts, top_n=5, stop_words="english")
+            keybert_seconds = time.perf_counter() - start
+            row["keybert_seconds"] = round(keybert_seconds, 3)
+            row["keybert_reviews_per_second"] = round(len(texts) / keybert_seconds, 1)
+            row["speedup"] = round(keybert_seconds / corpus_seconds, 1)
+        report[str(size)] = row
+        print(f"{size} reviews: {row}", file=sys.stderr)
+
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
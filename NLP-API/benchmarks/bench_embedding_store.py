@@ -0,0 +1,75 @@
+"""Cold and warm analysis of a repeated app through the embedding store.
+
+Analyzes the same synthetic app (benchmarks/corpus.py) with updated_api three
+times, each in a fresh process with the result cache in memory only, as after
+a restart: without the embedding store, with an empty store (cold, filling it)
+and again with the store the cold run left behind (warm). Reports the /analyze
+wall seconds and keywords stage seconds of each run, the store's hits and
+size, and whether the warm run returned the cold run's keywords.
+
+Run from NLP-API/:  python benchmarks/bench_embedding_store.py [--reviews 2000]
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from corpus import generate_reviews  # noqa: E402
+
+
+def analyze_once(store_path, reviews):
+    """Runs in a spawned process: load updated_api with the given store, analyze the reviews once"""
+    os.environ.pop("RESULT_CACHE_PATH", None)
+    os.environ.pop("REVIEW_STORE_PATH", None)
+    if store_path:
+        os.environ["EMBEDDING_STORE_PATH"] = store_path
+    else:
+        os.environ.pop("EMBEDDING_STORE_PATH", None)
+    import updated_api
+
+    client = updated_api.app.test_client()
+    start = time.perf_counter()
+    response = client.post("/analyze?timings=1", json={"description": "Benchmark app.", "reviews": reviews}).get_json()
+    seconds = time.perf_counter() - start
+    return {
+        "seconds": round(seconds, 3),
+        "keywords_seconds": round(response.get("timings", {}).get("keywords", 0.0) / 1000, 3),
+        "store": updated_api.embedding_store.stats() if updated_api.embedding_store is not None else None,
+        "keywords": [review.get("keywords") for review in response["analyzed_reviews"]]
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--reviews", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    reviews = generate_reviews(args.reviews, seed=args.seed)
+    context = multiprocessing.get_context("spawn")
+    report = {"reviews": len(reviews), "runs": {}}
+    with tempfile.TemporaryDirectory() as store_path:
+        for name, path in (("no_store", None), ("cold", store_path), ("warm", store_path)):
+            with context.Pool(1) as pool:
+                report["runs"][name] = pool.apply(analyze_once, (path, reviews))
+            print(f"{name}: {report['runs'][name]['seconds']}s", file=sys.stderr)
+
+    runs = report["runs"]
+    report["warm_keywords_match"] = runs["warm"]["keywords"] == runs["cold"]["keywords"]
+    report["warm_speedup"] = round(runs["cold"]["seconds"] / runs["warm"]["seconds"], 2)
+    if runs["warm"]["keywords_seconds"]:
+        report["warm_keywords_speedup"] = round(runs["cold"]["keywords_seconds"] / runs["warm"]["keywords_seconds"], 2)
+    for run in runs.values():
+        run.pop("keywords")
+        if run["store"] is not None:
+            run["store"] = {key: run["store"][key] for key in ("items", "bytes", "hits", "misses", "hit_rate")}
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
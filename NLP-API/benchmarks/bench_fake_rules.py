@@ -0,0 +1,117 @@
+"""Microbenchmark for the text heuristics of is_fake_review.
+
+Compares the original per-rule implementation (one str.count / substring scan
+per listed word) with the compiled single-pass matcher now in updated_api.py,
+on synthetic reviews of increasing length. The model-backed rules (rating
+mismatch and spaCy) are left out since they are unchanged.
+
+Run from NLP-API/:  python benchmarks/bench_fake_rules.py
+"""
+import os
+import random
+import re
+import sys
+import timeit
+from collections import Counter
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import updated_api  # noqa: E402
+
+
+def legacy_rules(review_text, user=None):
+    """Rules 3-7 and 9-10 as originally written, kept here as the baseline"""
+    superlatives = ["amazing", "incredible", "perfect", "best", "worst", "awful", "horrible", 
+                   "excellent", "outstanding", "exceptional", "terrible", "superb", "awesome",
+                   "greatest", "finest", "magnificent", "dreadful", "appalling"]
+    superlative_count = sum(review_text.count(word) for word in superlatives)
+    word_count = len(review_text.split())
+    if word_count > 0 and superlative_count > 2 and (superlative_count / word_count) > 0.12:
+        return True, "Excessive superlatives"
+
+    words = review_text.lower().split()
+    word_counts = Counter(words)
+    bigrams = [" ".join(words[i:i+2]) for i in range(len(words)-1)]
+    bigram_counts = Counter(bigrams)
+    if any(count > 3 for word, count in word_counts.items() if len(word) > 3):
+        return True, "Word repetition"
+    if any(count > 2 for bigram, count in bigram_counts.items()):
+        return True, "Phrase repetition"
+
+    generic_phrases = ["great product", "highly recommend", "works well", "very good", "very bad",
+                      "love it", "awesome product", "best ever", "worst ever", "changed my life",
+                      "must buy", "waste of money", "don't buy", "changed everything",
+                      "you won't regret", "best purchase", "worst purchase"]
+    generic_phrase_count = sum(1 for phrase in generic_phrases if phrase in review_text)
+    if generic_phrase_count > 0 and word_count < 15:
+        return True, "Generic language"
+
+    orig_review = str(review_text)
+    if (orig_review.upper() == orig_review and len(orig_review) > 15) or \
+       (review_text.count('!') > 3 or review_text.count('?') > 3 or review_text.count('!!!') > 0):
+        return True, "Unnatural formatting"
+
+    promo_indicators = ["sponsored", "received for free", "in exchange for", "for my honest review", 
+                        "was provided", "company sent", "promotional", "ambassador", "received complimentary",
+                        "received product", "sample", "hashtag", "#ad", "#sponsored", "#partner", "influencer", "promo","For promotional purposes", "For promo only"]
+    for indicator in promo_indicators:
+        if indicator in review_text:
+            return True, "Promotional content"
+
+    extreme_positive_words = ["amazing", "awesome", "fantastic", "incredible", "excellent", "wonderful", "wow","exceptional","Outstanding"]
+    positive_count = sum(review_text.count(word) for word in extreme_positive_words)
+    if positive_count >= 2 and word_count < 20 and "because" not in review_text and "which" not in review_text:
+        return True, "Vague positive language"
+
+    if user:
+        username = str(user).lower()
+        random_pattern = re.compile(r'^[a-z]+[0-9]{2,}$')
+        if random_pattern.match(username):
+            return True, "Suspicious username pattern"
+
+    return False, None
+
+
+def compiled_rules(review_text, user=None):
+    """The same rules through updated_api's single-pass matcher"""
+    counts = updated_api.rule_matcher.scan(review_text)
+    verdict = updated_api.check_text_rules(review_text, None, None, counts)
+    if verdict is None:
+        verdict = updated_api.check_pattern_rules(review_text, user, counts)
+    return verdict if verdict is not None else (False, None)
+
+
+VOCABULARY = (
+    "the app is good but it keeps crashing when i open the camera and support never replies "
+    "which is annoying because i paid for premium after the last update battery drains fast "
+    "login takes forever ads everywhere please fix sync settings screen dark mode widget "
+    "notifications payment refund crash bug slow"
+).split()
+
+
+def make_review(rng, n_words):
+    # Unique filler tokens keep the repetition rules from firing early, so the
+    # whole rule chain runs like it does for a genuine long review
+    words = [f"{rng.choice(VOCABULARY)}{i}" for i in range(n_words)]
+    return " ".join(words).lower()
+
+
+def main():
+    rng = random.Random(42)
+    runs = 200
+    print(f"{'words':>6} {'chars':>6} {'legacy us':>10} {'compiled us':>12} {'speedup':>8}")
+    for n_words in (20, 50, 100, 200, 400, 800):
+        reviews = [make_review(rng, n_words) for _ in range(20)]
+        for review in reviews:
+            assert legacy_rules(review, "anna") == compiled_rules(review, "anna")
+
+        legacy = timeit.timeit(lambda: [legacy_rules(r, "anna") for r in reviews], number=runs)
+        compiled = timeit.timeit(lambda: [compiled_rules(r, "anna") for r in reviews], number=runs)
+        per_legacy = legacy / (runs * len(reviews)) * 1e6
+        per_compiled = compiled / (runs * len(reviews)) * 1e6
+        chars = sum(len(r) for r in reviews) // len(reviews)
+        print(f"{n_words:>6} {chars:>6} {per_legacy:>10.1f} {per_compiled:>12.1f} {per_legacy / per_compiled:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""Padding and wall time of the sentiment model with and without length-sorted batches.
+
+A batch is padded to its longest input, so batching reviews in arrival order
+pads most short reviews up to the occasional long one. This feeds the same
+synthetic corpus (benchmarks/corpus.py, realistic Play Store length mix)
+through the sentiment pipeline twice, in arrival order and sorted by token
+length as updated_api.run_sentiment() does, and reports the padded tokens and
+time of each. Reviews over the model's token limit are left out of both runs
+and only counted, since updated_api scores them in windows either way.
+
+Run from NLP-API/:  python benchmarks/bench_length_bucketing.py [--reviews 2000 --batch-size 32]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from corpus import generate_reviews  # noqa: E402
+
+
+def padding(lengths, batch_size):
+    """Real and padded token counts of batching lengths in the given order"""
+    real = sum(lengths)
+    padded = sum(
+        max(lengths[start:start + batch_size]) * len(lengths[start:start + batch_size])
+        for start in range(0, len(lengths), batch_size)
+    )
+    return real, padded
+
+
+def run_order(sentiment_pipeline, texts, lengths, batch_size):
+    real, padded = padding(lengths, batch_size)
+    start = time.perf_counter()
+    for offset in range(0, len(texts), batch_size):
+        sentiment_pipeline(texts[offset:offset + batch_size], batch_size=batch_size)
+    seconds = time.perf_counter() - start
+    return {
+        "real_tokens": real,
+        "padded_tokens": padded,
+        "padding_fraction": round(1 - real / padded, 3),
+        "seconds": round(seconds, 3),
+        "reviews_per_second": round(len(texts) / seconds, 1)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--reviews", type=int, default=2000)
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--backend", default="torch")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    from sentiment_backends import load_sentiment_pipeline
+
+    sentiment_pipeline = load_sentiment_pipeline(args.backend)
+    tokenizer = sentiment_pipeline.tokenizer
+    limit = min(tokenizer.model_max_length, getattr(sentiment_pipeline.model.config, "max_position_embeddings", 512))
+
+    texts = [r["review"] for r in generate_reviews(args.reviews, seed=args.seed) if r["review"]]
+    lengths = tokenizer(texts, return_length=True, verbose=False)["length"]
+    fitting = [(text, length) for text, length in zip(texts, lengths) if length <= limit]
+    by_length = sorted(fitting, key=lambda pair: pair[1])
+
+    # Warm up lazy initialization before timing
+    sentiment_pipeline([text for text, _ in fitting[:args.batch_size]], batch_size=args.batch_size)
+
+    report = {
+        "reviews": len(texts),
+        "over_token_limit": len(texts) - len(fitting),
+        "token_limit": limit,
+        "batch_size": args.batch_size,
+        "arrival_order": run_order(
+            sentiment_pipeline, [t for t, _ in fitting], [n for _, n in fitting], args.batch_size
+        ),
+        "length_sorted": run_order(
+            sentiment_pipeline, [t for t, _ in by_length], [n for _, n in by_length], args.batch_size
+        )
+    }
+    report["padded_tokens_saved"] = round(
+        1 - report["length_sorted"]["padded_tokens"] / report["arrival_order"]["padded_tokens"], 3
+    )
+    report["speedup"] = round(report["arrival_order"]["seconds"] / report["length_sorted"]["seconds"], 2)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
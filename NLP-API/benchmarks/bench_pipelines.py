@@ -0,0 +1,342 @@
+"""Reproducible benchmark suite for the NLP-API pipelines.
+
+Targets, each measured in its own subprocess so peak RSS is its own:
+
+    stages       per-stage microbenchmarks of updated_api.py: fake-review
+                 heuristics, near-duplicate detection, sentiment, KeyBERT and spaCy
+    updated_api  end-to-end POST /analyze of updated_api.py (Flask)
+    nlp-api      end-to-end POST /analyze of nlp-api.py (FastAPI + Groq), plus
+                 time to the first review from its /analyze/stream
+    nlp          end-to-end POST /suggestions of nlp.py (FastAPI + Groq), which
+                 has no /analyze route
+    hybrid       end-to-end POST /analyze of updated_api.py with HYBRID_ESCALATION,
+                 local model first and the LLM only for uncertain reviews
+
+The Groq-backed services run against the local HTTP stub in
+benchmarks/groq_stub.py, so they measure this code and not the Groq API;
+--groq-latency-ms adds a delay before the first token of each call and
+--groq-tokens-per-second a generation speed after it.
+All targets use the same synthetic corpus (benchmarks/corpus.py, fixed seed).
+Results go to a JSON file tagged with the git commit; --compare prints the
+change against an earlier file.
+
+Run from NLP-API/:
+    python benchmarks/bench_pipelines.py
+    python benchmarks/bench_pipelines.py --targets stages updated_api --reviews 500
+    python benchmarks/bench_pipelines.py --compare benchmarks/results/<old>.json
+"""
+import argparse
+import contextlib
+import datetime
+import http.client
+import importlib.util
+import json
+import os
+import platform
+import socket
+import subprocess
+import sys
+import threading
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+API_DIR = os.path.join(BENCH_DIR, "..")
+sys.path.insert(0, API_DIR)
+
+from corpus import generate_reviews, describe  # noqa: E402
+from measure import rss_mb, peak_rss_mb, percentile, latency_summary  # noqa: E402
+
+TARGETS = ("stages", "updated_api", "nlp-api", "nlp", "hybrid")
+DESCRIPTION = "Benchmark app for tracking review analysis performance. Synthetic reviews only."
+
+
+def quiet():
+    """Silence the services' per-review prints while timing"""
+    return contextlib.redirect_stdout(open(os.devnull, "w"))
+
+
+def time_batches(run, items, batch_size):
+    """Call run() on consecutive batches, returns the latency summary per batch"""
+    latencies = []
+    start = time.perf_counter()
+    for offset in range(0, len(items), batch_size):
+        batch_start = time.perf_counter()
+        run(items[offset:offset + batch_size])
+        latencies.append(time.perf_counter() - batch_start)
+    return latency_summary(latencies, len(items), time.perf_counter() - start, prefix="batch_latency")
+
+
+def bench_stages(reviews, args):
+    """Each model/heuristic stage of updated_api.py on its own, without the result cache"""
+    with quiet():
+        import updated_api
+
+    texts = [r["review"] for r in reviews if r["review"]]
+    lowered = [text.lower() for text in texts]
+    results = {"model_rss_mb": round(rss_mb(), 1)}
+
+    def heuristics(batch):
+        for review in batch:
+            updated_api.is_fake_review(review["review"], None, None, review["user"], sentiment_result=None, doc=None)
+
+    with quiet():
+        results["heuristics"] = time_batches(heuristics, [r for r in reviews if r["review"]], args.batch_size)
+        results["sentiment"] = time_batches(
+            lambda batch: updated_api.run_sentiment(batch, args.batch_size), texts, args.batch_size
+        )
+        results["keybert"] = time_batches(updated_api.extract_keywords_batch, texts, args.batch_size)
+        # Batch-level stage, so the whole corpus goes in as one request would
+        results["near_duplicates"] = time_batches(updated_api.duplicate_detector.flag, texts, len(texts))
+        if updated_api.nlp is not None:
+            results["spacy"] = time_batches(
+                lambda batch: list(updated_api.nlp.pipe(batch, batch_size=len(batch))), lowered, args.batch_size
+            )
+    return results
+
+
+def load_module(name, filename):
+    spec = importlib.util.spec_from_file_location(name, os.path.join(API_DIR, filename))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def groq_stubbed(latency_ms, tokens_per_second):
+    """Start the local Groq stub and point the Groq clients at it, before a service module creates one"""
+    from groq_stub import start_server
+
+    server = start_server(delay=latency_ms / 1000, tokens_per_second=tokens_per_second)
+    os.environ["GROQ_BASE_URL"] = f"http://127.0.0.1:{server.server_port}"
+    os.environ["GROQ_API_KEY"] = "stub"
+    return server
+
+
+def make_client(target, args):
+    """Test client for the target app, a payload builder for its endpoint and the Groq stub (or None)"""
+    stub = None
+    if target in ("updated_api", "hybrid"):
+        if target == "hybrid":
+            stub = groq_stubbed(args.groq_latency_ms, args.groq_tokens_per_second)
+            os.environ["HYBRID_ESCALATION"] = "1"
+        import updated_api
+        path = "/analyze"
+        client = updated_api.app.test_client()
+    else:
+        from fastapi.testclient import TestClient
+        stub = groq_stubbed(args.groq_latency_ms, args.groq_tokens_per_second)
+        module = load_module("nlp_api" if target == "nlp-api" else "nlp", f"{target}.py")
+        path = "/analyze" if target == "nlp-api" else "/suggestions"
+        client = TestClient(module.app)
+
+    def payload(batch):
+        if target == "nlp":
+            return {"model": "llama-3.1-8b-instant", "reviews": [r["review"] or "" for r in batch]}
+        return {"uid": "bench", "title": "Bench", "icon": "", "description": DESCRIPTION,
+                "brandURLType": "PlayStoreApp", "reviews": batch}
+
+    return client, path, payload, stub
+
+
+def bench_end_to_end(target, reviews, args):
+    """POST the corpus to the target in requests of --request-size reviews"""
+    from groq_stub import stats
+
+    with quiet():
+        client, path, payload, stub = make_client(target, args)
+        # One request on a separate corpus so lazy setup isn't timed (and not cached)
+        client.post(path, json=payload(generate_reviews(args.request_size, seed=args.seed + 1)))
+    loaded_rss = rss_mb()
+    stub_before = stats(stub) if stub else None
+
+    latencies = []
+    errors = 0
+    escalated = 0
+    start = time.perf_counter()
+    with quiet():
+        for offset in range(0, len(reviews), args.request_size):
+            batch = reviews[offset:offset + args.request_size]
+            request_start = time.perf_counter()
+            response = client.post(path, json=payload(batch))
+            latencies.append(time.perf_counter() - request_start)
+            errors += response.status_code != 200
+            if target == "hybrid" and response.status_code == 200:
+                escalated += response.get_json().get("escalation", {}).get("escalated", 0)
+    total = time.perf_counter() - start
+
+    result = latency_summary(latencies, len(reviews), total, prefix="request_latency")
+    result.update({"endpoint": path, "request_size": args.request_size, "requests": len(latencies),
+                   "errors": errors, "model_rss_mb": round(loaded_rss, 1)})
+    if stub:
+        # Groq usage of the timed requests only
+        stub_after = stats(stub)
+        result["groq"] = {name: stub_after[name] - stub_before[name]
+                          for name in ("requests", "prompt_tokens", "completion_tokens")}
+        result["groq"]["tokens_per_review"] = round(
+            (result["groq"]["prompt_tokens"] + result["groq"]["completion_tokens"]) / len(reviews), 1
+        )
+    if target == "hybrid":
+        result["escalated_fraction"] = round(escalated / len(reviews), 4)
+    if target == "nlp-api":
+        with quiet():
+            result["stream"] = bench_first_review(client.app, reviews, payload, args)
+    return result
+
+
+def bench_first_review(asgi_app, reviews, payload, args):
+    """Time to the first and to the last line of /analyze/stream, per request.
+
+    The test client buffers whole responses, so this serves the app with
+    uvicorn on a free local port and reads the stream as it arrives. refresh
+    is set so every review goes to the (stubbed) model.
+    """
+    import uvicorn
+
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        port = probe.getsockname()[1]
+    server = uvicorn.Server(uvicorn.Config(asgi_app, host="127.0.0.1", port=port, log_level="error"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.01)
+
+    first, latencies = [], []
+    start = time.perf_counter()
+    try:
+        for offset in range(0, len(reviews), args.request_size):
+            body = json.dumps(dict(payload(reviews[offset:offset + args.request_size]), refresh=True))
+            conn = http.client.HTTPConnection("127.0.0.1", port)
+            request_start = time.perf_counter()
+            conn.request("POST", "/analyze/stream", body, {"Content-Type": "application/json"})
+            first_line = None
+            for _ in conn.getresponse():
+                if first_line is None:
+                    first_line = time.perf_counter() - request_start
+            latencies.append(time.perf_counter() - request_start)
+            first.append(first_line)
+            conn.close()
+    finally:
+        server.should_exit = True
+        thread.join()
+
+    result = latency_summary(latencies, len(reviews), time.perf_counter() - start, prefix="stream_latency")
+    first.sort()
+    for q in (0.5, 0.95):
+        result[f"first_review_p{int(q * 100)}_ms"] = round(percentile(first, q) * 1000, 3)
+    result["endpoint"] = "/analyze/stream"
+    return result
+
+
+def run_worker(target, args):
+    reviews = generate_reviews(args.reviews, seed=args.seed)
+    result = bench_stages(reviews, args) if target == "stages" else bench_end_to_end(target, reviews, args)
+    result["peak_rss_mb"] = round(peak_rss_mb(), 1)
+    return result
+
+
+def git_commit():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BENCH_DIR,
+                                capture_output=True, text=True, check=True).stdout.strip()
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=BENCH_DIR,
+                               capture_output=True, text=True).stdout.strip()
+        return commit + ("-dirty" if dirty else "")
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def flatten(results):
+    """{(target, stage): metrics} for every block carrying reviews_per_second"""
+    rows = {}
+    for target, result in results.items():
+        if "reviews_per_second" in result:
+            rows[(target, "")] = result
+        for stage, metrics in result.items():
+            if isinstance(metrics, dict) and "reviews_per_second" in metrics:
+                rows[(target, stage)] = metrics
+    return rows
+
+
+def compare(old, new):
+    old_rows, new_rows = flatten(old["results"]), flatten(new["results"])
+    print(f"\nChange from {old['meta']['commit']} to {new['meta']['commit']}")
+    for key, metrics in new_rows.items():
+        before = old_rows.get(key)
+        if not before or not before.get("reviews_per_second") or not metrics.get("reviews_per_second"):
+            continue
+        ratio = metrics["reviews_per_second"] / before["reviews_per_second"]
+        name = " ".join(part for part in key if part)
+        print(f"{name:>24}: {before['reviews_per_second']:>9} -> {metrics['reviews_per_second']:>9} reviews/s ({ratio:.2f}x)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--targets", nargs="+", choices=TARGETS, default=list(TARGETS))
+    parser.add_argument("--reviews", type=int, default=2000, help="corpus size")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--batch-size", type=int, default=32, help="texts per call in the stage benchmarks")
+    parser.add_argument("--request-size", type=int, default=100, help="reviews per end-to-end request")
+    parser.add_argument("--groq-latency-ms", type=float, default=0.0, help="stubbed Groq delay before the first token")
+    parser.add_argument("--groq-tokens-per-second", type=float, default=0.0,
+                        help="stubbed Groq generation speed, 0 for instant")
+    parser.add_argument("--output", help="result file (default benchmarks/results/<commit>.json)")
+    parser.add_argument("--compare", help="earlier result file to compare against")
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        result = run_worker(args.worker, args)
+        print(json.dumps(result))
+        return
+
+    commit = git_commit()
+    report = {
+        "meta": {
+            "commit": commit,
+            "created_at": datetime.datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "args": {k: v for k, v in vars(args).items() if k not in ("worker", "output", "compare")}
+        },
+        "corpus": describe(generate_reviews(args.reviews, seed=args.seed)),
+        "results": {}
+    }
+
+    worker_args = ["--reviews", str(args.reviews), "--seed", str(args.seed), "--batch-size", str(args.batch_size),
+                   "--request-size", str(args.request_size), "--groq-latency-ms", str(args.groq_latency_ms),
+                   "--groq-tokens-per-second", str(args.groq_tokens_per_second)]
+    for target in args.targets:
+        completed = subprocess.run([sys.executable, os.path.abspath(__file__), "--worker", target] + worker_args,
+                                   capture_output=True, text=True)
+        lines = [line for line in completed.stdout.splitlines() if line.startswith("{")]
+        if completed.returncode != 0 or not lines:
+            error = completed.stderr.strip().splitlines()[-1] if completed.stderr.strip() else "no output"
+            print(f"{target}: failed ({error})")
+            report["results"][target] = {"error": error}
+            continue
+        report["results"][target] = json.loads(lines[-1])
+
+    for (target, stage), metrics in flatten(report["results"]).items():
+        name = f"{target} {stage}".strip()
+        latencies = " ".join(
+            f"{k[:-3].split('latency_')[-1]} {v}ms" for k, v in metrics.items() if k.endswith("_ms")
+        )
+        print(f"{name:>24}: {metrics['reviews_per_second']:>9} reviews/s  {latencies}")
+    for target, result in report["results"].items():
+        if "peak_rss_mb" in result:
+            print(f"{target:>24}: peak RSS {result['peak_rss_mb']} MB")
+
+    output = args.output or os.path.join(BENCH_DIR, "results", f"{commit}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as out:
+        json.dump(report, out, indent=2)
+    print(f"Results written to {output}")
+
+    if args.compare:
+        with open(args.compare) as previous:
+            compare(json.load(previous), report)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""Scaling of updated_api's multi-core mode with the number of pool workers.
+
+Analyzes the same synthetic corpus (benchmarks/corpus.py) once in-process, as
+updated_api does without REVIEW_POOL_WORKERS, then through a fresh
+ReviewPool of each requested size, and reports pool startup time (every
+worker loading its models), reviews/sec, speedup over in-process and whether
+the merged entries and tallies are identical to the in-process ones. Each
+pool starts with cold caches, so no run profits from an earlier one.
+
+Run from NLP-API/:  python benchmarks/bench_review_pool.py [--reviews 4000 --workers 1 2 4 8 16]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from corpus import generate_reviews  # noqa: E402
+
+
+def timed(api, reviews):
+    start = time.perf_counter()
+    entries, totals = api.analyze_sharded(reviews)
+    return entries, totals, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--reviews", type=int, default=4000)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8, 16])
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    # The pools are built below; the in-process run must not use caches from disk
+    os.environ["REVIEW_POOL_WORKERS"] = "0"
+    os.environ.pop("RESULT_CACHE_PATH", None)
+    os.environ.pop("REVIEW_STORE_PATH", None)
+    import updated_api
+    from review_pool import ReviewPool
+
+    reviews = generate_reviews(args.reviews, seed=args.seed)
+    entries, totals, seconds = timed(updated_api, reviews)
+    report = {
+        "reviews": len(reviews),
+        "cpu_count": os.cpu_count(),
+        "in_process": {"seconds": round(seconds, 3), "reviews_per_second": round(len(reviews) / seconds, 1)}
+    }
+
+    updated_api.REVIEW_POOL_MIN_REVIEWS = 1
+    for workers in args.workers:
+        pool = ReviewPool(workers)
+        start = time.perf_counter()
+        pool.start()
+        startup = time.perf_counter() - start
+        updated_api.review_pool = pool
+        try:
+            pool_entries, pool_totals, seconds = timed(updated_api, reviews)
+        finally:
+            updated_api.review_pool = None
+            pool.shutdown()
+        report[f"workers_{workers}"] = {
+            "torch_threads": pool.torch_threads,
+            "startup_seconds": round(startup, 2),
+            "seconds": round(seconds, 3),
+            "reviews_per_second": round(len(reviews) / seconds, 1),
+            "speedup": round(report["in_process"]["seconds"] / seconds, 2),
+            "same_entries": pool_entries == entries,
+            "same_totals": pool_totals == totals
+        }
+        print(f"{workers} workers: {report[f'workers_{workers}']}", file=sys.stderr)
+
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""Latency, throughput and memory of each sentiment inference backend.
+
+Every backend runs in its own subprocess so its resident memory is measured in
+isolation. The ONNX backends need export_sentiment_model.py to have been run.
+
+Run from NLP-API/:  python benchmarks/bench_sentiment_backends.py [--backends torch onnx ...]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from measure import rss_mb, peak_rss_mb  # noqa: E402
+
+
+def run_backend(backend, n_texts, batch_size):
+    """Measure one backend in the current process, returns a result dict"""
+    from export_sentiment_model import PARITY_CORPUS
+    from sentiment_backends import load_sentiment_pipeline
+
+    texts = (PARITY_CORPUS * (n_texts // len(PARITY_CORPUS) + 1))[:n_texts]
+    base_rss = rss_mb()
+
+    start = time.perf_counter()
+    sentiment_pipeline = load_sentiment_pipeline(backend)
+    load_seconds = time.perf_counter() - start
+    loaded_rss = rss_mb()
+
+    # Warm up lazy initialization before timing
+    sentiment_pipeline(texts[:batch_size], batch_size=batch_size)
+
+    latencies = []
+    start = time.perf_counter()
+    for offset in range(0, len(texts), batch_size):
+        batch_start = time.perf_counter()
+        sentiment_pipeline(texts[offset:offset + batch_size], batch_size=batch_size)
+        latencies.append(time.perf_counter() - batch_start)
+    total = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        "backend": backend,
+        "texts": len(texts),
+        "batch_size": batch_size,
+        "load_seconds": round(load_seconds, 3),
+        "batch_latency_p50_ms": round(statistics.median(latencies) * 1000, 2),
+        "batch_latency_p95_ms": round(latencies[min(len(latencies) - 1, int(0.95 * len(latencies)))] * 1000, 2),
+        "per_review_ms": round(total / len(texts) * 1000, 3),
+        "reviews_per_second": round(len(texts) / total, 1),
+        "model_rss_mb": round(loaded_rss - base_rss, 1),
+        "peak_rss_mb": round(peak_rss_mb(), 1)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backends", nargs="+", default=["torch", "torch-int8", "onnx", "onnx-int8"])
+    parser.add_argument("--texts", type=int, default=512)
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(run_backend(args.worker, args.texts, args.batch_size)))
+        return
+
+    results = []
+    for backend in args.backends:
+        completed = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--worker", backend,
+             "--texts", str(args.texts), "--batch-size", str(args.batch_size)],
+            capture_output=True, text=True
+        )
+        lines = [line for line in completed.stdout.splitlines() if line.startswith("{")]
+        if completed.returncode != 0 or not lines:
+            print(f"{backend}: failed\n{completed.stderr.strip().splitlines()[-1] if completed.stderr else ''}")
+            continue
+        results.append(json.loads(lines[-1]))
+
+    columns = ["backend", "load_seconds", "batch_latency_p50_ms", "batch_latency_p95_ms",
+               "per_review_ms", "reviews_per_second", "model_rss_mb", "peak_rss_mb"]
+    print(" ".join(f"{c:>20}" for c in columns))
+    for result in results:
+        print(" ".join(f"{str(result[c]):>20}" for c in columns))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""Payload size and encode time of the /analyze response in each wire format.
+
+Analyzes a synthetic corpus (benchmarks/corpus.py) once with updated_api to get
+a real response, then encodes it, full and lean (?lean=1), as stdlib JSON the
+way Flask's jsonify does, as orjson JSON and as msgpack, each uncompressed,
+gzip and zstd, as wire_format.negotiated_response() would. Reports bytes and
+median encode milliseconds, compression included, and size and time relative
+to jsonify of the full response.
+
+Run from NLP-API/:  python benchmarks/bench_wire_format.py [--reviews 5000 --repeat 7]
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from corpus import generate_reviews  # noqa: E402
+
+
+def median_ms(encode, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        body = encode()
+        times.append(time.perf_counter() - start)
+    return body, statistics.median(times) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--reviews", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=7)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    import updated_api
+    import wire_format
+
+    reviews = generate_reviews(args.reviews, seed=args.seed)
+    client = updated_api.app.test_client()
+    full = client.post("/analyze", json={"description": "Benchmark app.", "reviews": reviews}).get_json()
+    full.pop("debug", None)
+    lean = updated_api.make_lean(dict(full))
+
+    report = {"reviews": len(reviews), "modes": {}}
+    for shape, payload in (("full", full), ("lean", lean)):
+        formats = {"jsonify": lambda: updated_api.app.json.dumps(payload).encode("utf-8")}
+        if wire_format.orjson is not None:
+            formats["orjson"] = lambda: wire_format.dumps(payload)
+        if wire_format.msgpack is not None:
+            formats["msgpack"] = lambda: wire_format.encode(payload, wire_format.MSGPACK)
+
+        for name, serialize in formats.items():
+            for encoding in ["identity", *(e for e in wire_format.encodings() if e != "identity")]:
+                body, ms = median_ms(lambda: wire_format.compress(serialize(), encoding), args.repeat)
+                report["modes"][f"{shape}/{name}/{encoding}"] = {"bytes": len(body), "encode_ms": round(ms, 2)}
+
+    baseline = report["modes"]["full/jsonify/identity"]
+    for mode in report["modes"].values():
+        mode["size_vs_jsonify"] = round(mode["bytes"] / baseline["bytes"], 3)
+        mode["time_vs_jsonify"] = round(mode["encode_ms"] / baseline["encode_ms"], 3)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
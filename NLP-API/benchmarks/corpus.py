@@ -0,0 +1,147 @@
+"""Synthetic Play Store review corpus for the benchmarks.
+
+Reviews have the shape the backend sends to /analyze ({"user", "rating",
+"review"}) and roughly follow what google-play-scraper returns: mostly short
+texts with a long tail, J-shaped star ratings, a few promotional and all-caps
+reviews and verbatim repeats posted under different names. The same seed
+always gives the same corpus, so runs on different commits are comparable.
+"""
+import math
+import random
+
+# Share of reviews per star rating, Play Store ratings cluster on 5 and 1
+RATING_WEIGHTS = {5: 0.55, 4: 0.12, 3: 0.07, 2: 0.06, 1: 0.20}
+
+POSITIVE_SENTENCES = [
+    "Great app, does exactly what I need every day.",
+    "Love the new design, much faster than before.",
+    "Simple, clean and reliable.",
+    "Excellent offline mode, saved me on a long flight.",
+    "Support fixed my issue within an hour, impressive service.",
+    "Good value for the price, I use it daily.",
+    "The widgets are handy and the dark mode is easy on the eyes.",
+    "Reliable backups and the export to PDF works perfectly.",
+    "My kids love the games and there are no ads.",
+    "Best budgeting app I have tried so far, the charts are very clear.",
+]
+
+NEGATIVE_SENTENCES = [
+    "Keeps crashing whenever I open the camera.",
+    "Useless since the last update.",
+    "Customer support never replied to my refund request.",
+    "Battery drain is terrible after the update, please fix.",
+    "The subscription renews without asking.",
+    "The login screen freezes and I have to restart my phone.",
+    "Lost all my notes after updating.",
+    "Payments fail half the time and there is no error message.",
+    "Ads pop up in the middle of typing, incredibly frustrating.",
+    "Every screen loads slowly and the animations stutter.",
+]
+
+NEUTRAL_SENTENCES = [
+    "It's okay, some features are nice.",
+    "Does what it says, nothing more.",
+    "The interface is a bit dated but it works.",
+    "Sync fails now and then.",
+    "The tutorial was confusing at first.",
+    "Would be nice to have more themes.",
+    "Not bad, not great.",
+    "I mostly use it for the calendar view.",
+]
+
+SHORT_REVIEWS = ["Good", "Nice app", "Bad", "Ok", "Love it", "Worst app", "👍", "Great!", "Useless", "Fine"]
+
+PROMO_SUFFIXES = [
+    "I received this app for free in exchange for my honest review.",
+    "Sponsored post #ad",
+    "Use my promo code for a free month! #partner",
+]
+
+FIRST_NAMES = ["Anna", "Rahul", "Maria", "John", "Li", "Fatima", "Carlos", "Olga", "Kwame", "Sara"]
+LAST_NAMES = ["Smith", "Kumar", "Garcia", "Chen", "Okafor", "Ivanova", "Silva", "Brown"]
+
+
+def sentence_pool(rating):
+    if rating >= 4:
+        return POSITIVE_SENTENCES
+    if rating <= 2:
+        return NEGATIVE_SENTENCES
+    return NEUTRAL_SENTENCES
+
+
+def make_user(rng):
+    roll = rng.random()
+    if roll < 0.1:
+        return "A Google user"
+    if roll < 0.2:
+        return f"{rng.choice(FIRST_NAMES).lower()}{rng.randint(10, 9999)}"
+    return f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+
+
+def make_text(rng, rating, target_words):
+    """Join sentences matching the rating (with some off-topic mix) up to about target_words"""
+    if target_words <= 2:
+        return rng.choice(SHORT_REVIEWS)
+
+    sentences = []
+    words = 0
+    while words < target_words:
+        # Mixed reviews and rating-sentiment mismatches both happen
+        pool = sentence_pool(rating) if rng.random() < 0.85 else rng.choice(
+            [POSITIVE_SENTENCES, NEGATIVE_SENTENCES, NEUTRAL_SENTENCES]
+        )
+        sentence = rng.choice(pool)
+        sentences.append(sentence)
+        words += len(sentence.split())
+    return " ".join(sentences)
+
+
+def generate_reviews(n, seed=0, long_fraction=0.01, promo_fraction=0.02, repeat_fraction=0.05, caps_fraction=0.03):
+    """Return n synthetic reviews.
+
+    Word counts are log-normal (median around 12 words). long_fraction of the
+    reviews run past the sentiment model's 512-token limit. Promotional
+    suffixes, all-caps texts and verbatim repeats of earlier reviews each occur
+    at their given rate.
+    """
+    rng = random.Random(seed)
+    ratings = list(RATING_WEIGHTS)
+    weights = list(RATING_WEIGHTS.values())
+    reviews = []
+
+    for _ in range(n):
+        rating = rng.choices(ratings, weights)[0]
+        user = make_user(rng)
+
+        if reviews and rng.random() < repeat_fraction:
+            # Same text posted again under another name, as in review farms
+            reviews.append({"user": user, "rating": rating, "review": rng.choice(reviews)["review"]})
+            continue
+
+        if rng.random() < long_fraction:
+            target_words = rng.randint(600, 900)
+        else:
+            target_words = max(1, min(120, int(rng.lognormvariate(math.log(12), 0.9))))
+        text = make_text(rng, rating, target_words)
+
+        if rng.random() < promo_fraction:
+            text = f"{text} {rng.choice(PROMO_SUFFIXES)}"
+        if rng.random() < caps_fraction:
+            text = text.upper()
+
+        reviews.append({"user": user, "rating": rating, "review": text})
+
+    return reviews
+
+
+def describe(reviews):
+    """Summary of a generated corpus, stored next to the results"""
+    lengths = sorted(len((r["review"] or "").split()) for r in reviews)
+    texts = [r["review"] for r in reviews]
+    return {
+        "reviews": len(reviews),
+        "median_words": lengths[len(lengths) // 2] if lengths else 0,
+        "max_words": lengths[-1] if lengths else 0,
+        "unique_texts": len(set(texts)),
+        "ratings": {str(rating): sum(1 for r in reviews if r["rating"] == rating) for rating in RATING_WEIGHTS}
+    }
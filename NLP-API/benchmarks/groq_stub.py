@@ -0,0 +1,190 @@
+"""Local stand-in for the Groq API used by nlp-api.py and nlp.py.
+
+A small HTTP server answering POST /openai/v1/chat/completions the way Groq
+does, so the real client is exercised without any network access. Prompts
+listing numbered reviews ("1. text") get a JSON array with one analysis per
+review, in the shape nlp-api.py asks for (optionally shuffled, to exercise
+matching by id). Any other prompt gets a short bullet list. Requests with
+"stream": true get server-sent events, a few characters per event.
+
+A delay per call emulates the round trip before the first token, a token rate
+the generation after it, and every Nth request can be rate limited (429 with
+Retry-After) to exercise the retry path.
+
+    python benchmarks/groq_stub.py --port 8400 --latency-ms 200 --tokens-per-second 750
+    GROQ_BASE_URL=http://127.0.0.1:8400 GROQ_API_KEY=stub uvicorn nlp-api:app
+
+GET /stats reports requests served, rate-limited answers, peak concurrency and
+the prompt and completion tokens used (about 4 characters per token).
+"""
+import argparse
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+NUMBERED_REVIEW = re.compile(r"^\s*(\d+)\.\s(.*)$", re.MULTILINE)
+POSITIVE_WORDS = {"great", "love", "excellent", "good", "reliable", "best", "nice", "clear", "impressive", "handy"}
+NEGATIVE_WORDS = {"crashing", "useless", "terrible", "never", "fail", "lost", "frustrating", "slowly", "worst", "bad"}
+STOP_WORDS = {"the", "and", "this", "that", "with", "after", "every", "when", "have", "there", "what", "much"}
+
+
+def analyze_text(text):
+    words = re.findall(r"[a-z']+", text.lower())
+    score = sum(w in POSITIVE_WORDS for w in words) - sum(w in NEGATIVE_WORDS for w in words)
+    sentiment = "POSITIVE" if score > 0 else "NEGATIVE" if score < 0 else "NEUTRAL"
+    keywords = list(dict.fromkeys(w for w in words if len(w) > 3 and w not in STOP_WORDS))[:5]
+    return {
+        "review": text,
+        "sentiment": sentiment,
+        "confidence": round(min(0.99, 0.6 + 0.1 * abs(score)), 2),
+        "keywords": keywords
+    }
+
+
+def completion_text(messages, shuffle=False):
+    prompt = messages[-1]["content"]
+    reviews = NUMBERED_REVIEW.findall(prompt)
+    if reviews:
+        results = [{"id": int(number), **analyze_text(text)} for number, text in reviews]
+        if shuffle:
+            random.shuffle(results)
+        return json.dumps(results)
+    return "- Fix the crash on launch reported in several reviews\n- Reduce battery usage after the last update"
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        server = self.server
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        with server.lock:
+            server.requests += 1
+            request_number = server.requests
+            server.in_flight += 1
+            server.max_in_flight = max(server.max_in_flight, server.in_flight)
+        try:
+            if server.rate_limit_every and request_number % server.rate_limit_every == 0:
+                with server.lock:
+                    server.rate_limited += 1
+                self._send(429, {"error": {"message": "Rate limit reached", "type": "rate_limit_exceeded"}},
+                           {"retry-after": str(server.retry_after)})
+                return
+            if server.delay:
+                time.sleep(server.delay)
+            messages = body.get("messages", [])
+            content = completion_text(messages, server.shuffle)
+            prompt_tokens = sum(len(m["content"]) for m in messages) // 4
+            with server.lock:
+                server.prompt_tokens += prompt_tokens
+                server.completion_tokens += len(content) // 4
+            if body.get("stream"):
+                self._stream(request_number, body.get("model"), content)
+                return
+            if server.tokens_per_second:
+                time.sleep(len(content) / 4 / server.tokens_per_second)
+            self._send(200, {
+                "id": f"chatcmpl-stub-{request_number}",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": body.get("model"),
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": content},
+                             "finish_reason": "stop"}],
+                "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": len(content) // 4,
+                          "total_tokens": prompt_tokens + len(content) // 4}
+            })
+        finally:
+            with server.lock:
+                server.in_flight -= 1
+
+    def _stream(self, request_number, model, content, piece_size=16):
+        """Send content as chat.completion.chunk events, piece_size characters (about 4 tokens) each"""
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.end_headers()
+        pause = piece_size / 4 / self.server.tokens_per_second if self.server.tokens_per_second else 0
+        pieces = [content[i:i + piece_size] for i in range(0, len(content), piece_size)]
+        for i, piece in enumerate(pieces + [None]):
+            event = {
+                "id": f"chatcmpl-stub-{request_number}",
+                "object": "chat.completion.chunk",
+                "created": int(time.time()),
+                "model": model,
+                "choices": [{"index": 0, "delta": {"content": piece} if piece is not None else {},
+                             "finish_reason": None if piece is not None else "stop"}]
+            }
+            self.wfile.write(f"data: {json.dumps(event)}\n\n".encode("utf-8"))
+            if pause and piece is not None:
+                time.sleep(pause)
+        self.wfile.write(b"data: [DONE]\n\n")
+
+    def do_GET(self):
+        """/stats: requests served, how many were rate limited, the most handled at once and tokens used"""
+        self._send(200, stats(self.server))
+
+    def _send(self, status, payload, headers=None):
+        data = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def stats(server):
+    with server.lock:
+        return {"requests": server.requests, "rate_limited": server.rate_limited,
+                "max_in_flight": server.max_in_flight, "prompt_tokens": server.prompt_tokens,
+                "completion_tokens": server.completion_tokens}
+
+
+def start_server(port=0, delay=0.0, rate_limit_every=0, retry_after=0.0, tokens_per_second=0.0, shuffle=False):
+    """Serve the stub API on 127.0.0.1 from a background thread, returns the server.
+
+    delay is the seconds before the first token and tokens_per_second the
+    generation speed after it (0 sends everything at once); with
+    rate_limit_every=N every Nth request is answered 429 with a Retry-After of
+    retry_after seconds. shuffle returns review analyses in random order.
+    The base URL to give the Groq client is http://127.0.0.1:<server.server_port>.
+    """
+    server = ThreadingHTTPServer(("127.0.0.1", port), _Handler)
+    server.daemon_threads = True
+    server.delay = delay
+    server.rate_limit_every = rate_limit_every
+    server.retry_after = retry_after
+    server.tokens_per_second = tokens_per_second
+    server.shuffle = shuffle
+    server.lock = threading.Lock()
+    server.requests = server.rate_limited = server.in_flight = server.max_in_flight = 0
+    server.prompt_tokens = server.completion_tokens = 0
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=8400)
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="delay before the first token")
+    parser.add_argument("--tokens-per-second", type=float, default=0.0, help="generation speed, 0 for instant")
+    parser.add_argument("--shuffle", action="store_true", help="return review analyses in random order")
+    parser.add_argument("--rate-limit-every", type=int, default=0, help="answer every Nth request with 429")
+    parser.add_argument("--retry-after", type=float, default=1.0, help="Retry-After of the 429 answers, seconds")
+    args = parser.parse_args()
+
+    server = start_server(args.port, args.latency_ms / 1000, args.rate_limit_every, args.retry_after,
+                          args.tokens_per_second, args.shuffle)
+    print(f"Groq stub listening, GROQ_BASE_URL=http://127.0.0.1:{server.server_port}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,36 @@
+"""Timing and memory helpers shared by the benchmark scripts"""
+import resource
+
+
+def rss_mb():
+    """Current resident set size of this process in MB"""
+    try:
+        with open("/proc/self/status") as status:
+            for line in status:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def peak_rss_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def percentile(sorted_values, q):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return None
+    return sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))]
+
+
+def latency_summary(latencies, items, total_seconds, prefix="latency"):
+    """reviews/sec plus p50/p95/p99 of a list of latencies in seconds"""
+    latencies = sorted(latencies)
+    summary = {"reviews": items, "seconds": round(total_seconds, 3),
+               "reviews_per_second": round(items / total_seconds, 1) if total_seconds > 0 else None}
+    for q in (0.5, 0.95, 0.99):
+        value = percentile(latencies, q)
+        summary[f"{prefix}_p{int(q * 100)}_ms"] = round(value * 1000, 3) if value is not None else None
+    return summary
@@ -0,0 +1,126 @@
+import numpy as np
+
+from corpus_keywords import KeywordRanker
+
+
+def nearest_centers(vectors, centers, chunk_size=4096):
+    """Index of the nearest center of each row, and its squared distance, computed chunk_size rows at a time"""
+    half_norms = 0.5 * np.einsum("ij,ij->i", centers, centers)
+    labels = np.empty(len(vectors), dtype=np.int64)
+    distances = np.empty(len(vectors), dtype=np.float32)
+    for start in range(0, len(vectors), chunk_size):
+        chunk = np.asarray(vectors[start:start + chunk_size], dtype=np.float32)
+        # |x - c|^2 = |x|^2 - 2 (x.c - |c|^2 / 2), so the nearest center maximizes the bracket
+        scores = chunk @ centers.T - half_norms
+        best = scores.argmax(axis=1)
+        labels[start:start + len(chunk)] = best
+        distances[start:start + len(chunk)] = np.maximum(
+            np.einsum("ij,ij->i", chunk, chunk) - 2 * scores[np.arange(len(chunk)), best], 0
+        )
+    return labels, distances
+
+
+def kmeans_plus_plus(vectors, k, rng):
+    """k-means++ seeding: each next center drawn with probability proportional to its squared distance"""
+    centers = [vectors[rng.integers(len(vectors))]]
+    distances = np.einsum("ij,ij->i", vectors - centers[0], vectors - centers[0])
+    for _ in range(1, k):
+        total = distances.sum()
+        index = rng.choice(len(vectors), p=distances / total) if total > 0 else rng.integers(len(vectors))
+        centers.append(vectors[index])
+        difference = vectors - vectors[index]
+        distances = np.minimum(distances, np.einsum("ij,ij->i", difference, difference))
+    return np.array(centers, dtype=np.float32)
+
+
+def minibatch_kmeans(vectors, k, batch_size=1024, max_iter=100, tol=1e-4, seed=0):
+    """Cluster centers of vectors (n x dim) by mini-batch k-means, as a k x dim float32 array.
+
+    Centers are seeded with k-means++ on a sample of the rows. Each step
+    assigns one random batch to the nearest centers and moves every center to
+    the running mean of all rows it has been assigned so far, with one sparse
+    product per batch. It stops after max_iter batches, or once no center
+    moves by more than tol. Memory is bounded by the batch, not by n.
+    """
+    rng = np.random.default_rng(seed)
+    n = len(vectors)
+    k = min(k, n)
+    sample = np.sort(rng.choice(n, size=min(n, 3 * batch_size), replace=False))
+    centers = kmeans_plus_plus(np.asarray(vectors[sample], dtype=np.float32), k, rng)
+    counts = np.zeros(k, dtype=np.float64)
+    for _ in range(max_iter):
+        batch = np.asarray(vectors[np.sort(rng.choice(n, size=min(n, batch_size), replace=False))], dtype=np.float32)
+        labels, _ = nearest_centers(batch, centers)
+        membership = np.zeros((k, len(batch)), dtype=np.float32)
+        membership[labels, np.arange(len(batch))] = 1
+        batch_counts = membership.sum(axis=1)
+        counts += batch_counts
+        moved = batch_counts > 0
+        shift = (membership[moved] @ batch - batch_counts[moved, None] * centers[moved]) / counts[moved, None]
+        centers[moved] += shift.astype(np.float32)
+        if not len(shift) or np.einsum("ij,ij->i", shift, shift).max() <= tol * tol:
+            break
+    return centers
+
+
+class TopicClusterer:
+    """Group complaint reviews into topics by clustering their embeddings.
+
+    The embeddings are normalized to unit length, so distances follow cosine
+    similarity, and clustered with minibatch_kmeans into up to `clusters`
+    groups. Each cluster is labeled with its top c-TF-IDF terms from a
+    KeywordRanker over the cluster members, treating every cluster as one
+    class, and scored by its size times its average negativity, so a large
+    cluster of mildly negative reviews can outrank a small, angry one.
+    Clusters with fewer than min_reviews members, or no recurring terms, are
+    dropped.
+    """
+
+    def __init__(self, clusters=10, min_reviews=3, top_terms=5, batch_size=1024, max_iter=100, seed=0):
+        self.clusters = clusters
+        self.min_reviews = min_reviews
+        self.batch_size = batch_size
+        self.max_iter = max_iter
+        self.seed = seed
+        self.ranker = KeywordRanker(top_n=top_terms)
+
+    def cluster(self, texts, vectors, negativity):
+        """Topics of texts, best first.
+
+        vectors holds one embedding per text and negativity one score per
+        text, from 0 (not negative) to 1. Returns a list of {"label", "terms",
+        "reviews", "share", "negativity", "score", "example"}, where share is
+        the fraction of texts in the topic and example the text nearest its
+        center.
+        """
+        texts = [str(text) if text else "" for text in texts]
+        if len(texts) < self.min_reviews:
+            return []
+        vectors = np.asarray(vectors, dtype=np.float32)
+        vectors = vectors / np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+        negativity = np.asarray(negativity, dtype=np.float64)
+
+        k = max(1, min(self.clusters, len(texts) // self.min_reviews))
+        centers = minibatch_kmeans(vectors, k, batch_size=self.batch_size, max_iter=self.max_iter, seed=self.seed)
+        labels, distances = nearest_centers(vectors, centers)
+        ranking = self.ranker.rank(texts, labels.tolist())
+
+        topics = []
+        sizes = np.bincount(labels, minlength=len(centers))
+        for label in np.flatnonzero(sizes >= self.min_reviews):
+            terms = [item["keyword"] for item in ranking.get(int(label), [])]
+            if not terms:
+                continue
+            members = np.flatnonzero(labels == label)
+            average = float(negativity[members].mean())
+            topics.append({
+                "label": ", ".join(terms[:3]),
+                "terms": terms,
+                "reviews": int(sizes[label]),
+                "share": round(float(sizes[label]) / len(texts), 4),
+                "negativity": round(average, 4),
+                "score": round(float(sizes[label]) * average, 4),
+                "example": texts[members[distances[members].argmin()]]
+            })
+        topics.sort(key=lambda topic: (-topic["score"], topic["label"]))
+        return topics
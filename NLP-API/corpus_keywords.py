@@ -0,0 +1,93 @@
+import numpy as np
+from scipy import sparse
+from sklearn.feature_extraction.text import CountVectorizer
+
+
+def class_tfidf(class_counts):
+    """c-TF-IDF weights of a classes x terms count matrix, as a dense array.
+
+    Every class is treated as one document made of all its texts. Term counts
+    are normalized by the class's total, then weighted by log(1 + A / f), A the
+    average number of terms per class and f the term's count over all classes,
+    so a term frequent in every class ranks below one that marks a single class.
+    """
+    class_counts = sparse.csr_matrix(class_counts, dtype=np.float64)
+    terms_per_class = np.asarray(class_counts.sum(axis=1)).ravel()
+    term_totals = np.asarray(class_counts.sum(axis=0)).ravel()
+    average = terms_per_class.mean() if len(terms_per_class) else 0.0
+    idf = np.log1p(average / np.maximum(term_totals, 1))
+    tf = sparse.diags(1 / np.maximum(terms_per_class, 1)) @ class_counts
+    return (tf @ sparse.diags(idf)).toarray()
+
+
+class KeywordRanker:
+    """Rank the keywords and keyphrases of a whole corpus per group of texts.
+
+    One CountVectorizer pass builds a sparse document-term matrix of words and
+    n-grams over all texts, and one sparse product with the group membership
+    matrix sums it into per-group term counts, which class_tfidf turns into
+    weights. Terms in fewer than min_df texts are dropped, so a keyword has to
+    recur to be reported. The cost is a tokenization pass and a few sparse
+    products, with no model call per text.
+    """
+
+    def __init__(self, ngram_range=(1, 2), min_df=2, top_n=10, stop_words="english"):
+        self.ngram_range = ngram_range
+        self.min_df = min_df
+        self.top_n = top_n
+        self.stop_words = stop_words
+
+    def rank(self, texts, groups, per_text=0):
+        """Ranked keywords per group, and optionally the top keywords of each text.
+
+        groups holds the group of each text. Returns {group: [{"keyword",
+        "count", "reviews", "score"}, ...]}, best first, where count is the
+        number of occurrences in the group and reviews the number of its texts
+        containing the term; a term is only ranked in groups where it is in at
+        least min_df texts. With per_text, also returns for each text its up to
+        per_text terms that weigh most in its own group.
+        """
+        texts = [str(text) if text else "" for text in texts]
+        names = list(dict.fromkeys(sorted(groups)))
+        try:
+            vectorizer = CountVectorizer(
+                ngram_range=self.ngram_range, min_df=self.min_df, stop_words=self.stop_words
+            )
+            doc_terms = vectorizer.fit_transform(texts).tocsr()
+        except ValueError:
+            # Empty vocabulary: too few texts, or nothing recurring past the stop words
+            ranking = {name: [] for name in names}
+            return (ranking, [[] for _ in texts]) if per_text else ranking
+        vocabulary = vectorizer.get_feature_names_out()
+
+        group_index = {name: index for index, name in enumerate(names)}
+        rows = np.array([group_index[group] for group in groups], dtype=np.int64)
+        membership = sparse.csr_matrix(
+            (np.ones(len(texts)), (rows, np.arange(len(texts)))), shape=(len(names), len(texts))
+        )
+        counts = (membership @ doc_terms).toarray()
+        reviews = (membership @ (doc_terms > 0).astype(np.float64)).toarray()
+        weights = class_tfidf(counts)
+
+        ranking = {}
+        for index, name in enumerate(names):
+            present = np.flatnonzero(reviews[index] >= self.min_df)
+            best = present[np.lexsort((present, -weights[index, present]))][:self.top_n]
+            ranking[name] = [
+                {
+                    "keyword": str(vocabulary[term]),
+                    "count": int(counts[index, term]),
+                    "reviews": int(reviews[index, term]),
+                    "score": round(float(weights[index, term]), 6)
+                }
+                for term in best
+            ]
+        if not per_text:
+            return ranking
+
+        keywords = []
+        for position, row in enumerate(rows):
+            terms = doc_terms.indices[doc_terms.indptr[position]:doc_terms.indptr[position + 1]]
+            best = terms[np.lexsort((terms, -weights[row, terms]))][:per_text]
+            keywords.append([str(vocabulary[term]) for term in best])
+        return ranking, keywords
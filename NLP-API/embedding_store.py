@@ -0,0 +1,315 @@
+import fcntl
+import hashlib
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+import numpy as np
+
+from result_cache import normalize_text
+
+# One index record: key digest, row in the vectors file, time it was stored.
+# The key is raw bytes ("V"), since "S" would strip a digest's trailing zero bytes.
+_RECORD = np.dtype([("key", "V32"), ("row", "<i8"), ("stored_at", "<f8")])
+
+# Rows copied per step when compaction rewrites the vectors file
+_COMPACT_CHUNK = 65536
+
+
+class EmbeddingStore:
+    """On-disk store of text embeddings shared by stages, runs and processes.
+
+    Vectors are kept as float16 rows of one flat file, read through a
+    read-only memory map, so every process (gunicorn workers, pool workers)
+    reads the same page cache instead of holding its own copy. Next to it an
+    append-only index file maps each key (a hash of the normalized text) to
+    its row. Writers append rows and then their index records under an
+    exclusive file lock; readers only pick up whole records past the point
+    they had read, so they never need the lock.
+
+    compact() rewrites the live entries into a new generation of both files,
+    dropping entries older than max_age seconds and, past max_items, the
+    oldest ones; it runs by itself when the index outgrows max_items. The
+    store belongs to one model_id and dimension and is emptied when opened
+    with another; a process still on the previous model then stops reading
+    and writing it.
+    """
+
+    def __init__(self, path, model_id, dim, max_items=1000000, max_age=30 * 24 * 3600):
+        self.path = path
+        self.model_id = model_id
+        self.dim = dim
+        self.max_items = max_items
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        self._lock_file = None
+        self._lock_pid = None
+        self._meta_stamp = None
+        self._generation = None
+        self._store_model_id = None
+        self._rows = {}
+        self._records = 0
+        self._oldest = None
+        self._index_offset = 0
+        self._vectors = None
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.compactions = 0
+
+        os.makedirs(path, exist_ok=True)
+        with self._lock, self._exclusive():
+            meta = self._read_meta()
+            if meta is None or meta["model_id"] != model_id or meta["dim"] != dim:
+                self._write_generation((meta or {}).get("generation", 0) + 1, [], [], [])
+            self._refresh()
+            if self._needs_compaction():
+                self._compact()
+
+    @staticmethod
+    def fingerprint(text):
+        """Key of a text: a hash of its normalized form"""
+        return hashlib.sha256(normalize_text(text).encode("utf-8")).digest()
+
+    def get_many(self, keys):
+        """Stored vectors of the given keys as float32 arrays, only the unexpired hits"""
+        found = {}
+        keys = list(dict.fromkeys(keys))
+        with self._lock:
+            self._refresh()
+            if self._store_model_id != self.model_id:
+                keys = []
+            cutoff = time.time() - self.max_age if self.max_age else None
+            hits = []
+            for key in keys:
+                entry = self._rows.get(key)
+                if entry is None:
+                    continue
+                if cutoff is not None and entry[1] < cutoff:
+                    self.expired += 1
+                    continue
+                hits.append((key, entry[0]))
+
+            if hits:
+                try:
+                    vectors = self._map(max(row for _, row in hits))
+                    rows = np.array([row for _, row in hits], dtype=np.int64)
+                    matrix = np.asarray(vectors[rows], dtype=np.float32)
+                    found = {key: matrix[position] for position, (key, _) in enumerate(hits)}
+                except (OSError, IndexError):
+                    # Compacted by another process since the refresh; the next call catches up
+                    found = {}
+            self.hits += len(found)
+            self.misses += len(keys) - len(found)
+        return found
+
+    def put_many(self, items):
+        """Append {key: vector} for keys not stored yet, then compact if the index grew past max_items"""
+        if not items:
+            return
+        with self._lock, self._exclusive():
+            # Another process may have stored some of these since they were looked up
+            self._refresh()
+            if self._store_model_id != self.model_id:
+                return
+            new = [(key, vector) for key, vector in items.items() if key not in self._rows]
+            if new:
+                matrix = np.asarray([vector for _, vector in new], dtype=np.float16).reshape(len(new), self.dim)
+                first_row = self._append_vectors(matrix)
+                records = np.zeros(len(new), dtype=_RECORD)
+                records["key"] = [key for key, _ in new]
+                records["row"] = np.arange(first_row, first_row + len(new))
+                records["stored_at"] = time.time()
+                with open(self._index_path(self._generation), "ab") as index:
+                    index.write(records.tobytes())
+                self._refresh()
+            if self._needs_compaction():
+                self._compact()
+
+    def compact(self):
+        """Rewrite the live entries into a new generation, evicting expired and excess ones"""
+        with self._lock, self._exclusive():
+            self._refresh()
+            return self._compact()
+
+    def invalidate(self, model_id=None):
+        """Drop every stored vector, optionally switching to a new model identity"""
+        with self._lock, self._exclusive():
+            if model_id is not None:
+                self.model_id = model_id
+            self._refresh()
+            self._write_generation(self._generation + 1, [], [], [])
+            self._refresh()
+
+    def stats(self):
+        with self._lock:
+            self._refresh()
+            lookups = self.hits + self.misses
+            vectors_path = self._vectors_path(self._generation)
+            return {
+                "model_id": self.model_id,
+                "current": self._store_model_id == self.model_id,
+                "dim": self.dim,
+                "items": len(self._rows),
+                "index_records": self._records,
+                "bytes": os.path.getsize(vectors_path) if os.path.exists(vectors_path) else 0,
+                "generation": self._generation,
+                "hits": self.hits,
+                "misses": self.misses,
+                "expired": self.expired,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "compactions": self.compactions,
+                "max_items": self.max_items,
+                "max_age_seconds": self.max_age,
+                "path": self.path
+            }
+
+    @contextmanager
+    def _exclusive(self):
+        """Inter-process write lock, on a file descriptor opened per process"""
+        if self._lock_file is None or self._lock_pid != os.getpid():
+            self._lock_file = open(os.path.join(self.path, "lock"), "a+")
+            self._lock_pid = os.getpid()
+        fcntl.flock(self._lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(self._lock_file, fcntl.LOCK_UN)
+
+    def _meta_path(self):
+        return os.path.join(self.path, "meta.json")
+
+    def _vectors_path(self, generation):
+        return os.path.join(self.path, f"vectors-{generation}.f16")
+
+    def _index_path(self, generation):
+        return os.path.join(self.path, f"index-{generation}.bin")
+
+    def _read_meta(self):
+        try:
+            with open(self._meta_path()) as meta:
+                return json.load(meta)
+        except (OSError, ValueError):
+            return None
+
+    def _refresh(self):
+        """Catch up with the current generation and with records appended since the last call"""
+        try:
+            stat = os.stat(self._meta_path())
+            stamp = (stat.st_ino, stat.st_mtime_ns)
+        except OSError:
+            stamp = None
+        if stamp != self._meta_stamp:
+            meta = self._read_meta() or {}
+            self._meta_stamp = stamp
+            if meta.get("generation") != self._generation:
+                self._generation = meta.get("generation")
+                self._store_model_id = meta.get("model_id")
+                self._rows = {}
+                self._records = 0
+                self._oldest = None
+                self._index_offset = 0
+                self._vectors = None
+
+        try:
+            with open(self._index_path(self._generation), "rb") as index:
+                index.seek(self._index_offset)
+                data = index.read()
+        except OSError:
+            return
+        # A record still being written is left for the next call
+        count = len(data) // _RECORD.itemsize
+        if not count:
+            return
+        records = np.frombuffer(data, dtype=_RECORD, count=count)
+        self._index_offset += count * _RECORD.itemsize
+        self._records += count
+        self._rows.update(zip(records["key"].tolist(), zip(records["row"].tolist(), records["stored_at"].tolist())))
+        oldest = float(records["stored_at"].min())
+        self._oldest = oldest if self._oldest is None else min(self._oldest, oldest)
+
+    def _map(self, row):
+        """Memory map of the vectors file covering at least row"""
+        if self._vectors is None or row >= self._vectors.shape[0]:
+            path = self._vectors_path(self._generation)
+            rows = os.path.getsize(path) // (self.dim * 2)
+            self._vectors = np.memmap(path, dtype=np.float16, mode="r", shape=(rows, self.dim))
+        return self._vectors
+
+    def _append_vectors(self, matrix):
+        """Append rows to the vectors file, returns the row number of the first one"""
+        path = self._vectors_path(self._generation)
+        row_bytes = self.dim * 2
+        size = os.path.getsize(path) if os.path.exists(path) else 0
+        if size % row_bytes:
+            # Partial row left by a writer that died mid-append
+            os.truncate(path, size - size % row_bytes)
+        with open(path, "ab") as vectors:
+            vectors.write(matrix.tobytes())
+        return size // row_bytes
+
+    def _needs_compaction(self):
+        if self._records > self.max_items:
+            return True
+        return bool(self.max_age) and self._oldest is not None and self._oldest < time.time() - self.max_age
+
+    def _compact(self):
+        """Rewrite the live entries into the next generation; both locks must be held"""
+        if self._store_model_id != self.model_id:
+            return None
+        before = len(self._rows)
+        entries = list(self._rows.items())
+        if self.max_age:
+            cutoff = time.time() - self.max_age
+            entries = [entry for entry in entries if entry[1][1] >= cutoff]
+        if len(entries) > self.max_items:
+            # Down to 80% so the next few writes don't trigger another rewrite;
+            # of entries stored at the same time, the later rows are newer
+            entries.sort(key=lambda entry: (entry[1][1], entry[1][0]), reverse=True)
+            entries = entries[:int(self.max_items * 0.8)]
+        entries.sort(key=lambda entry: entry[1][0])
+
+        old_generation = self._generation
+        vectors = self._map(max((entry[1][0] for entry in entries), default=0)) if entries else None
+        self._write_generation(
+            old_generation + 1,
+            [key for key, _ in entries],
+            [stored_at for _, (_, stored_at) in entries],
+            [row for _, (row, _) in entries],
+            vectors
+        )
+        self._refresh()
+        self.compactions += 1
+        return {"before": before, "after": len(self._rows), "generation": self._generation}
+
+    def _write_generation(self, generation, keys, stored_at, rows, source=None):
+        """Write the given entries (rows of source) as a generation and make it current"""
+        vectors_path = self._vectors_path(generation)
+        with open(vectors_path, "wb") as vectors:
+            for start in range(0, len(rows), _COMPACT_CHUNK):
+                chunk = np.array(rows[start:start + _COMPACT_CHUNK], dtype=np.int64)
+                vectors.write(np.asarray(source[chunk], dtype=np.float16).tobytes())
+        records = np.zeros(len(keys), dtype=_RECORD)
+        records["key"] = keys
+        records["row"] = np.arange(len(keys))
+        records["stored_at"] = stored_at
+        with open(self._index_path(generation), "wb") as index:
+            index.write(records.tobytes())
+
+        meta = {"model_id": self.model_id, "dim": self.dim, "generation": generation}
+        temporary = self._meta_path() + ".tmp"
+        with open(temporary, "w") as meta_file:
+            json.dump(meta, meta_file)
+        os.replace(temporary, self._meta_path())
+
+        # Processes still mapping the old files keep reading them until they refresh
+        for name in os.listdir(self.path):
+            if name.startswith(("vectors-", "index-")) and name not in (
+                os.path.basename(vectors_path), os.path.basename(self._index_path(generation))
+            ):
+                try:
+                    os.remove(os.path.join(self.path, name))
+                except OSError:
+                    pass
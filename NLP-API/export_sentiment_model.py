@@ -0,0 +1,118 @@
+# Export the sentiment model to ONNX, quantize it to int8 and check that every
+# backend labels a fixed corpus the same way as the fp32 PyTorch model.
+#
+#   python export_sentiment_model.py                 # export, quantize, check
+#   python export_sentiment_model.py --check-only    # only the parity check
+import argparse
+import os
+import sys
+
+from model_store import SENTIMENT_DIR, SENTIMENT_ONNX_DIR, require_local_model
+from sentiment_backends import ONNX_FILE, ONNX_INT8_FILE, load_sentiment_pipeline
+
+# Fixed parity corpus: typical Play Store reviews across both labels, short and
+# long, plus a few that sit close to the decision boundary
+PARITY_CORPUS = [
+    "Great app, does exactly what I need every day.",
+    "Keeps crashing whenever I open the camera, useless since the last update.",
+    "It's okay. Some features are nice but the ads are annoying.",
+    "Customer support never replied to my refund request.",
+    "Love the new design, much faster than before!",
+    "Battery drain is terrible after the update, please fix.",
+    "Works fine most of the time but sync fails now and then.",
+    "Worst purchase ever, the subscription renews without asking.",
+    "Simple, clean and reliable. Highly recommend it to anyone.",
+    "The login screen freezes on my phone and I have to restart it.",
+    "Not bad, not great. Does the job.",
+    "I was skeptical at first but it grew on me, the widgets are handy.",
+    "Too many notifications, I can't turn them off in settings.",
+    "Excellent offline mode, saved me on a long flight.",
+    "Premium is way too expensive for what you get.",
+    "The dark mode is beautiful and easy on the eyes.",
+    "Lost all my notes after updating. Really disappointed.",
+    "Pretty decent, although the search could be smarter.",
+    "App won't load past the splash screen on Android 14.",
+    "Fast, lightweight and no nonsense. Five stars.",
+    "Payments fail half the time and there's no error message explaining why.",
+    "Helpful reminders, I finally keep track of my habits.",
+    "It used to be good but now it's full of bugs.",
+    "The tutorial was confusing but once I figured it out it was fine.",
+    "Support fixed my issue within an hour, impressive service.",
+    "Every screen loads slowly and the animations stutter.",
+    "Good value for the price, I use it daily.",
+    "The latest version removed the one feature I actually used.",
+    "Nice idea, poor execution.",
+    "Smooth experience overall, only minor glitches in the calendar view.",
+    "I uninstalled it after two days, too complicated.",
+    "Reliable backups and the export to PDF works perfectly.",
+    "Ads pop up in the middle of typing, incredibly frustrating.",
+    "Does what it says. Nothing more, nothing less.",
+    "The best budgeting app I've tried so far, charts are very clear.",
+    "Crashes constantly, cannot even create an account.",
+    "Interface is a bit dated but it works.",
+    "They fixed the sync issue quickly, thanks to the dev team!",
+    "Absolutely terrible customer service, avoid.",
+    "My kids love the games and I love that there are no ads.",
+]
+
+
+def export_onnx(model=SENTIMENT_DIR, out_dir=SENTIMENT_ONNX_DIR):
+    """Export the prefetched fp32 model to ONNX and save it with its tokenizer"""
+    from optimum.onnxruntime import ORTModelForSequenceClassification
+    from transformers import AutoTokenizer
+
+    require_local_model(model, "Sentiment")
+    os.makedirs(out_dir, exist_ok=True)
+    ORTModelForSequenceClassification.from_pretrained(model, export=True, local_files_only=True).save_pretrained(out_dir)
+    AutoTokenizer.from_pretrained(model, local_files_only=True).save_pretrained(out_dir)
+    print(f"Exported {model} to {os.path.join(out_dir, ONNX_FILE)}")
+
+
+def quantize_onnx(out_dir=SENTIMENT_ONNX_DIR):
+    """Write an int8 dynamically quantized copy of the exported graph"""
+    from onnxruntime.quantization import quantize_dynamic, QuantType
+
+    quantize_dynamic(
+        os.path.join(out_dir, ONNX_FILE),
+        os.path.join(out_dir, ONNX_INT8_FILE),
+        weight_type=QuantType.QInt8
+    )
+    print(f"Quantized model written to {os.path.join(out_dir, ONNX_INT8_FILE)}")
+
+
+def check_parity(backends, corpus=PARITY_CORPUS, min_agreement=0.95):
+    """Compare each backend's labels with fp32 PyTorch, returns True if all agree enough"""
+    reference = load_sentiment_pipeline("torch")(corpus, batch_size=16)
+    ok = True
+
+    for backend in backends:
+        results = load_sentiment_pipeline(backend)(corpus, batch_size=16)
+        agreement = sum(r["label"] == ref["label"] for r, ref in zip(results, reference)) / len(corpus)
+        score_diffs = [abs(r["score"] - ref["score"]) for r, ref in zip(results, reference) if r["label"] == ref["label"]]
+        max_diff = max(score_diffs) if score_diffs else None
+        passed = agreement >= min_agreement
+        ok = ok and passed
+        diff = f"{max_diff:.4f}" if max_diff is not None else "n/a"
+        print(f"{backend:>10}: label agreement {agreement:.1%}, max score diff {diff} "
+              f"{'OK' if passed else 'BELOW THRESHOLD'}")
+
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export/quantize the sentiment model and check parity")
+    parser.add_argument("--check-only", action="store_true", help="skip export and quantization")
+    parser.add_argument("--min-agreement", type=float, default=0.95)
+    args = parser.parse_args()
+
+    if not args.check_only:
+        export_onnx()
+        quantize_onnx()
+
+    backends = ["torch-int8", "onnx", "onnx-int8"]
+    if not check_parity(backends, min_agreement=args.min_agreement):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
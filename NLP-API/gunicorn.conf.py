@@ -0,0 +1,79 @@
+# Production server for updated_api.py:  gunicorn -c gunicorn.conf.py updated_api:app
+#
+# The app is imported once in the master (preload_app), so the sentiment,
+# KeyBERT and spaCy models are loaded a single time and shared copy-on-write by
+# every forked worker instead of being loaded per worker.
+import gc
+import os
+
+# Tokenizer thread pools don't survive a fork, and workers already split the cores
+os.environ.setdefault("TOKENIZERS_PARALLELISM", "false")
+# Warm up in each worker after fork (post_fork), not in the master, so no
+# inference thread pool is started before forking
+os.environ.setdefault("WARMUP_ON_LOAD", "0")
+
+bind = f"0.0.0.0:{os.getenv('PORT', '5001')}"
+workers = int(os.getenv("WEB_CONCURRENCY", str(min(4, os.cpu_count() or 1))))
+# Threads per worker; each one can run a request while another waits on I/O
+threads = int(os.getenv("GUNICORN_THREADS", "2"))
+worker_class = "gthread"
+preload_app = True
+# Large analyses legitimately take minutes
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "600"))
+graceful_timeout = 30
+accesslog = "-"
+
+
+def torch_threads_per_worker():
+    """Split the cores between workers so their intra-op thread pools don't oversubscribe"""
+    configured = os.getenv("TORCH_THREADS")
+    if configured:
+        return int(configured)
+    return max(1, (os.cpu_count() or 1) // workers)
+
+
+def on_starting(server):
+    # Job records live in each worker's memory unless JOB_REDIS_URL is set, so a
+    # job created by one worker is a 404 when another serves its status
+    if server.cfg.workers > 1 and not os.getenv("JOB_REDIS_URL"):
+        server.log.warning(
+            f"{server.cfg.workers} workers without JOB_REDIS_URL: /jobs records are per worker and "
+            "GET /jobs/<id> may return 404. Set JOB_REDIS_URL or WEB_CONCURRENCY=1."
+        )
+
+
+    # Each gunicorn worker would start its own review pool, multiplying the model
+    # copies and splitting the cores twice
+    pool_workers = int(os.getenv("REVIEW_POOL_WORKERS", "0"))
+    if server.cfg.workers > 1 and pool_workers > 0:
+        raise RuntimeError(
+            f"REVIEW_POOL_WORKERS={pool_workers} with {server.cfg.workers} gunicorn workers would load "
+            f"{server.cfg.workers * pool_workers} extra model copies. Use WEB_CONCURRENCY=1 with the review "
+            "pool, or REVIEW_POOL_WORKERS=0 with several gunicorn workers."
+        )
+
+
+def pre_fork(server, worker):
+    # Move everything allocated so far (mostly model weights) out of the
+    # collector's reach, so gc passes in the workers don't touch those pages
+    # and break copy-on-write sharing
+    gc.freeze()
+
+
+def post_fork(server, worker):
+    import torch
+
+    num_threads = torch_threads_per_worker()
+    torch.set_num_threads(num_threads)
+    server.log.info(f"Worker {worker.pid} using {num_threads} torch threads")
+
+    import updated_api
+    updated_api.warmup_models()
+
+
+def child_exit(server, worker):
+    # With PROMETHEUS_MULTIPROC_DIR set, /metrics merges the files of all
+    # workers; drop the live gauges of one that exited
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess
+        multiprocess.mark_process_dead(worker.pid)
@@ -0,0 +1,121 @@
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+
+class InferenceBatcher:
+    """Merge model inputs from concurrent requests into shared forward passes.
+
+    Callers hand over their inputs with run(items) and block until the results
+    are back. A single scheduler thread collects queued inputs from every
+    caller into a batch of at most max_batch_size, waiting no longer than
+    max_wait seconds after the oldest input arrived, then calls
+    run_batch(batch) once and routes each result back to its caller.
+
+    The wait only happens while another caller is active: a lone request has
+    nobody to share a batch with, so its inputs run as soon as they're queued.
+
+    If run_batch raises, every caller with inputs in that batch gets the
+    exception, so they can fall back to their own per-item handling.
+    The scheduler thread is started on first use, and again after a fork.
+    """
+
+    def __init__(self, run_batch, max_batch_size=32, max_wait=0.01, name="inference"):
+        self.run_batch = run_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.name = name
+        self._queue = None
+        self._thread = None
+        self._pid = None
+        self._start_lock = threading.Lock()
+        self._active_callers = 0
+        self._stats_lock = threading.Lock()
+        self.batches = 0
+        self.items = 0
+        self.fill_ratio_sum = 0.0
+        self.queue_delay_sum = 0.0
+        self.queue_delay_max = 0.0
+
+    def run(self, items):
+        """Queue the items, wait for their batches to run and return results in order"""
+        if not items:
+            return []
+
+        pending = self._ensure_started()
+        with self._start_lock:
+            self._active_callers += 1
+        try:
+            now = time.perf_counter()
+            futures = []
+            for item in items:
+                future = Future()
+                pending.put((item, now, future))
+                futures.append(future)
+            return [future.result() for future in futures]
+        finally:
+            with self._start_lock:
+                self._active_callers -= 1
+
+    def stats(self):
+        with self._stats_lock:
+            return {
+                "max_batch_size": self.max_batch_size,
+                "max_wait_ms": round(self.max_wait * 1000, 2),
+                "batches": self.batches,
+                "items": self.items,
+                "avg_batch_size": round(self.items / self.batches, 2) if self.batches else 0.0,
+                "avg_fill_ratio": round(self.fill_ratio_sum / self.batches, 4) if self.batches else 0.0,
+                "avg_queue_delay_ms": round(self.queue_delay_sum / self.items * 1000, 3) if self.items else 0.0,
+                "max_queue_delay_ms": round(self.queue_delay_max * 1000, 3)
+            }
+
+    def _ensure_started(self):
+        with self._start_lock:
+            if self._thread is None or self._pid != os.getpid():
+                # A thread inherited through fork is not running in this process
+                self._queue = queue.Queue()
+                self._pid = os.getpid()
+                self._thread = threading.Thread(target=self._loop, name=f"{self.name}-batcher", daemon=True)
+                self._thread.start()
+            return self._queue
+
+    def _collect(self, pending):
+        """Block for one input, then gather more until the batch is full or the wait is over"""
+        batch = [pending.get()]
+        deadline = batch[0][1] + (self.max_wait if self._active_callers > 1 else 0)
+
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            try:
+                # Past the deadline, still take whatever is already queued
+                batch.append(pending.get(timeout=remaining) if remaining > 0 else pending.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _loop(self):
+        pending = self._queue
+        while True:
+            batch = self._collect(pending)
+            started = time.perf_counter()
+            delays = [started - enqueued for _, enqueued, _ in batch]
+
+            try:
+                results = self.run_batch([item for item, _, _ in batch])
+                if len(results) != len(batch):
+                    raise RuntimeError(f"{self.name} batch returned {len(results)} results for {len(batch)} inputs")
+                for (_, _, future), result in zip(batch, results):
+                    future.set_result(result)
+            except Exception as e:
+                for _, _, future in batch:
+                    future.set_exception(e)
+
+            with self._stats_lock:
+                self.batches += 1
+                self.items += len(batch)
+                self.fill_ratio_sum += len(batch) / self.max_batch_size
+                self.queue_delay_sum += sum(delays)
+                self.queue_delay_max = max(self.queue_delay_max, max(delays))
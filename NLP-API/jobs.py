@@ -0,0 +1,187 @@
+import json
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+
+# Statuses after which a job record no longer changes
+FINISHED_STATUSES = ("done", "failed", "cancelled")
+
+
+class JobQueueFull(Exception):
+    """Raised when the pool already holds the maximum number of unfinished jobs"""
+
+
+class InMemoryJobBackend:
+    """Keeps job records in a dict, for a single server process.
+
+    Finished jobs are dropped ttl seconds after their last update, checked
+    on every save.
+    """
+
+    def __init__(self, ttl=3600):
+        self.ttl = ttl
+        self._records = {}
+        self._cancelled = set()
+        self._lock = threading.Lock()
+
+    def save(self, record):
+        with self._lock:
+            self._records[record["id"]] = dict(record)
+            self._prune()
+
+    def _prune(self):
+        if not self.ttl:
+            return
+        cutoff = time.time() - self.ttl
+        expired = [
+            job_id for job_id, record in self._records.items()
+            if record["status"] in FINISHED_STATUSES and record["updated_at"] < cutoff
+        ]
+        for job_id in expired:
+            del self._records[job_id]
+            self._cancelled.discard(job_id)
+
+    def load(self, job_id):
+        with self._lock:
+            record = self._records.get(job_id)
+            return dict(record) if record is not None else None
+
+    def set_cancelled(self, job_id):
+        with self._lock:
+            self._cancelled.add(job_id)
+
+    def is_cancelled(self, job_id):
+        with self._lock:
+            return job_id in self._cancelled
+
+
+class KeyValueJobBackend:
+    """Stores job records as JSON in a Redis-like client.
+
+    Works with redis.Redis or any object exposing get(key) and set(key, value,
+    ex=seconds), so a local stand-in can replace Redis. The cancel flag lives
+    under its own key so a progress update can never overwrite it. A record
+    expires ttl seconds after the job's last update, the flag ttl seconds
+    after it was set.
+    """
+
+    def __init__(self, client, prefix="brandsight:jobs:", ttl=3600):
+        self.client = client
+        self.prefix = prefix
+        self.ttl = ttl
+
+    def save(self, record):
+        self.client.set(self.prefix + record["id"], json.dumps(record), ex=self.ttl or None)
+
+    def load(self, job_id):
+        value = self.client.get(self.prefix + job_id)
+        if value is None:
+            return None
+        if isinstance(value, bytes):
+            value = value.decode("utf-8")
+        return json.loads(value)
+
+    def set_cancelled(self, job_id):
+        self.client.set(self.prefix + job_id + ":cancel", "1", ex=self.ttl or None)
+
+    def is_cancelled(self, job_id):
+        return self.client.get(self.prefix + job_id + ":cancel") is not None
+
+
+class JobManager:
+    """Runs analysis jobs on a bounded worker pool and tracks their progress.
+
+    runner(payload, report_progress, is_cancelled) does the work: it calls
+    report_progress(done, total, stage) as it goes, checks is_cancelled()
+    between steps and returns the final result (or None once cancelled).
+    The pool is started on first use so it is never inherited across a fork.
+    """
+
+    def __init__(self, runner, backend=None, max_workers=2, max_pending=32):
+        self.runner = runner
+        self.backend = backend or InMemoryJobBackend()
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self._executor = None
+        self._futures = {}
+        self._lock = threading.Lock()
+
+    def submit(self, payload):
+        """Queue a job and return its id right away"""
+        with self._lock:
+            self._futures = {job_id: f for job_id, f in self._futures.items() if not f.done()}
+            if len(self._futures) >= self.max_pending:
+                raise JobQueueFull(f"{len(self._futures)} jobs are already queued or running")
+
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="analysis-job")
+
+            job_id = uuid.uuid4().hex
+            now = time.time()
+            self.backend.save({
+                "id": job_id,
+                "status": "queued",
+                "stage": "queued",
+                "done": 0,
+                "total": len(payload.get("reviews", [])),
+                "result": None,
+                "error": None,
+                "created_at": now,
+                "updated_at": now
+            })
+            self._futures[job_id] = self._executor.submit(self._run, job_id, payload)
+        return job_id
+
+    def status(self, job_id):
+        """Return the job record, with cancel requests reflected, or None if unknown"""
+        record = self.backend.load(job_id)
+        if record is not None and record["status"] in ("queued", "running") and self.backend.is_cancelled(job_id):
+            record["status"] = "cancelling"
+        return record
+
+    def cancel(self, job_id):
+        """Ask a job to stop, returns False if the job is unknown or already finished"""
+        record = self.backend.load(job_id)
+        if record is None or record["status"] not in ("queued", "running"):
+            return False
+
+        self.backend.set_cancelled(job_id)
+        future = self._futures.get(job_id)
+        if future is not None and future.cancel():
+            # Never started, so nothing else will update the record
+            self._update(job_id, status="cancelled", stage="cancelled")
+        return True
+
+    def _run(self, job_id, payload):
+        if self.backend.is_cancelled(job_id):
+            self._update(job_id, status="cancelled", stage="cancelled")
+            return
+
+        self._update(job_id, status="running", stage="starting")
+
+        def report_progress(done, total, stage):
+            self._update(job_id, done=done, total=total, stage=stage)
+
+        def is_cancelled():
+            return self.backend.is_cancelled(job_id)
+
+        try:
+            result = self.runner(payload, report_progress, is_cancelled)
+        except Exception as e:
+            print(f"Error in analysis job {job_id}: {str(e)}")
+            self._update(job_id, status="failed", stage="failed", error=str(e))
+            return
+
+        if result is None or self.backend.is_cancelled(job_id):
+            self._update(job_id, status="cancelled", stage="cancelled")
+        else:
+            self._update(job_id, status="done", stage="done", result=result)
+
+    def _update(self, job_id, **fields):
+        record = self.backend.load(job_id)
+        if record is None:
+            return
+        record.update(fields, updated_at=time.time())
+        self.backend.save(record)
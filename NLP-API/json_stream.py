@@ -0,0 +1,95 @@
+import json
+import re
+
+# Characters that change the parser's state; everything else is copied through
+_STRUCTURAL = re.compile(r'[\[\]{}"\\]')
+
+
+class JSONArrayStream:
+    """Incremental parser for a JSON array of objects that arrives in pieces.
+
+    feed() takes the next piece of text (e.g. a streamed completion delta) and
+    returns the elements of the array completed by it, so each one can be used
+    as soon as its closing brace arrives instead of after the whole reply.
+    Anything before the opening bracket (prose, a ``` fence) and after the
+    closing one is ignored. Elements that are not objects or do not parse are
+    dropped and counted in errors.
+
+    Only structural characters are looked at, found with a regex, so the cost
+    per piece is close to that of copying it.
+    """
+
+    def __init__(self):
+        self.started = False
+        self.finished = False
+        self.errors = 0
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+        self._partial = []
+
+    def feed(self, text):
+        objects = []
+        if self.finished or not text:
+            return objects
+
+        skip_to = 0
+        if self._escaped:
+            # A backslash ended the previous piece, so this first character is escaped
+            self._escaped = False
+            skip_to = 1
+        element_start = None
+
+        for match in _STRUCTURAL.finditer(text):
+            i = match.start()
+            if i < skip_to:
+                continue
+            char = text[i]
+
+            if not self.started:
+                self.started = char == "["
+                continue
+
+            if self._in_string:
+                if char == "\\":
+                    if i + 1 < len(text):
+                        skip_to = i + 2
+                    else:
+                        self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+                continue
+
+            if char == '"':
+                self._in_string = True
+            elif char in "{[":
+                if self._depth == 0:
+                    element_start = i
+                self._depth += 1
+            elif self._depth == 0:
+                if char == "]":
+                    self.finished = True
+                    break
+            else:
+                self._depth -= 1
+                if self._depth == 0:
+                    begin = element_start if element_start is not None else 0
+                    element = "".join(self._partial) + text[begin:i + 1]
+                    self._partial = []
+                    element_start = None
+                    self._add(element, objects)
+
+        if self._depth and not self.finished:
+            self._partial.append(text[element_start if element_start is not None else 0:])
+        return objects
+
+    def _add(self, element, objects):
+        try:
+            value = json.loads(element)
+        except json.JSONDecodeError:
+            self.errors += 1
+            return
+        if isinstance(value, dict):
+            objects.append(value)
+        else:
+            self.errors += 1
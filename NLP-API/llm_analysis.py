@@ -0,0 +1,258 @@
+"""Review analysis with the Groq API, shared by nlp-api.py and the hybrid mode of updated_api.py.
+
+Reviews are split into chunks that fit a prompt-token budget, each chunk's
+completion is streamed and parsed as it arrives, and every review's result is
+cached per review in llm_cache.
+"""
+import os
+import asyncio
+import random
+import threading
+from groq import AsyncGroq, RateLimitError, APIConnectionError, InternalServerError
+from dotenv import load_dotenv
+from llm_cache import LLMCache
+from json_stream import JSONArrayStream
+
+load_dotenv()
+
+# Groq API endpoint, e.g. a local mock server (benchmarks/groq_stub.py) for testing
+GROQ_BASE_URL = os.getenv("GROQ_BASE_URL")
+
+# Estimated prompt tokens of review text per analysis request. Larger review
+# sets are split into chunks of this size, which are analyzed concurrently.
+GROQ_CHUNK_TOKENS = int(os.getenv("GROQ_CHUNK_TOKENS", "3000"))
+# Reviews per chunk, so the JSON answer (about 60 tokens per review) fits the completion limit
+GROQ_CHUNK_MAX_REVIEWS = int(os.getenv("GROQ_CHUNK_MAX_REVIEWS", "40"))
+# Groq requests in flight at once, across all requests to this process
+GROQ_MAX_CONCURRENCY = int(os.getenv("GROQ_MAX_CONCURRENCY", "4"))
+# Retries of a rate-limited or failed call, waiting Retry-After or an exponential backoff
+GROQ_MAX_RETRIES = int(os.getenv("GROQ_MAX_RETRIES", "5"))
+GROQ_BACKOFF_SECONDS = float(os.getenv("GROQ_BACKOFF_SECONDS", "1"))
+
+# LLM answer cache: in-memory LRU size, optional SQLite file shared by
+# restarts and processes, and how long an answer is reused
+LLM_CACHE_SIZE = int(os.getenv("LLM_CACHE_SIZE", "10000"))
+LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH")
+LLM_CACHE_TTL_SECONDS = float(os.getenv("LLM_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+
+# Rough characters per token of English text, for estimating prompt sizes
+CHARS_PER_TOKEN = 4
+
+# Retries are handled by complete() so they can wait outside the concurrency limit
+groqClient = AsyncGroq(api_key=os.getenv("GROQ_API_KEY"), base_url=GROQ_BASE_URL, max_retries=0)
+# Concurrency limit per event loop, created on first use (a semaphore is bound to one loop)
+_groq_slots = {}
+llm_cache = LLMCache(max_items=LLM_CACHE_SIZE, path=LLM_CACHE_PATH, ttl=LLM_CACHE_TTL_SECONDS)
+
+ANALYSIS_SYSTEM_PROMPT = "You are an NLP assistant that analyzes reviews precisely."
+ANALYSIS_PROMPT = """
+        Analyze these product reviews. For EACH review, return a JSON object:
+        - "id": the number of the review in the list below
+        - "review": the review text
+        - "sentiment": "POSITIVE", "NEUTRAL", or "NEGATIVE"
+        - "confidence": float between 0 and 1
+        - "keywords": up to 5 important keywords (lowercase, single words)
+
+        Reviews:
+        {reviews_text}
+
+        Respond ONLY in a valid JSON array, one object per review.
+        """
+
+def estimate_tokens(text: str) -> int:
+    return len(text) // CHARS_PER_TOKEN + 1
+
+def review_text(review, max_tokens=GROQ_CHUNK_TOKENS) -> str:
+    """Review text on one line, cut to max_tokens so a single review always fits a chunk"""
+    text = " ".join(str(review.get("review") or "").split())
+    return text[:max_tokens * CHARS_PER_TOKEN]
+
+def chunk_texts(texts, max_tokens=GROQ_CHUNK_TOKENS, max_items=GROQ_CHUNK_MAX_REVIEWS):
+    """Split texts into consecutive chunks within the token and item budgets, as lists of indices"""
+    chunks, current, used = [], [], 0
+    for i, text in enumerate(texts):
+        tokens = estimate_tokens(text)
+        if current and (used + tokens > max_tokens or len(current) >= max_items):
+            chunks.append(current)
+            current, used = [], 0
+        current.append(i)
+        used += tokens
+    if current:
+        chunks.append(current)
+    return chunks
+
+def retry_delay(error, attempt):
+    """Seconds to wait before retrying: the server's Retry-After if given, else jittered exponential backoff"""
+    response = getattr(error, "response", None)
+    retry_after = response.headers.get("retry-after") if response is not None else None
+    try:
+        return min(60.0, float(retry_after))
+    except (TypeError, ValueError):
+        return GROQ_BACKOFF_SECONDS * (2 ** attempt) * random.uniform(0.5, 1.0)
+
+def groq_slots():
+    """Semaphore limiting Groq calls on the running event loop"""
+    loop = asyncio.get_running_loop()
+    if loop not in _groq_slots:
+        _groq_slots.clear()
+        _groq_slots[loop] = asyncio.Semaphore(GROQ_MAX_CONCURRENCY)
+    return _groq_slots[loop]
+
+async def complete(messages, model):
+    """One chat completion, returns the reply text.
+
+    At most GROQ_MAX_CONCURRENCY calls run at once. Rate limits, server errors
+    and dropped connections are retried up to GROQ_MAX_RETRIES times.
+    """
+    for attempt in range(GROQ_MAX_RETRIES + 1):
+        try:
+            async with groq_slots():
+                response = await groqClient.chat.completions.create(model=model, messages=messages)
+            return response.choices[0].message.content.strip()
+        except (RateLimitError, InternalServerError, APIConnectionError) as e:
+            if attempt == GROQ_MAX_RETRIES:
+                raise
+            delay = retry_delay(e, attempt)
+            print(f"Groq call failed ({type(e).__name__}), retrying in {delay:.2f}s")
+            await asyncio.sleep(delay)
+
+async def stream_completion(messages, model):
+    """Text of one streamed chat completion, yielded piece by piece as it arrives.
+
+    Opening the stream is retried like complete(). The stream holds one of the
+    GROQ_MAX_CONCURRENCY slots until it ends; an error mid-stream is raised.
+    """
+    for attempt in range(GROQ_MAX_RETRIES + 1):
+        async with groq_slots():
+            try:
+                stream = await groqClient.chat.completions.create(model=model, messages=messages, stream=True)
+            except (RateLimitError, InternalServerError, APIConnectionError) as e:
+                if attempt == GROQ_MAX_RETRIES:
+                    raise
+                delay = retry_delay(e, attempt)
+                error = type(e).__name__
+            else:
+                async for chunk in stream:
+                    if chunk.choices and chunk.choices[0].delta.content:
+                        yield chunk.choices[0].delta.content
+                return
+        print(f"Groq call failed ({error}), retrying in {delay:.2f}s")
+        await asyncio.sleep(delay)
+
+def neutral_result(text):
+    """Placeholder for a review the model returned nothing for"""
+    return {"review": text, "sentiment": "NEUTRAL", "confidence": 0.5, "keywords": []}
+
+async def stream_chunk(texts, model):
+    """Analyze one chunk of review texts, yielding (position in texts, result) as each object completes.
+
+    Results are matched to reviews by the "id" the model echoes back, so a
+    dropped or reordered object never shifts the others. Objects with an
+    unknown or repeated id are ignored.
+    """
+    reviews_text = "\n".join([f"{i+1}. {text}" for i, text in enumerate(texts)])
+    parser = JSONArrayStream()
+    seen = set()
+
+    async for piece in stream_completion([
+        {"role": "system", "content": ANALYSIS_SYSTEM_PROMPT},
+        {"role": "user", "content": ANALYSIS_PROMPT.format(reviews_text=reviews_text)}
+    ], model):
+        for result in parser.feed(piece):
+            try:
+                position = int(result.pop("id")) - 1
+            except (KeyError, TypeError, ValueError):
+                continue
+            if 0 <= position < len(texts) and position not in seen:
+                seen.add(position)
+                yield position, result
+
+    if len(seen) != len(texts):
+        print(f"Expected {len(texts)} results, got {len(seen)} ({parser.errors} unparsable)")
+
+def review_cache_key(text, model):
+    """Per-review cache key, so a review is reused whatever chunk it was analyzed in"""
+    return llm_cache.make_key(model, [ANALYSIS_SYSTEM_PROMPT, ANALYSIS_PROMPT, text])
+
+async def stream_reviews_batch(reviews, model="llama-3.1-8b-instant", refresh=False, fallback=neutral_result):
+    """Sentiment + keywords per review, yielded as (index, result) in the order they become available.
+
+    Reviews already in llm_cache come first (unless refresh is set). The rest
+    are split into chunks that fit GROQ_CHUNK_TOKENS, streamed concurrently,
+    and each review is yielded as soon as its object arrives. Reviews the model
+    gave no answer for come last, as fallback(text) (NEUTRAL by default), and
+    are not cached. Every index is yielded exactly once.
+    """
+    texts = [review_text(r) for r in reviews]
+    keys = [review_cache_key(text, model) for text in texts]
+    cached = {} if refresh else llm_cache.get_many(keys)
+    indices_by_key = {}
+    for i, key in enumerate(keys):
+        indices_by_key.setdefault(key, []).append(i)
+
+    for i, key in enumerate(keys):
+        if key in cached:
+            # Copies, since the route adds the caller's fields to each result
+            yield i, dict(cached[key])
+
+    # Each distinct uncached review is sent once
+    pending = [key for key in indices_by_key if key not in cached]
+    chunks = [[pending[i] for i in chunk] for chunk in chunk_texts([texts[indices_by_key[key][0]] for key in pending])]
+    queue = asyncio.Queue()
+
+    async def run_chunk(chunk):
+        try:
+            async for position, result in stream_chunk([texts[indices_by_key[key][0]] for key in chunk], model):
+                await queue.put((chunk[position], result))
+        except Exception as e:
+            print(f"Error analyzing chunk of {len(chunk)} reviews: {str(e)}")
+        finally:
+            await queue.put(None)
+
+    tasks = [asyncio.create_task(run_chunk(chunk)) for chunk in chunks]
+    answered = {}
+    try:
+        remaining = len(tasks)
+        while remaining:
+            item = await queue.get()
+            if item is None:
+                remaining -= 1
+                continue
+            key, result = item
+            answered[key] = result
+            for i in indices_by_key[key]:
+                yield i, dict(result)
+    finally:
+        # Stops the model calls if the consumer goes away (e.g. a client disconnects)
+        for task in tasks:
+            task.cancel()
+        llm_cache.put_many(answered)
+
+    for key in pending:
+        if key not in answered:
+            for i in indices_by_key[key]:
+                yield i, fallback(texts[i])
+
+async def analyze_reviews_batch(reviews, model="llama-3.1-8b-instant", refresh=False, fallback=neutral_result):
+    """Sentiment + keywords per review, in input order (see stream_reviews_batch)"""
+    results = [None] * len(reviews)
+    async for i, result in stream_reviews_batch(reviews, model, refresh, fallback):
+        results[i] = result
+    return results
+
+# Event loop for callers without one (the Flask threads of updated_api.py), so
+# they share one Groq client and concurrency limit
+_loop = None
+_loop_pid = None
+_loop_lock = threading.Lock()
+
+def run_sync(coroutine):
+    """Run a coroutine on the module's background event loop and wait for its result"""
+    global _loop, _loop_pid
+    with _loop_lock:
+        # The loop thread does not survive fork, so a forked worker starts its own
+        if _loop is None or _loop_pid != os.getpid():
+            _loop = asyncio.new_event_loop()
+            _loop_pid = os.getpid()
+            threading.Thread(target=_loop.run_forever, name="llm-analysis-loop", daemon=True).start()
+    return asyncio.run_coroutine_threadsafe(coroutine, _loop).result()
@@ -0,0 +1,141 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+
+class LLMCache:
+    """Cache of LLM answers for the Groq-backed services.
+
+    Keys hash the model name with the full input of a call (normally its
+    message list), so a changed prompt, review or model never hits an old
+    answer. Entries live in a bounded in-memory LRU tier and, when a path is
+    given, in a SQLite file shared by restarts and processes. Every entry
+    expires ttl seconds after it was stored, in both tiers.
+    """
+
+    def __init__(self, max_items=10000, path=None, ttl=7 * 24 * 3600):
+        self.max_items = max_items
+        self.path = path
+        self.ttl = ttl
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.disk_hits = 0
+        self.expired = 0
+        self._conn = None
+        self._conn_pid = None
+
+        if path:
+            db = self._db
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS answers (key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+            db.execute("DELETE FROM answers WHERE expires_at <= ?", (time.time(),))
+            db.commit()
+
+    @property
+    def _db(self):
+        """SQLite connection of the current process, or None without a persistent tier"""
+        if not self.path:
+            return None
+        if self._conn is None or self._conn_pid != os.getpid():
+            self._conn = sqlite3.connect(self.path, check_same_thread=False, timeout=30)
+            self._conn_pid = os.getpid()
+        return self._conn
+
+    @staticmethod
+    def make_key(model, messages):
+        """Key of one call: the model name and a hash of its JSON-serializable input"""
+        payload = json.dumps(messages, sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(f"{model}\x1f{payload}".encode("utf-8")).hexdigest()
+
+    def get(self, key):
+        return self.get_many([key]).get(key)
+
+    def put(self, key, value):
+        self.put_many({key: value})
+
+    def get_many(self, keys):
+        """Look up several keys at once, returns a dict holding only the unexpired hits"""
+        found = {}
+        keys = list(dict.fromkeys(keys))
+        now = time.time()
+        with self._lock:
+            missing = []
+            for key in keys:
+                entry = self._memory.get(key)
+                if entry is not None and entry[1] > now:
+                    self._memory.move_to_end(key)
+                    found[key] = entry[0]
+                    continue
+                if entry is not None:
+                    del self._memory[key]
+                    self.expired += 1
+                missing.append(key)
+
+            if self._db is not None and missing:
+                for start in range(0, len(missing), 500):
+                    chunk = missing[start:start + 500]
+                    placeholders = ",".join("?" * len(chunk))
+                    rows = self._db.execute(
+                        f"SELECT key, value, expires_at FROM answers WHERE key IN ({placeholders}) AND expires_at > ?",
+                        chunk + [now]
+                    ).fetchall()
+                    for key, value, expires_at in rows:
+                        found[key] = json.loads(value)
+                        self._remember(key, found[key], expires_at)
+                        self.disk_hits += 1
+
+            self.hits += len(found)
+            self.misses += len(keys) - len(found)
+        return found
+
+    def put_many(self, items):
+        """Store several answers at once, writing the SQLite tier in one transaction"""
+        if not items:
+            return
+        expires_at = time.time() + self.ttl
+        with self._lock:
+            for key, value in items.items():
+                self._remember(key, value, expires_at)
+            if self._db is not None:
+                self._db.executemany(
+                    "INSERT OR REPLACE INTO answers (key, value, expires_at) VALUES (?, ?, ?)",
+                    [(key, json.dumps(value), expires_at) for key, value in items.items()]
+                )
+                self._db.commit()
+
+    def invalidate(self):
+        """Drop every cached answer"""
+        with self._lock:
+            self._memory.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM answers")
+                self._db.commit()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "disk_hits": self.disk_hits,
+                "expired": self.expired,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "memory_items": len(self._memory),
+                "max_items": self.max_items,
+                "ttl_seconds": self.ttl,
+                "persistent": bool(self.path)
+            }
+
+    def _remember(self, key, value, expires_at):
+        self._memory[key] = (value, expires_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_items:
+            self._memory.popitem(last=False)
@@ -0,0 +1,79 @@
+import os
+import time
+from contextlib import contextmanager
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Histogram, generate_latest, multiprocess
+)
+
+# Stage latencies range from microseconds (heuristics on a cached chunk) to
+# minutes (a cold 10k-review request), so the buckets span that whole range
+STAGE_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+STAGE_SECONDS = Histogram(
+    "brandsight_stage_seconds", "Wall time of each analysis stage, per pass over a chunk of reviews", ["stage"],
+    buckets=STAGE_BUCKETS
+)
+REQUEST_SECONDS = Histogram(
+    "brandsight_request_seconds", "Wall time of each analysis request", ["endpoint"], buckets=STAGE_BUCKETS
+)
+REVIEWS_PROCESSED = Counter("brandsight_reviews_processed_total", "Reviews run through the analysis pipeline")
+FAKE_REVIEWS = Counter("brandsight_fake_reviews_total", "Reviews flagged as fake, by reason", ["reason"])
+SWALLOWED_ERRORS = Counter(
+    "brandsight_swallowed_errors_total", "Errors caught and handled by a fallback instead of failing the request",
+    ["stage"]
+)
+CHUNKED_REVIEWS = Counter(
+    "brandsight_chunked_reviews_total", "Reviews over the sentiment model's token limit, scored in overlapping windows"
+)
+MODEL_BATCH_SIZE = Histogram(
+    "brandsight_model_batch_size", "Inputs per model call", ["model"],
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128, 256, 512)
+)
+
+
+class StageTimer:
+    """Wall time per stage for one request.
+
+    Each timed block is observed in STAGE_SECONDS as it ends and added to the
+    per-request totals returned by as_dict(). Two perf_counter calls and one
+    histogram observation per block, so it stays on in production.
+    """
+
+    def __init__(self):
+        self.seconds = {}
+
+    @contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+
+    def record(self, name, seconds):
+        """Add a stage timed elsewhere, e.g. by a pool worker process"""
+        self.seconds[name] = self.seconds.get(name, 0.0) + seconds
+        STAGE_SECONDS.labels(name).observe(seconds)
+
+    def as_dict(self):
+        """Milliseconds per stage, for the optional timings block of a response"""
+        return {name: round(seconds * 1000, 3) for name, seconds in self.seconds.items()}
+
+
+def record_error(stage):
+    SWALLOWED_ERRORS.labels(stage).inc()
+
+
+def render_metrics():
+    """Body and content type for /metrics.
+
+    With PROMETHEUS_MULTIPROC_DIR set (several gunicorn workers) the values of
+    all workers are merged, otherwise this process's registry is returned.
+    """
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
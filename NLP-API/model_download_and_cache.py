@@ -1,5 +1,67 @@
-# save as download_model.py and run: python download_model.py
-from transformers import pipeline
-
-# Download and cache the model
-pipeline("sentiment-analysis", model="distilbert/distilbert-base-uncased-finetuned-sst-2-english")
+# Prefetch every model the service uses into MODEL_DIR, at pinned revisions:
+#
+#   python model_download_and_cache.py
+#   python model_download_and_cache.py --model-dir /opt/models
+#
+# The service then loads strictly from that directory and never calls the hub,
+# so it can run with HF_HUB_OFFLINE=1. The resolved revisions are written to
+# MODEL_DIR/manifest.json and become part of the result cache key.
+import argparse
+import os
+import sys
+import time
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Download and cache the sentiment, KeyBERT and spaCy models")
+    parser.add_argument("--model-dir", help="target directory (defaults to MODEL_DIR or NLP-API/models)")
+    args = parser.parse_args()
+
+    if args.model_dir:
+        # model_store reads MODEL_DIR at import time
+        os.environ["MODEL_DIR"] = os.path.abspath(args.model_dir)
+
+    import spacy
+    from huggingface_hub import HfApi, snapshot_download
+    import model_store
+
+    # Weights for other frameworks are never loaded, don't download them
+    ignore_patterns = ["*.h5", "*.msgpack", "*.ot", "*.tflite", "onnx/*", "openvino/*", "rust_model*", "coreml/*"]
+    manifest = {}
+
+    for name, repo_id, revision, target in (
+        ("sentiment", model_store.SENTIMENT_MODEL, model_store.SENTIMENT_REVISION, model_store.SENTIMENT_DIR),
+        ("keywords", model_store.KEYWORD_MODEL, model_store.KEYWORD_REVISION, model_store.KEYWORD_DIR),
+    ):
+        start = time.perf_counter()
+        commit = HfApi().model_info(repo_id, revision=revision).sha
+        snapshot_download(repo_id, revision=commit, local_dir=target, ignore_patterns=ignore_patterns)
+        manifest[name] = {"model": repo_id, "revision": commit}
+        print(f"{name}: {repo_id}@{commit} -> {target} ({time.perf_counter() - start:.1f}s)")
+
+    start = time.perf_counter()
+    try:
+        nlp = spacy.load(model_store.SPACY_MODEL)
+    except OSError:
+        nlp = None
+    if nlp is None or nlp.meta.get("version") != model_store.SPACY_MODEL_VERSION:
+        # The exact release, not whatever spaCy currently considers compatible
+        spacy.cli.download(f"{model_store.SPACY_MODEL}-{model_store.SPACY_MODEL_VERSION}", direct=True)
+        nlp = spacy.load(model_store.SPACY_MODEL)
+    if nlp.meta.get("version") != model_store.SPACY_MODEL_VERSION:
+        # This process had already imported the old package; a new one picks up the download
+        raise SystemExit(
+            f"Loaded {model_store.SPACY_MODEL} {nlp.meta.get('version')}, expected "
+            f"{model_store.SPACY_MODEL_VERSION}; run the prefetch again"
+        )
+    nlp.to_disk(model_store.SPACY_DIR)
+    manifest["spacy"] = {"model": model_store.SPACY_MODEL, "revision": nlp.meta.get("version")}
+    print(f"spacy: {model_store.SPACY_MODEL}@{nlp.meta.get('version')} -> {model_store.SPACY_DIR} "
+          f"({time.perf_counter() - start:.1f}s)")
+
+    model_store.save_manifest(manifest)
+    print(f"Manifest written to {model_store.MANIFEST_PATH}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,46 @@
+import json
+import os
+
+# Pinned model ids, materialized into MODEL_DIR by model_download_and_cache.py
+SENTIMENT_MODEL = "distilbert/distilbert-base-uncased-finetuned-sst-2-english"
+KEYWORD_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+SPACY_MODEL = "en_core_web_sm"
+# Hub commits to prefetch; the sentiment one is the commit transformers itself
+# pins for the default sentiment-analysis pipeline
+SENTIMENT_REVISION = os.getenv("SENTIMENT_REVISION", "714eb0f")
+KEYWORD_REVISION = os.getenv("KEYWORD_REVISION", "c9745ed1d9f207416be6d2e6f8de32d1f16199bf")
+# Release of the spaCy model package; it must match the installed spaCy's
+# minor version (3.8.x here)
+SPACY_MODEL_VERSION = os.getenv("SPACY_MODEL_VERSION", "3.8.0")
+
+MODEL_DIR = os.getenv("MODEL_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "models"))
+SENTIMENT_DIR = os.path.join(MODEL_DIR, "sentiment")
+KEYWORD_DIR = os.path.join(MODEL_DIR, "keybert")
+SPACY_DIR = os.path.join(MODEL_DIR, "spacy")
+SENTIMENT_ONNX_DIR = os.getenv("SENTIMENT_ONNX_DIR", os.path.join(MODEL_DIR, "sentiment-onnx"))
+MANIFEST_PATH = os.path.join(MODEL_DIR, "manifest.json")
+
+
+def require_local_model(path, name):
+    """Return path if the prefetched model is there, otherwise fail with a hint"""
+    if not os.path.isdir(path):
+        raise FileNotFoundError(
+            f"{name} model not found in {path}. Run 'python model_download_and_cache.py' "
+            f"(or point MODEL_DIR at a prefetched directory) before starting the service."
+        )
+    return path
+
+
+def load_manifest():
+    """Model ids and revisions recorded by the prefetch step, or {} if there is none"""
+    try:
+        with open(MANIFEST_PATH) as manifest:
+            return json.load(manifest)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_manifest(manifest):
+    os.makedirs(MODEL_DIR, exist_ok=True)
+    with open(MANIFEST_PATH, "w") as out:
+        json.dump(manifest, out, indent=2)
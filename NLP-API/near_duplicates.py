@@ -0,0 +1,136 @@
+import numpy as np
+
+_MAX_HASH = np.uint64((1 << 32) - 1)
+
+
+class NearDuplicateDetector:
+    """Find clusters of near-identical reviews across a batch with MinHash LSH.
+
+    Each review is normalized (lowercased, whitespace collapsed) and cut into
+    character shingles. A MinHash signature of num_perm values estimates the
+    Jaccard similarity of two reviews' shingle sets; splitting the signature
+    into bands and bucketing reviews by band gives candidate pairs without
+    comparing every pair. Candidates are kept when their estimated similarity
+    reaches threshold, so the work grows roughly linearly with the batch.
+
+    Hashing runs over chunks of at most max_chunk_shingles shingles, one
+    permutation at a time into a reused buffer, so the working memory stays at
+    a few max_chunk_shingles-sized arrays (tens of MB with the defaults) however
+    large the batch is. What grows with the batch is the signature matrix,
+    num_perm values per review.
+    """
+
+    def __init__(self, num_perm=64, bands=16, threshold=0.7, shingle_size=5, min_words=12,
+                 min_cluster_size=3, max_chunk_shingles=1 << 20, seed=1):
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.threshold = threshold
+        self.shingle_size = shingle_size
+        self.min_words = min_words
+        self.min_cluster_size = min_cluster_size
+        self.max_chunk_shingles = max_chunk_shingles
+
+        rng = np.random.RandomState(seed)
+        # Multiply-shift hashing: the top 32 bits of (a * x + b) mod 2^64 for odd a.
+        # Wrapping arithmetic is far cheaper than reducing modulo a prime.
+        self._a = rng.randint(1, 1 << 62, size=num_perm, dtype=np.uint64) | np.uint64(1)
+        self._b = rng.randint(0, 1 << 62, size=num_perm, dtype=np.uint64)
+        self._powers = (np.uint64(257) ** np.arange(shingle_size, dtype=np.uint64)).astype(np.uint64)
+        self._band_mix = rng.randint(1, 1 << 62, size=self.rows, dtype=np.uint64) | np.uint64(1)
+
+    def find_clusters(self, texts):
+        """Return lists of indices into texts, one per cluster of at least min_cluster_size near-duplicates"""
+        eligible = [
+            index for index, text in enumerate(texts)
+            if text and len(str(text).split()) >= self.min_words
+        ]
+        if len(eligible) < self.min_cluster_size:
+            return []
+
+        encoded = [" ".join(str(texts[index]).lower().split()).encode("utf-8") for index in eligible]
+        signatures = self._signatures(encoded)
+        parent = np.arange(len(eligible))
+
+        def find(i):
+            while parent[i] != i:
+                parent[i] = parent[parent[i]]
+                i = parent[i]
+            return i
+
+        for band in range(self.bands):
+            rows = signatures[:, band * self.rows:(band + 1) * self.rows]
+            keys = (rows * self._band_mix).sum(axis=1)
+            order = np.argsort(keys, kind="stable")
+            sorted_keys = keys[order]
+            starts = np.flatnonzero(np.r_[True, sorted_keys[1:] != sorted_keys[:-1]])
+            ends = np.r_[starts[1:], len(order)]
+
+            for start, end in zip(starts, ends):
+                if end - start < 2:
+                    continue
+                members = order[start:end]
+                # Compare to one member only, so a bucket of k identical reviews costs k, not k^2
+                similarity = (signatures[members] == signatures[members[0]]).mean(axis=1)
+                root = find(members[0])
+                for member in members[1:][similarity[1:] >= self.threshold]:
+                    parent[find(member)] = root
+
+        roots = np.array([find(i) for i in range(len(eligible))])
+        clusters = {}
+        for position, root in enumerate(roots):
+            clusters.setdefault(root, []).append(eligible[position])
+        return [members for members in clusters.values() if len(members) >= self.min_cluster_size]
+
+    def flag(self, texts):
+        """Indices of texts that belong to a near-duplicate cluster"""
+        return {index for cluster in self.find_clusters(texts) for index in cluster}
+
+    def _signatures(self, encoded):
+        """MinHash signature matrix, one row of num_perm values per text"""
+        signatures = np.full((len(encoded), self.num_perm), _MAX_HASH, dtype=np.uint64)
+        start = 0
+        while start < len(encoded):
+            # Take whole texts until the chunk holds max_chunk_shingles shingles
+            end = start
+            shingles = 0
+            while end < len(encoded):
+                count = max(1, len(encoded[end]) - self.shingle_size + 1)
+                if end > start and shingles + count > self.max_chunk_shingles:
+                    break
+                shingles += count
+                end += 1
+            signatures[start:end] = self._chunk_signatures(encoded[start:end]).T
+            start = end
+        return signatures
+
+    def _chunk_signatures(self, encoded):
+        k = self.shingle_size
+        # Texts shorter than a shingle are padded so they still get one
+        encoded = [text.ljust(k, b" ") for text in encoded]
+        lengths = np.array([len(text) for text in encoded])
+        data = np.frombuffer(b"".join(encoded), dtype=np.uint8).astype(np.uint64)
+        owner = np.repeat(np.arange(len(encoded)), lengths)
+
+        # Polynomial hash of every k-byte window, keeping windows inside one text
+        windows = len(data) - k + 1
+        hashes = data[:windows] * self._powers[0]
+        for offset in range(1, k):
+            hashes += data[offset:offset + windows] * self._powers[offset]
+        hashes = hashes[owner[:windows] == owner[k - 1:]]
+        hashes = (hashes * np.uint64(0x9E3779B97F4A7C15)) >> np.uint64(32)
+
+        counts = lengths - k + 1
+        offsets = np.r_[0, np.cumsum(counts)[:-1]]
+        signatures = np.empty((self.num_perm, len(encoded)), dtype=np.uint64)
+        permuted = np.empty_like(hashes)
+        # One permutation at a time keeps the working set in cache, several
+        # times faster than broadcasting all of them into one matrix
+        for row, (a, b) in enumerate(zip(self._a, self._b)):
+            np.multiply(hashes, a, out=permuted)
+            permuted += b
+            permuted >>= np.uint64(32)
+            signatures[row] = np.minimum.reduceat(permuted, offsets)
+        return signatures
@@ -1,16 +1,16 @@
-import os
 import json
+from collections import Counter
 from fastapi import FastAPI, Request
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse
 from pydantic import BaseModel
-from groq import Groq
 from dotenv import load_dotenv
-import re
+from llm_analysis import (
+    llm_cache, complete, review_text, chunk_texts, stream_reviews_batch, analyze_reviews_batch
+)
 
 load_dotenv()
 
 app = FastAPI()
-groqClient = Groq(api_key=os.getenv("GROQ_API_KEY"))
 
 # ---------------- Schema ----------------
 class AnalyzeRequest(BaseModel):
@@ -29,55 +29,12 @@ def first_sentence(text: str) -> str:
             return text[:idx + 1].strip()
     return text.strip()
 
-async def analyze_reviews_batch(reviews, model="llama-3.1-8b-instant"):
-    """Batch reviews into Groq request, return sentiment + keywords per review"""
-    reviews_text = "\n".join([f"{i+1}. {r.get('review','')}" for i, r in enumerate(reviews)])
-
-    prompt = f"""
-        Analyze these product reviews. For EACH review, return a JSON object:
-        - "review": the review text
-        - "sentiment": "POSITIVE", "NEUTRAL", or "NEGATIVE"
-        - "confidence": float between 0 and 1
-        - "keywords": up to 5 important keywords (lowercase, single words)
-
-        Reviews:
-        {reviews_text}
-
-        Respond ONLY in a valid JSON array, one object per review.
-        """
-
-    response = groqClient.chat.completions.create(
-        model=model,
-        messages=[
-            {"role": "system", "content": "You are an NLP assistant that analyzes reviews precisely."},
-            {"role": "user", "content": prompt}
-        ]
-    )
-
-    print("Response: ", response)
-    content = response.choices[0].message.content.strip()
-    
-    # Remove code block markers
-    if content.startswith("```"):
-        content = re.sub(r"^```(?:json)?\n?", "", content)
-        content = re.sub(r"\n?```$", "", content)
-
-    # Extract only the first JSON array from the response
-    match = re.search(r"\[\s*{[\s\S]*}\s*\]", content)
-    if match:
-        json_str = match.group(0)
-        try:
-            return json.loads(json_str)
-        except json.JSONDecodeError as e:
-            print("JSON parse error:", e, "\nRaw JSON candidate:", json_str)
-            return []
-    else:
-        print("No JSON array found in response:", content)
-        return []
-
-async def generate_suggestions_from_reviews(description, reviews_batch, model="gemma2-9b-it"):
+async def generate_suggestions_from_reviews(description, reviews_batch, model="gemma2-9b-it", refresh=False):
     """Generate actionable brand improvement suggestions based on actual reviews"""
-    reviews_text = "\n".join([f"- {r['review']}" for r in reviews_batch])
+    # Only as many reviews as fit the token budget, in order
+    texts = [review_text(r) for r in reviews_batch]
+    texts = [texts[i] for i in chunk_texts(texts, max_items=len(texts))[0]] if texts else []
+    reviews_text = "\n".join([f"- {text}" for text in texts])
     prompt = f"""
         You are an app/brand review analyst. Based on these reviews, generate actionable suggestions:
 
@@ -93,23 +50,58 @@ async def generate_suggestions_from_reviews(description, reviews_batch, model="g
         - Return a list of bullet points.
         """
 
-    response = groqClient.chat.completions.create(
-        model=model,
-        messages=[
-            {"role": "system", "content": "You generate actionable brand improvement suggestions."},
-            {"role": "user", "content": prompt}
-        ]
-    )
+    messages = [
+        {"role": "system", "content": "You generate actionable brand improvement suggestions."},
+        {"role": "user", "content": prompt}
+    ]
+    key = llm_cache.make_key(model, messages)
+    content = None if refresh else llm_cache.get(key)
+    if content is None:
+        content = await complete(messages, model)
+        llm_cache.put(key, content)
 
     # Split into bullet points
-    suggestions_text = response.choices[0].message.content.strip().split("\n")
+    suggestions_text = content.split("\n")
     return [s.strip("- ").strip() for s in suggestions_text if s.strip()]
 
+def finish_review(r, review):
+    """Normalize one model result in place and add the caller's fields, same structure as the Flask version"""
+    sentiment = str(r.get("sentiment", "NEUTRAL")).upper()
+    r.update({
+        "user": review.get("user", "anonymous"),
+        "rating": review.get("rating", None),
+        "review": r.get("review", review.get("review", "")),
+        "sentiment": sentiment,
+        "confidence": round(float(r.get("confidence", 0.5)), 4),
+        "keywords": r.get("keywords", [])
+    })
+    return r
+
+def distribution(counts):
+    """Percentage of each sentiment from a Counter of sentiments, anything unexpected counting as positive"""
+    negative, neutral = counts["NEGATIVE"], counts["NEUTRAL"]
+    positive = sum(counts.values()) - negative - neutral
+    total = max(1, negative + neutral + positive)
+    return {
+        "negative": round((negative / total) * 100, 2),
+        "neutral": round((neutral / total) * 100, 2),
+        "positive": round((positive / total) * 100, 2)
+    }
+
 # ---------------- Routes ----------------
 @app.get("/")
 async def root():
     return {"message": "Brand Analyzer NLP API is running!"}
 
+@app.get("/cache/stats")
+async def cache_stats():
+    return llm_cache.stats()
+
+@app.post("/cache/invalidate")
+async def cache_invalidate():
+    llm_cache.invalidate()
+    return {"success": True, "cache": llm_cache.stats()}
+
 @app.post("/analyze")
 async def analyze(request: Request):
     data = await request.json()
@@ -127,50 +119,26 @@ async def analyze(request: Request):
     icon = data["icon"]
     description = data["description"]
     brandType = data["brandURLType"]
+    # Forced refresh: ask the model again even for cached answers, and cache the new ones
+    refresh = request.query_params.get("refresh") == "1" or bool(data.get("refresh", False))
 
     # ---------------- Analyze Reviews ----------------
-    analyzed_reviews = await analyze_reviews_batch(reviews)
+    analyzed_reviews = await analyze_reviews_batch(reviews, refresh=refresh)
     print("\n Analyzed Reviews: ", analyzed_reviews)
 
-    negative, neutral, positive = 0, 0, 0
+    counts = Counter()
     total_keywords = set()
 
     for i, r in enumerate(analyzed_reviews):
-        sentiment = r.get("sentiment", "NEUTRAL").upper()
-        score = float(r.get("confidence", 0.5))
-        keywords = r.get("keywords", [])
-        user = reviews[i].get("user", "anonymous")
-        rating = reviews[i].get("rating", None)
-
-        if sentiment == "NEGATIVE":
-            negative += 1
-        elif sentiment == "NEUTRAL":
-            neutral += 1
-        else:
-            positive += 1
-
-        total_keywords.update(keywords)
-
-        # Keep same structure as Flask version
-        r.update({
-            "user": user,
-            "rating": rating,
-            "review": r.get("review", reviews[i].get("review","")),
-            "sentiment": sentiment,
-            "confidence": round(score, 4),
-            "keywords": keywords
-        })
+        finish_review(r, reviews[i])
+        counts[r["sentiment"]] += 1
+        total_keywords.update(r["keywords"])
 
-    total = max(1, negative + neutral + positive)
-    sentiment_distribution = {
-        "negative": round((negative / total) * 100, 2),
-        "neutral": round((neutral / total) * 100, 2),
-        "positive": round((positive / total) * 100, 2)
-    }
+    sentiment_distribution = distribution(counts)
     print("\nDistributions: ", sentiment_distribution)
 
     # ---------------- Generate Suggestions ----------------
-    suggestions = await generate_suggestions_from_reviews(description, analyzed_reviews)
+    suggestions = await generate_suggestions_from_reviews(description, analyzed_reviews, refresh=refresh)
     print("\nSuggestions: ", suggestions)
 
     description_short = first_sentence(description)
@@ -186,3 +154,53 @@ async def analyze(request: Request):
         "suggestions": suggestions,
         "analyzed_reviews": analyzed_reviews
     })
+
+@app.post("/analyze/stream")
+async def analyze_stream(request: Request):
+    """Streaming variant of /analyze that sends results as newline-delimited JSON.
+
+    Each review is sent as soon as the model finishes its object, as one line
+    with the fields of an analyzed_reviews entry plus its input "index"; lines
+    come in arrival order, not input order. The last line holds the summary
+    fields of /analyze with "type": "summary".
+    """
+    data = await request.json()
+
+    required_fields = ["reviews", "description", "uid", "title", "icon", "brandURLType"]
+    if not all(f in data for f in required_fields):
+        return JSONResponse({"error": "Missing required field"}, status_code=400)
+
+    reviews = data["reviews"]
+    description = data["description"]
+    refresh = request.query_params.get("refresh") == "1" or bool(data.get("refresh", False))
+
+    async def generate():
+        analyzed_reviews = []
+        counts = Counter()
+        total_keywords = set()
+        try:
+            async for i, r in stream_reviews_batch(reviews, refresh=refresh):
+                finish_review(r, reviews[i])
+                analyzed_reviews.append(r)
+                counts[r["sentiment"]] += 1
+                total_keywords.update(r["keywords"])
+                yield json.dumps({"index": i, **r}) + "\n"
+
+            suggestions = await generate_suggestions_from_reviews(description, analyzed_reviews, refresh=refresh)
+            yield json.dumps({
+                "type": "summary",
+                "success": True,
+                "uid": data["uid"],
+                "title": data["title"],
+                "icon": data["icon"],
+                "description": first_sentence(description),
+                "sentiment_distribution": distribution(counts),
+                "keywords": list(total_keywords),
+                "suggestions": suggestions
+            }) + "\n"
+        except Exception as e:
+            # Headers are already sent, so report the failure in-band
+            print(f"Error processing streamed request: {str(e)}")
+            yield json.dumps({"type": "error", "success": False, "error": f"Error processing request: {str(e)}"}) + "\n"
+
+    return StreamingResponse(generate(), media_type="application/x-ndjson")
@@ -6,22 +6,35 @@ import requests
 import os
 from dotenv import load_dotenv
 from groq import Groq
+from llm_cache import LLMCache
 
 load_dotenv()
 
+# LLM answer cache: in-memory LRU size, optional SQLite file shared by
+# restarts and processes, and how long an answer is reused
+LLM_CACHE_SIZE = int(os.getenv("LLM_CACHE_SIZE", "10000"))
+LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH")
+LLM_CACHE_TTL_SECONDS = float(os.getenv("LLM_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+
 app = FastAPI()
 
 # Input schema
 class ReviewRequest(BaseModel):
     model: str
     reviews: list[str]   # multiple reviews in one request
+    refresh: bool = False   # ask the model again instead of using a cached answer
 
 groqClient = Groq(api_key=os.getenv("GROQ_API_KEY"))
+llm_cache = LLMCache(max_items=LLM_CACHE_SIZE, path=LLM_CACHE_PATH, ttl=LLM_CACHE_TTL_SECONDS)
 
 @app.api_route("/", methods=["GET", "HEAD"])
 def root():
     return {"status": "ok", "message": "LLM API is running"}
 
+@app.get("/cache/stats")
+def cache_stats():
+    return llm_cache.stats()
+
 @app.post("/suggestions", response_class=PlainTextResponse)
 def suggestions(payload: ReviewRequest):
     try:
@@ -30,32 +43,35 @@ def suggestions(payload: ReviewRequest):
             [f"Review {i+1}: {r}" for i, r in enumerate(payload.reviews)]
         )
 
-        response = groqClient.chat.completions.create(
-            messages=[
-                {
-                    "role": "system", 
-                    "content": (
-                        "You are an app review analyst.\n\n"
-                        "RULES:\n"
-                        "1. Analyze the provided app reviews.\n"
-                        "2. Identify recurring problems, pain points, or requests.\n"
-                        "3. Generate **clear, actionable improvement suggestions**.\n"
-                        "   - Example: If review says 'app crashes on launch' → suggest 'Fix crash occurring on launch by checking crash logs'.\n"
-                        "   - If review says 'login is slow' → suggest 'Optimize login API to reduce authentication delay'.\n"
-                        "   - If review says 'UI confusing' → suggest 'Redesign navigation for clarity'.\n"
-                        "4. Return suggestions in a bullet point list.\n"
-                        "5. Keep suggestions concise and actionable (avoid generic phrases like 'improve performance')."
-                    )
-                },
-                {
-                    "role": "user", 
-                    "content": f"Here are the reviews:\n{reviews_text}"
-                }
-            ],
-            model=payload.model  
-        )
-
-        return response.choices[0].message.content
+        messages = [
+            {
+                "role": "system", 
+                "content": (
+                    "You are an app review analyst.\n\n"
+                    "RULES:\n"
+                    "1. Analyze the provided app reviews.\n"
+                    "2. Identify recurring problems, pain points, or requests.\n"
+                    "3. Generate **clear, actionable improvement suggestions**.\n"
+                    "   - Example: If review says 'app crashes on launch' → suggest 'Fix crash occurring on launch by checking crash logs'.\n"
+                    "   - If review says 'login is slow' → suggest 'Optimize login API to reduce authentication delay'.\n"
+                    "   - If review says 'UI confusing' → suggest 'Redesign navigation for clarity'.\n"
+                    "4. Return suggestions in a bullet point list.\n"
+                    "5. Keep suggestions concise and actionable (avoid generic phrases like 'improve performance')."
+                )
+            },
+            {
+                "role": "user", 
+                "content": f"Here are the reviews:\n{reviews_text}"
+            }
+        ]
+
+        key = llm_cache.make_key(payload.model, messages)
+        content = None if payload.refresh else llm_cache.get(key)
+        if content is None:
+            response = groqClient.chat.completions.create(messages=messages, model=payload.model)
+            content = response.choices[0].message.content
+            llm_cache.put(key, content)
+        return content
 
     except requests.exceptions.RequestException as e:
         return f"Error: {e}"
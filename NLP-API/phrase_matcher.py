@@ -0,0 +1,39 @@
+import ahocorasick
+
+
+class PhraseMatcher:
+    """Count groups of literal phrases in a single pass over a text.
+
+    All phrases are compiled once into an Aho-Corasick automaton. Counts follow
+    str.count semantics (non-overlapping occurrences per phrase, leftmost first),
+    so a group total equals sum(text.count(p) for p in group).
+    """
+
+    def __init__(self, groups):
+        self.groups = {name: list(dict.fromkeys(phrases)) for name, phrases in groups.items()}
+        self.phrases = list(dict.fromkeys(p for phrases in self.groups.values() for p in phrases))
+        index_of = {phrase: index for index, phrase in enumerate(self.phrases)}
+        self._group_indices = {
+            name: [index_of[p] for p in phrases] for name, phrases in self.groups.items()
+        }
+
+        self._automaton = ahocorasick.Automaton()
+        for index, phrase in enumerate(self.phrases):
+            self._automaton.add_word(phrase, (index, len(phrase)))
+        self._automaton.make_automaton()
+
+    def scan(self, text):
+        """Return {group: (total occurrences, distinct phrases found)} for the text"""
+        counts = [0] * len(self.phrases)
+        next_start = [0] * len(self.phrases)
+
+        for end, (index, length) in self._automaton.iter(text):
+            # Matches of one phrase arrive in order, skip those overlapping the last one counted
+            if end - length + 1 >= next_start[index]:
+                counts[index] += 1
+                next_start[index] = end + 1
+
+        return {
+            name: (sum(counts[i] for i in indices), sum(1 for i in indices if counts[i]))
+            for name, indices in self._group_indices.items()
+        }
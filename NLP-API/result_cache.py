@@ -0,0 +1,212 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+
+# Rows a process writes to the SQLite tier between two evictions
+_EVICT_EVERY = 1000
+
+
+def normalize_text(text):
+    """Normalize review text before hashing so trivial whitespace/unicode differences share a key"""
+    text = unicodedata.normalize("NFC", str(text) if text is not None else "")
+    return " ".join(text.split())
+
+
+class ResultCache:
+    """Content-addressed cache for per-review analysis results.
+
+    Entries live in a bounded in-memory LRU tier and, when a path is given, in a
+    SQLite file that survives restarts. Keys hash the model identity together
+    with the content, so results from an older model are never served; the
+    SQLite tier is also purged on open when it was written by another model.
+    SQLite rows expire ttl seconds after they were stored, and past
+    max_disk_items rows the oldest are evicted, on open and as results are
+    written.
+
+    Every reset of the SQLite tier bumps a generation number stored next to
+    it. Lookups compare it with the one this process last saw and drop the
+    in-memory tier when it moved, so an invalidation made by one server
+    worker also reaches the memory of the others.
+    """
+
+    def __init__(self, model_id, max_items=50000, path=None, max_disk_items=1000000, ttl=30 * 24 * 3600):
+        self.model_id = model_id
+        self.max_items = max_items
+        self.path = path
+        self.max_disk_items = max_disk_items
+        self.ttl = ttl
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.disk_hits = 0
+        self.evicted = 0
+        self._written = 0
+        self._conn = None
+        self._conn_pid = None
+        self._generation = None
+
+        if path:
+            db = self._db
+            # WAL lets several server workers read while one writes
+            db.execute("PRAGMA journal_mode=WAL")
+            columns = [row[1] for row in db.execute("PRAGMA table_info(results)")]
+            if columns and "stored_at" not in columns:
+                # Written before rows had a storage time; it's a cache, so start over
+                db.execute("DROP TABLE results")
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS results (key TEXT PRIMARY KEY, value TEXT NOT NULL, stored_at REAL NOT NULL)"
+            )
+            db.execute("CREATE INDEX IF NOT EXISTS results_stored_at ON results (stored_at)")
+            db.execute("CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value TEXT NOT NULL)")
+            row = db.execute("SELECT value FROM meta WHERE name = 'model_id'").fetchone()
+            if row is None or row[0] != model_id:
+                self._reset_disk()
+            self._generation = self._disk_generation()
+            self._evict_disk()
+            db.commit()
+
+    @property
+    def _db(self):
+        """SQLite connection of the current process, or None without a persistent tier.
+
+        Connections must not be shared across fork, so a forked server worker
+        opens its own on first use.
+        """
+        if not self.path:
+            return None
+        if self._conn is None or self._conn_pid != os.getpid():
+            self._conn = sqlite3.connect(self.path, check_same_thread=False, timeout=30)
+            self._conn_pid = os.getpid()
+        return self._conn
+
+    def make_key(self, kind, text, *extra, normalize=True):
+        """Build a key from the result kind, the (normalized) text and any extra inputs"""
+        text = normalize_text(text) if normalize else str(text)
+        parts = [self.model_id, kind, text] + [str(part) for part in extra]
+        return hashlib.sha256("\x1f".join(parts).encode("utf-8")).hexdigest()
+
+    def get(self, key):
+        return self.get_many([key]).get(key)
+
+    def put(self, key, value):
+        self.put_many({key: value})
+
+    def get_many(self, keys):
+        """Look up several keys at once, returns a dict holding only the hits"""
+        found = {}
+        with self._lock:
+            if self._db is not None:
+                generation = self._disk_generation()
+                if generation != self._generation:
+                    # Reset by another worker since this one last looked
+                    self._memory.clear()
+                    self._generation = generation
+            missing = []
+            for key in keys:
+                if key in self._memory:
+                    self._memory.move_to_end(key)
+                    found[key] = self._memory[key]
+                else:
+                    missing.append(key)
+
+            if self._db is not None and missing:
+                for start in range(0, len(missing), 500):
+                    chunk = missing[start:start + 500]
+                    placeholders = ",".join("?" * len(chunk))
+                    rows = self._db.execute(
+                        f"SELECT key, value FROM results WHERE key IN ({placeholders}) AND stored_at > ?",
+                        chunk + [self._cutoff()]
+                    ).fetchall()
+                    for key, value in rows:
+                        found[key] = json.loads(value)
+                        self._remember(key, found[key])
+                        self.disk_hits += 1
+
+            self.hits += len(found)
+            self.misses += len(keys) - len(found)
+        return found
+
+    def put_many(self, items):
+        """Store several results at once, writing the SQLite tier in one transaction"""
+        if not items:
+            return
+        with self._lock:
+            for key, value in items.items():
+                self._remember(key, value)
+            if self._db is not None:
+                now = time.time()
+                self._db.executemany(
+                    "INSERT OR REPLACE INTO results (key, value, stored_at) VALUES (?, ?, ?)",
+                    [(key, json.dumps(value), now) for key, value in items.items()]
+                )
+                self._written += len(items)
+                if self._written >= _EVICT_EVERY:
+                    self._evict_disk()
+                self._db.commit()
+
+    def invalidate(self, model_id=None):
+        """Drop every cached result, optionally switching to a new model identity"""
+        with self._lock:
+            if model_id is not None:
+                self.model_id = model_id
+            self._memory.clear()
+            if self._db is not None:
+                self._reset_disk()
+                self._db.commit()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "model_id": self.model_id,
+                "hits": self.hits,
+                "misses": self.misses,
+                "disk_hits": self.disk_hits,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "memory_items": len(self._memory),
+                "max_items": self.max_items,
+                "persistent": bool(self.path),
+                "max_disk_items": self.max_disk_items,
+                "ttl_seconds": self.ttl,
+                "generation": self._generation,
+                "disk_evicted": self.evicted
+            }
+
+    def _remember(self, key, value):
+        self._memory[key] = value
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_items:
+            self._memory.popitem(last=False)
+
+    def _cutoff(self):
+        return time.time() - self.ttl if self.ttl else float("-inf")
+
+    def _evict_disk(self):
+        """Delete expired rows, then the oldest ones past max_disk_items; the caller commits"""
+        self._written = 0
+        deleted = self._db.execute("DELETE FROM results WHERE stored_at <= ?", (self._cutoff(),)).rowcount
+        excess = self._db.execute("SELECT COUNT(*) FROM results").fetchone()[0] - self.max_disk_items
+        if self.max_disk_items and excess > 0:
+            deleted += self._db.execute(
+                "DELETE FROM results WHERE key IN (SELECT key FROM results ORDER BY stored_at LIMIT ?)", (excess,)
+            ).rowcount
+        self.evicted += deleted
+
+    def _disk_generation(self):
+        row = self._db.execute("SELECT value FROM meta WHERE name = 'generation'").fetchone()
+        return int(row[0]) if row is not None else 0
+
+    def _reset_disk(self):
+        """Empty the SQLite tier and bump its generation; the caller commits"""
+        self._generation = self._disk_generation() + 1
+        self._db.execute("DELETE FROM results")
+        self._db.execute("INSERT OR REPLACE INTO meta (name, value) VALUES ('model_id', ?)", (self.model_id,))
+        self._db.execute(
+            "INSERT OR REPLACE INTO meta (name, value) VALUES ('generation', ?)", (str(self._generation),)
+        )
@@ -0,0 +1,114 @@
+import multiprocessing
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+# This worker's copy of updated_api, imported by _init_worker
+_api = None
+
+
+def _init_worker(torch_threads):
+    """Pool initializer: cap the thread pools, then load and warm up the models once"""
+    global _api
+    os.environ["OMP_NUM_THREADS"] = str(torch_threads)
+    os.environ["TOKENIZERS_PARALLELISM"] = "false"
+    os.environ["WARMUP_ON_LOAD"] = "1"
+    # The parent counts the merged results, so the workers' metrics stay private
+    os.environ.pop("PROMETHEUS_MULTIPROC_DIR", None)
+
+    import torch
+    torch.set_num_threads(torch_threads)
+
+    # Started with `python updated_api.py`, the module is already loaded here as
+    # the parent's __main__; reuse it instead of loading the models a second time
+    main = sys.modules.get("__mp_main__")
+    if main is not None and os.path.basename(getattr(main, "__file__", "") or "") == "updated_api.py":
+        sys.modules.setdefault("updated_api", main)
+    import updated_api
+    _api = updated_api
+
+
+def _worker_pid():
+    # Long enough that a worker that is already up can't take every startup probe
+    time.sleep(0.05)
+    return os.getpid()
+
+
+def _analyze_shard(reviews, near_duplicates, options):
+    timer = _api.StageTimer()
+    entries = _api.analyze_review_batch(reviews, timer=timer, near_duplicates=near_duplicates, **options)
+    return entries, _api.summarize_reviews(entries), timer.seconds
+
+
+class ReviewPool:
+    """Worker processes that analyze the shards of one request on separate cores.
+
+    The fake-review heuristics are pure Python and hold the GIL, so a request
+    analyzed in threads never gets much past one core. Each worker here is a
+    spawned process that imports updated_api once in its initializer, loading
+    and warming up its own models, with torch limited to torch_threads
+    intra-op threads so the workers together don't oversubscribe the cores.
+    By default the threads this process has are split evenly between them.
+
+    analyze() yields each shard's entries, summarize_reviews tallies and stage
+    seconds in the order the shards were given, whichever finishes first.
+    Workers are started on first use, and again after a fork.
+    """
+
+    def __init__(self, workers, torch_threads=None):
+        self.workers = workers
+        self.torch_threads = torch_threads
+        self._executor = None
+        self._pid = None
+        self._lock = threading.Lock()
+        self.shards = 0
+
+    def start(self):
+        """Start the workers if needed and wait until each has loaded its models"""
+        with self._lock:
+            if self._executor is not None and self._pid == os.getpid():
+                return self._executor
+            if self.torch_threads is None:
+                import torch
+                self.torch_threads = max(1, torch.get_num_threads() // self.workers)
+            executor = ProcessPoolExecutor(
+                self.workers, mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker, initargs=(self.torch_threads,)
+            )
+            pids = set()
+            while len(pids) < self.workers:
+                pids.update(future.result() for future in [executor.submit(_worker_pid) for _ in range(self.workers)])
+            self._executor = executor
+            self._pid = os.getpid()
+            return executor
+
+    def analyze(self, shards, **options):
+        """Run analyze_review_batch on each (reviews, near_duplicates) shard, yielding results in shard order.
+
+        options are passed on to analyze_review_batch, e.g. hybrid.
+        """
+        executor = self.start()
+        futures = [executor.submit(_analyze_shard, reviews, near_duplicates, options) for reviews, near_duplicates in shards]
+        try:
+            for future in futures:
+                yield future.result()
+                self.shards += 1
+        finally:
+            for future in futures:
+                future.cancel()
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None and self._pid == os.getpid():
+                self._executor.shutdown(cancel_futures=True)
+            self._executor = None
+
+    def stats(self):
+        return {
+            "workers": self.workers,
+            "torch_threads": self.torch_threads,
+            "started": self._executor is not None and self._pid == os.getpid(),
+            "shards": self.shards
+        }
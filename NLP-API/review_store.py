@@ -0,0 +1,231 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import Counter
+
+from result_cache import normalize_text
+
+
+def empty_totals():
+    return {
+        "negative": 0,
+        "neutral": 0,
+        "positive": 0,
+        "fake_reviews": 0,
+        "fake_reasons": {},
+        "keywords": {},
+        "reviews_analyzed": 0
+    }
+
+
+class ReviewStore:
+    """Per-app SQLite store of analyzed reviews and their running tallies.
+
+    Each review is kept under a fingerprint of its user, rating and normalized
+    text, so a review pulled again by a later scheduled run is recognized and
+    not analyzed twice. Every app (keyed by its id or title) also has one row of
+    running totals: sentiment counts, fake-reason tallies and the frequencies
+    of its max_keywords most frequent keywords, so the totals stay bounded
+    however many reviews the app gets. add() inserts new reviews and
+    updates the totals in the same transaction, so concurrent requests for the
+    same app never count a review twice. Each stored review also records the
+    keyword mode its keywords were extracted in, and can be replaced with a
+    new analysis, which is swapped into the totals too.
+
+    Stored results belong to the model identity they were computed with; the
+    store is emptied when it is opened with a different one.
+    """
+
+    def __init__(self, path, model_id, max_keywords=1000):
+        self.path = path
+        self.model_id = model_id
+        self.max_keywords = max_keywords
+        self._lock = threading.Lock()
+        self._conn = None
+        self._conn_pid = None
+
+        db = self._db
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute(
+            "CREATE TABLE IF NOT EXISTS reviews (app TEXT NOT NULL, fingerprint TEXT NOT NULL, "
+            "entry TEXT NOT NULL, analyzed_at REAL NOT NULL, keyword_mode TEXT, PRIMARY KEY (app, fingerprint))"
+        )
+        if "keyword_mode" not in [row[1] for row in db.execute("PRAGMA table_info(reviews)")]:
+            # Stored before the mode was recorded; left NULL, as it is unknown
+            db.execute("ALTER TABLE reviews ADD COLUMN keyword_mode TEXT")
+        db.execute("CREATE TABLE IF NOT EXISTS totals (app TEXT PRIMARY KEY, totals TEXT NOT NULL)")
+        db.execute("CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value TEXT NOT NULL)")
+        row = db.execute("SELECT value FROM meta WHERE name = 'model_id'").fetchone()
+        if row is None or row[0] != model_id:
+            self._reset()
+        db.commit()
+
+    @property
+    def _db(self):
+        """SQLite connection of the current process, reopened after a fork"""
+        if self._conn is None or self._conn_pid != os.getpid():
+            self._conn = sqlite3.connect(self.path, check_same_thread=False, timeout=30)
+            self._conn_pid = os.getpid()
+        return self._conn
+
+    @staticmethod
+    def fingerprint(review):
+        """Stable id of a review: its user, rating and normalized text"""
+        parts = [
+            str(review.get("user", "anonymous")),
+            str(review.get("rating", None)),
+            normalize_text(review.get("review", ""))
+        ]
+        return hashlib.sha256("\x1f".join(parts).encode("utf-8")).hexdigest()
+
+    def lookup(self, app, fingerprints):
+        """Stored (entry, keyword_mode) of an app for the given fingerprints, only those found"""
+        found = {}
+        unique = list(dict.fromkeys(fingerprints))
+        with self._lock:
+            for start in range(0, len(unique), 500):
+                chunk = unique[start:start + 500]
+                placeholders = ",".join("?" * len(chunk))
+                rows = self._db.execute(
+                    f"SELECT fingerprint, entry, keyword_mode FROM reviews WHERE app = ? AND fingerprint IN ({placeholders})",
+                    [app] + chunk
+                ).fetchall()
+                found.update((fingerprint, (json.loads(entry), mode)) for fingerprint, entry, mode in rows)
+        return found
+
+    def add(self, app, entries, keyword_mode=None, replace=()):
+        """Store {fingerprint: entry} for an app and fold the new ones into its totals.
+
+        Entries already stored (e.g. by a concurrent request) are skipped,
+        except those whose fingerprint is in replace: their stored entry is
+        taken out of the totals and overwritten. keyword_mode is recorded for
+        the entries written. Returns the app's updated totals.
+        """
+        with self._lock:
+            db = self._db
+            db.execute("BEGIN IMMEDIATE")
+            try:
+                added = []
+                removed = []
+                now = time.time()
+                for fingerprint, entry in entries.items():
+                    row = (app, fingerprint, json.dumps(entry), now, keyword_mode)
+                    if fingerprint in replace:
+                        old = db.execute(
+                            "SELECT entry FROM reviews WHERE app = ? AND fingerprint = ?", (app, fingerprint)
+                        ).fetchone()
+                        if old is not None:
+                            removed.append(json.loads(old[0]))
+                        db.execute(
+                            "INSERT OR REPLACE INTO reviews (app, fingerprint, entry, analyzed_at, keyword_mode) "
+                            "VALUES (?, ?, ?, ?, ?)", row
+                        )
+                        added.append(entry)
+                        continue
+                    cursor = db.execute(
+                        "INSERT OR IGNORE INTO reviews (app, fingerprint, entry, analyzed_at, keyword_mode) "
+                        "VALUES (?, ?, ?, ?, ?)", row
+                    )
+                    if cursor.rowcount == 1:
+                        added.append(entry)
+
+                totals = self._load_totals(db, app)
+                unmerge_entries(totals, removed)
+                merge_entries(totals, added, self.max_keywords)
+                db.execute(
+                    "INSERT OR REPLACE INTO totals (app, totals) VALUES (?, ?)", (app, json.dumps(totals))
+                )
+                db.execute("COMMIT")
+            except Exception:
+                db.execute("ROLLBACK")
+                raise
+        return totals
+
+    def totals(self, app):
+        with self._lock:
+            return self._load_totals(self._db, app)
+
+    def forget(self, app):
+        """Drop everything stored for an app, so its next request starts from scratch"""
+        with self._lock:
+            self._db.execute("DELETE FROM reviews WHERE app = ?", (app,))
+            self._db.execute("DELETE FROM totals WHERE app = ?", (app,))
+            self._db.commit()
+
+    def invalidate(self, model_id=None):
+        """Drop every stored review and total, optionally switching to a new model identity"""
+        with self._lock:
+            if model_id is not None:
+                self.model_id = model_id
+            self._reset()
+            self._db.commit()
+
+    def stats(self):
+        with self._lock:
+            apps = self._db.execute("SELECT COUNT(*) FROM totals").fetchone()[0]
+            reviews = self._db.execute("SELECT COUNT(*) FROM reviews").fetchone()[0]
+        return {"model_id": self.model_id, "apps": apps, "reviews": reviews, "path": self.path}
+
+    def _reset(self):
+        self._db.execute("DELETE FROM reviews")
+        self._db.execute("DELETE FROM totals")
+        self._db.execute("INSERT OR REPLACE INTO meta (name, value) VALUES ('model_id', ?)", (self.model_id,))
+
+    @staticmethod
+    def _load_totals(db, app):
+        row = db.execute("SELECT totals FROM totals WHERE app = ?", (app,)).fetchone()
+        return json.loads(row[0]) if row else empty_totals()
+
+
+def merge_entries(totals, entries, max_keywords=None):
+    """Add analyzed_reviews entries to a totals dict in place, keeping the max_keywords most frequent keywords.
+
+    Counts of keywords dropped by the cap start again from zero if they come
+    back, so the tracked frequencies are lower bounds for rare keywords.
+    """
+    keywords = Counter(totals["keywords"])
+    for entry in entries:
+        totals["reviews_analyzed"] += 1
+        if entry["is_fake"]:
+            totals["fake_reviews"] += 1
+            reason = entry["fake_reason"]
+            totals["fake_reasons"][reason] = totals["fake_reasons"].get(reason, 0) + 1
+            continue
+
+        if entry["sentiment"] == "NEGATIVE":
+            totals["negative"] += 1
+        elif entry["sentiment"] == "POSITIVE":
+            totals["positive"] += 1
+        else:
+            totals["neutral"] += 1
+        keywords.update(entry["keywords"])
+    totals["keywords"] = dict(keywords.most_common(max_keywords))
+    return totals
+
+
+def unmerge_entries(totals, entries):
+    """Take analyzed_reviews entries back out of a totals dict in place, the inverse of merge_entries"""
+    keywords = Counter(totals["keywords"])
+    for entry in entries:
+        totals["reviews_analyzed"] -= 1
+        if entry["is_fake"]:
+            totals["fake_reviews"] -= 1
+            reason = entry["fake_reason"]
+            totals["fake_reasons"][reason] = totals["fake_reasons"].get(reason, 0) - 1
+            if totals["fake_reasons"][reason] <= 0:
+                del totals["fake_reasons"][reason]
+            continue
+
+        if entry["sentiment"] == "NEGATIVE":
+            totals["negative"] -= 1
+        elif entry["sentiment"] == "POSITIVE":
+            totals["positive"] -= 1
+        else:
+            totals["neutral"] -= 1
+        # Keywords dropped by the cap are simply not there to subtract
+        keywords.subtract(keyword for keyword in entry["keywords"] if keyword in keywords)
+    totals["keywords"] = {keyword: count for keyword, count in keywords.most_common() if count > 0}
+    return totals
@@ -0,0 +1,50 @@
+import os
+
+from transformers import pipeline, AutoTokenizer, AutoModelForSequenceClassification
+from model_store import SENTIMENT_DIR, SENTIMENT_ONNX_DIR, require_local_model
+
+# File names written by export_sentiment_model.py into SENTIMENT_ONNX_DIR
+ONNX_FILE = "model.onnx"
+ONNX_INT8_FILE = "model_quantized.onnx"
+
+SENTIMENT_BACKENDS = ("torch", "torch-int8", "onnx", "onnx-int8")
+
+
+def load_sentiment_pipeline(backend="torch", model=SENTIMENT_DIR, onnx_dir=SENTIMENT_ONNX_DIR):
+    """Build the sentiment-analysis pipeline on the chosen inference backend.
+
+    torch       PyTorch fp32, the original setup
+    torch-int8  PyTorch with Linear layers dynamically quantized to int8
+    onnx        ONNX Runtime on the exported fp32 graph
+    onnx-int8   ONNX Runtime on the dynamically quantized graph
+
+    All four return a regular transformers pipeline, so callers don't change.
+    model defaults to the prefetched copy of SENTIMENT_MODEL, so nothing is
+    looked up on the hub. The ONNX backends need export_sentiment_model.py to
+    have been run first.
+    """
+    if backend == "torch":
+        return pipeline("sentiment-analysis", model=require_local_model(model, "Sentiment"))
+
+    if backend == "torch-int8":
+        import torch
+
+        require_local_model(model, "Sentiment")
+        tokenizer = AutoTokenizer.from_pretrained(model, local_files_only=True)
+        fp32_model = AutoModelForSequenceClassification.from_pretrained(model, local_files_only=True)
+        int8_model = torch.quantization.quantize_dynamic(fp32_model, {torch.nn.Linear}, dtype=torch.qint8)
+        return pipeline("sentiment-analysis", model=int8_model, tokenizer=tokenizer)
+
+    if backend in ("onnx", "onnx-int8"):
+        from optimum.onnxruntime import ORTModelForSequenceClassification
+
+        file_name = ONNX_FILE if backend == "onnx" else ONNX_INT8_FILE
+        if not os.path.exists(os.path.join(onnx_dir, file_name)):
+            raise FileNotFoundError(
+                f"{os.path.join(onnx_dir, file_name)} not found, run export_sentiment_model.py first"
+            )
+        tokenizer = AutoTokenizer.from_pretrained(onnx_dir, local_files_only=True)
+        ort_model = ORTModelForSequenceClassification.from_pretrained(onnx_dir, file_name=file_name, local_files_only=True)
+        return pipeline("sentiment-analysis", model=ort_model, tokenizer=tokenizer)
+
+    raise ValueError(f"Unknown sentiment backend '{backend}', expected one of {', '.join(SENTIMENT_BACKENDS)}")
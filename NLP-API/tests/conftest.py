@@ -0,0 +1,16 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+
+@pytest.fixture(scope="session")
+def api():
+    """updated_api with its models loaded, or a skip when they haven't been prefetched into MODEL_DIR"""
+    try:
+        import updated_api
+    except FileNotFoundError as e:
+        pytest.skip(str(e))
+    return updated_api
@@ -0,0 +1,37 @@
+import math
+
+import numpy as np
+import pytest
+
+from corpus_keywords import KeywordRanker, class_tfidf
+
+TEXTS = ["crash login", "crash login", "crash", "login slow", "slow"]
+GROUPS = ["a", "a", "a", "b", "b"]
+
+# Term counts per group, columns crash, login, slow:
+#   a: 3 2 0 (5 terms)    b: 0 1 2 (3 terms)
+# A = (5 + 3) / 2 = 4 terms per class; term totals 3, 3, 2
+IDF_CRASH = IDF_LOGIN = math.log(1 + 4 / 3)
+IDF_SLOW = math.log(1 + 4 / 2)
+EXPECTED = np.array([
+    [3 / 5 * IDF_CRASH, 2 / 5 * IDF_LOGIN, 0],
+    [0, 1 / 3 * IDF_LOGIN, 2 / 3 * IDF_SLOW],
+])
+
+
+def test_class_tfidf_matches_hand_computed_weights():
+    assert class_tfidf([[3, 2, 0], [0, 1, 2]]) == pytest.approx(EXPECTED)
+
+
+def test_ranking_matches_hand_computed_example():
+    ranker = KeywordRanker(ngram_range=(1, 1), min_df=2, stop_words=None)
+    ranking, keywords = ranker.rank(TEXTS, GROUPS, per_text=2)
+
+    assert ranking["a"] == [
+        {"keyword": "crash", "count": 3, "reviews": 3, "score": round(EXPECTED[0, 0], 6)},
+        {"keyword": "login", "count": 2, "reviews": 2, "score": round(EXPECTED[0, 1], 6)},
+    ]
+    # login is in a single text of b, under min_df
+    assert ranking["b"] == [{"keyword": "slow", "count": 2, "reviews": 2, "score": round(EXPECTED[1, 2], 6)}]
+    # Each text's terms by their weight in its own group
+    assert keywords == [["crash", "login"], ["crash", "login"], ["crash"], ["slow", "login"], ["slow"]]
@@ -0,0 +1,112 @@
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+import embedding_store
+from embedding_store import EmbeddingStore
+
+DIM = 4
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """The store's time.time(), set by hand"""
+    now = SimpleNamespace(value=1_000_000.0)
+    monkeypatch.setattr(embedding_store, "time", SimpleNamespace(time=lambda: now.value))
+    return now
+
+
+def vector(i):
+    return np.arange(DIM, dtype=np.float32) + i
+
+
+def items(indices):
+    return {EmbeddingStore.fingerprint(f"text {i}"): vector(i) for i in indices}
+
+
+def stored(store, indices):
+    """Indices whose vector the store returns, checking each vector on the way"""
+    found = store.get_many(list(items(indices)))
+    result = []
+    for i, key in zip(indices, items(indices)):
+        if key in found:
+            assert np.allclose(found[key], vector(i))
+            result.append(i)
+    return result
+
+
+def test_other_processes_follow_compaction_and_invalidation(tmp_path, clock):
+    writer = EmbeddingStore(str(tmp_path), "model", DIM)
+    reader = EmbeddingStore(str(tmp_path), "model", DIM)
+    writer.put_many(items(range(3)))
+    assert stored(reader, range(3)) == [0, 1, 2]
+
+    generation = writer.stats()["generation"]
+    writer.compact()
+    writer.put_many(items([3]))
+    assert stored(reader, range(4)) == [0, 1, 2, 3]
+    assert reader.stats()["generation"] == generation + 1
+
+    writer.invalidate()
+    assert stored(reader, range(4)) == []
+    reader.put_many(items([5]))
+    assert stored(writer, [5]) == [5]
+
+
+def test_compaction_keeps_the_newest_80_percent(tmp_path, clock):
+    store = EmbeddingStore(str(tmp_path), "model", DIM, max_items=10, max_age=None)
+    for i in range(10):
+        clock.value += 1
+        store.put_many(items([i]))
+    assert store.stats()["compactions"] == 0
+
+    clock.value += 1
+    store.put_many(items([10]))
+    stats = store.stats()
+    assert (stats["compactions"], stats["items"], stats["index_records"]) == (1, 8, 8)
+    assert stored(store, range(11)) == list(range(3, 11))
+
+
+def test_compaction_breaks_timestamp_ties_by_newest_row(tmp_path, clock):
+    store = EmbeddingStore(str(tmp_path), "model", DIM, max_items=10, max_age=None)
+    # One write, so every entry has the same stored_at
+    store.put_many(items(range(11)))
+    assert stored(store, range(11)) == list(range(3, 11))
+
+
+def test_entries_expire_after_max_age(tmp_path, clock):
+    store = EmbeddingStore(str(tmp_path), "model", DIM, max_age=3600)
+    store.put_many(items([0]))
+    clock.value += 1800
+    store.put_many(items([1]))
+
+    clock.value += 2400
+    assert stored(store, [0, 1]) == [1]
+    assert store.stats()["expired"] == 1
+
+    # Expired entries also trigger a rewrite on the next write
+    store.put_many(items([2]))
+    stats = store.stats()
+    assert (stats["compactions"], stats["items"]) == (1, 2)
+    assert stored(store, [0, 1, 2]) == [1, 2]
+
+
+def test_opening_with_another_model_empties_the_store(tmp_path, clock):
+    old = EmbeddingStore(str(tmp_path), "model-a", DIM)
+    old.put_many(items(range(3)))
+    generation = old.stats()["generation"]
+
+    new = EmbeddingStore(str(tmp_path), "model-b", DIM)
+    assert new.stats()["items"] == 0
+    assert new.stats()["generation"] == generation + 1
+    assert stored(new, range(3)) == []
+
+    # The process still on the old model neither reads nor writes it
+    assert not old.stats()["current"]
+    assert stored(old, range(3)) == []
+    old.put_many(items([4]))
+    assert new.stats()["items"] == 0
+
+    # Neither does a different dimension
+    assert EmbeddingStore(str(tmp_path), "model-b", DIM + 1).stats()["generation"] == generation + 2
@@ -0,0 +1,16 @@
+import time
+
+from inference_batcher import InferenceBatcher
+
+
+def test_lone_caller_does_not_wait_for_the_batch_to_fill():
+    batcher = InferenceBatcher(lambda batch: [item * 2 for item in batch], max_batch_size=32, max_wait=2.0)
+
+    for items in ([1, 2, 3], [4]):
+        start = time.perf_counter()
+        assert batcher.run(items) == [item * 2 for item in items]
+        assert time.perf_counter() - start < 1.0
+
+    stats = batcher.stats()
+    assert stats["items"] == 4
+    assert stats["max_queue_delay_ms"] < 1000
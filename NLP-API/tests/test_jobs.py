@@ -0,0 +1,107 @@
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from jobs import InMemoryJobBackend, JobManager, KeyValueJobBackend  # noqa: E402
+
+
+class DictClient:
+    """Local stand-in for redis.Redis: get/set on a dict, remembering each key's expiry"""
+
+    def __init__(self):
+        self.values = {}
+        self.expiry = {}
+
+    def get(self, key):
+        value = self.values.get(key)
+        return value.encode("utf-8") if value is not None else None
+
+    def set(self, key, value, ex=None):
+        self.values[key] = value
+        self.expiry[key] = ex
+
+
+def wait_for(manager, job_id, predicate, timeout=5):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        record = manager.status(job_id)
+        if record is not None and predicate(record):
+            return record
+        time.sleep(0.01)
+    raise AssertionError(f"job {job_id} never matched, last record: {manager.status(job_id)}")
+
+
+def stepped_runner(step, proceed):
+    """A runner that reports each review and waits for proceed before the next one"""
+    def runner(payload, report_progress, is_cancelled):
+        reviews = payload["reviews"]
+        for done in range(len(reviews)):
+            if is_cancelled():
+                return None
+            report_progress(done, len(reviews), "analyzing")
+            step.set()
+            proceed.wait(5)
+            proceed.clear()
+        report_progress(len(reviews), len(reviews), "summarizing")
+        return {"analyzed_reviews": len(reviews)}
+    return runner
+
+
+def test_key_value_backend_runs_a_job_to_its_result():
+    client = DictClient()
+    step, proceed = threading.Event(), threading.Event()
+    manager = JobManager(stepped_runner(step, proceed), backend=KeyValueJobBackend(client, ttl=60), max_workers=1)
+
+    job_id = manager.submit({"reviews": ["a", "b"]})
+    assert manager.status(job_id)["total"] == 2
+
+    assert step.wait(5)
+    record = wait_for(manager, job_id, lambda r: r["stage"] == "analyzing")
+    assert (record["status"], record["done"], record["total"]) == ("running", 0, 2)
+
+    step.clear()
+    proceed.set()
+    assert step.wait(5)
+    record = wait_for(manager, job_id, lambda r: r["done"] == 1)
+    assert (record["status"], record["stage"], record["total"]) == ("running", "analyzing", 2)
+
+    proceed.set()
+    record = wait_for(manager, job_id, lambda r: r["status"] == "done")
+    assert record["stage"] == "done"
+    assert record["done"] == 2
+    assert record["result"] == {"analyzed_reviews": 2}
+    assert client.expiry["brandsight:jobs:" + job_id] == 60
+
+
+def test_key_value_backend_cancels_a_running_job():
+    client = DictClient()
+    step, proceed = threading.Event(), threading.Event()
+    manager = JobManager(stepped_runner(step, proceed), backend=KeyValueJobBackend(client, ttl=60), max_workers=1)
+
+    job_id = manager.submit({"reviews": ["a", "b", "c"]})
+    assert step.wait(5)
+    assert manager.cancel(job_id)
+    assert manager.status(job_id)["status"] == "cancelling"
+    assert client.expiry["brandsight:jobs:" + job_id + ":cancel"] == 60
+
+    proceed.set()
+    record = wait_for(manager, job_id, lambda r: r["status"] == "cancelled")
+    assert record["result"] is None
+    assert not manager.cancel(job_id)
+
+
+def test_in_memory_backend_drops_expired_finished_jobs():
+    backend = InMemoryJobBackend(ttl=60)
+    old = time.time() - 120
+    backend.set_cancelled("finished")
+    backend.save({"id": "finished", "status": "done", "updated_at": old})
+    backend.save({"id": "running", "status": "running", "updated_at": old})
+    backend.save({"id": "fresh", "status": "done", "updated_at": time.time()})
+
+    assert backend.load("finished") is None
+    assert not backend.is_cancelled("finished")
+    assert backend.load("running") is not None
+    assert backend.load("fresh") is not None
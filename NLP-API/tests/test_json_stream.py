@@ -0,0 +1,67 @@
+import json
+import random
+
+from json_stream import JSONArrayStream
+
+# Awkward for a character-level parser: escapes, quotes and brackets inside strings
+FRAGMENTS = ['crash', 'say \\"hi\\"', 'back\\\\slash', '[not] {an} array', 'caf\\u00e9', 'line\\nbreak', '}]', '\\\\\\"']
+
+
+def feed_pieces(pieces):
+    parser = JSONArrayStream()
+    objects = []
+    for piece in pieces:
+        objects.extend(parser.feed(piece))
+    return parser, objects
+
+
+def random_document(rng):
+    """A reply text holding a JSON array of objects, and the objects it holds"""
+    objects = []
+    for i in range(rng.randint(0, 6)):
+        text = " ".join(rng.choice(FRAGMENTS) for _ in range(rng.randint(1, 4)))
+        objects.append(json.loads(
+            f'{{"id": {i + 1}, "review": "{text}", "keywords": ["{rng.choice(FRAGMENTS)}"], '
+            f'"nested": {{"scores": [{rng.random()}, {{"x": "]"}}]}}}}'
+        ))
+    array = json.dumps(objects, indent=rng.choice([None, 2]), ensure_ascii=rng.random() < 0.5)
+    prefix = rng.choice(["", "Here is the analysis:\n", "```json\n", "Sure! ```\n"])
+    suffix = rng.choice(["", "\n```", "\nLet me know if you need more [details]."])
+    return prefix + array + suffix, objects
+
+
+def random_split(rng, text):
+    cuts = sorted(rng.sample(range(1, len(text)), min(len(text) - 1, rng.randint(0, 40))))
+    return [text[start:end] for start, end in zip([0] + cuts, cuts + [len(text)])]
+
+
+def test_random_splits_give_the_same_objects():
+    rng = random.Random(0)
+    for _ in range(3000):
+        document, objects = random_document(rng)
+        parser, parsed = feed_pieces(random_split(rng, document))
+        assert parsed == objects, document
+        assert parser.finished and parser.errors == 0
+
+
+def test_split_after_a_backslash():
+    document = '[{"review": "a \\"quoted\\" ]} word"}]'
+    for cut in range(1, len(document)):
+        _, parsed = feed_pieces([document[:cut], document[cut:]])
+        assert parsed == [{"review": 'a "quoted" ]} word'}]
+
+
+def test_each_object_comes_back_with_the_piece_that_closes_it():
+    parser = JSONArrayStream()
+    assert parser.feed('```json\n[{"id": 1, "k": [1, 2]') == []
+    assert parser.feed('}, {"id"') == [{"id": 1, "k": [1, 2]}]
+    assert parser.feed(': 2}]\n``` and [{"id": 3}]') == [{"id": 2}]
+    assert parser.finished
+    assert parser.feed('{"id": 4}') == []
+
+
+def test_non_objects_and_broken_elements_are_counted_as_errors():
+    parser, parsed = feed_pieces(['[1, "two", [3], {"ok": true}, {"bad": tru}, {"ok": false}]'])
+    assert parsed == [{"ok": True}, {"ok": False}]
+    # The scalars between objects are skipped without being parsed
+    assert parser.errors == 2
@@ -0,0 +1,97 @@
+import asyncio
+import json
+import os
+import re
+
+import pytest
+
+# The Groq client refuses to be created without a key; no call reaches it here
+os.environ.setdefault("GROQ_API_KEY", "test")
+
+import llm_analysis  # noqa: E402
+from llm_cache import LLMCache  # noqa: E402
+
+
+def prompt_reviews(messages):
+    """{id: text} of the numbered reviews in an analysis prompt"""
+    return {int(i): text for i, text in re.findall(r"^\s*(\d+)\. (.+)$", messages[-1]["content"], re.M)}
+
+
+def answer(i, text):
+    return {"id": i, "review": text, "sentiment": "POSITIVE", "confidence": 0.9, "keywords": [text.split()[0]]}
+
+
+@pytest.fixture
+def completions(monkeypatch):
+    """Replaces the streamed Groq call with reply(reviews) -> list of objects, split into small pieces"""
+    calls = []
+    monkeypatch.setattr(llm_analysis, "llm_cache", LLMCache(max_items=100))
+
+    def install(reply):
+        async def stream_completion(messages, model):
+            reviews = prompt_reviews(messages)
+            calls.append(reviews)
+            text = "```json\n" + json.dumps(reply(reviews)) + "\n```"
+            for start in range(0, len(text), 7):
+                await asyncio.sleep(0)
+                yield text[start:start + 7]
+        monkeypatch.setattr(llm_analysis, "stream_completion", stream_completion)
+        return calls
+    return install
+
+
+def collect(reviews, **kwargs):
+    async def run():
+        return [item async for item in llm_analysis.stream_reviews_batch(reviews, **kwargs)]
+    return asyncio.run(run())
+
+
+def test_chunk_texts_respects_the_token_and_item_budgets():
+    texts = ["x" * 40] * 7  # 11 tokens each
+    assert llm_analysis.chunk_texts(texts, max_tokens=25, max_items=10) == [[0, 1], [2, 3], [4, 5], [6]]
+    assert llm_analysis.chunk_texts(texts, max_tokens=1000, max_items=3) == [[0, 1, 2], [3, 4, 5], [6]]
+    # A text over the budget still gets a chunk of its own
+    assert llm_analysis.chunk_texts(["x" * 400, "y"], max_tokens=25) == [[0], [1]]
+    assert llm_analysis.chunk_texts([]) == []
+
+
+def test_results_are_matched_by_id_not_by_position(completions):
+    def reply(reviews):
+        # Reordered, one review missing (2), an unknown id and a repeated one
+        objects = [answer(i, reviews[i]) for i in sorted(reviews, reverse=True) if i != 2]
+        return objects + [answer(99, "ghost"), {**answer(1, "impostor"), "sentiment": "NEGATIVE"}, {"review": "no id"}]
+    completions(reply)
+
+    reviews = [{"review": "alpha works"}, {"review": "beta fails"}, {"review": "gamma ok"}]
+    results = dict(collect(reviews))
+    assert sorted(results) == [0, 1, 2]
+    assert results[0] == {"review": "alpha works", "sentiment": "POSITIVE", "confidence": 0.9, "keywords": ["alpha"]}
+    assert results[2]["review"] == "gamma ok"
+    assert results[1] == llm_analysis.neutral_result("beta fails")
+
+
+def test_fallback_covers_a_failed_chunk_and_is_not_cached(completions, monkeypatch):
+    def reply(reviews):
+        if any(text.startswith("bad") for text in reviews.values()):
+            raise RuntimeError("connection dropped")
+        return [answer(i, text) for i, text in reviews.items()]
+    calls = completions(reply)
+    chunk_texts = llm_analysis.chunk_texts
+    monkeypatch.setattr(llm_analysis, "chunk_texts", lambda texts: chunk_texts(texts, max_items=2))
+
+    reviews = [{"review": "good one"}, {"review": "good two"}, {"review": "bad three"}, {"review": "good one"}]
+    results = collect(reviews, fallback=lambda text: {"review": text, "sentiment": "FALLBACK"})
+
+    by_index = dict(results)
+    assert len(results) == 4 and sorted(by_index) == [0, 1, 2, 3]
+    assert by_index[2] == {"review": "bad three", "sentiment": "FALLBACK"}
+    assert by_index[0]["sentiment"] == by_index[3]["sentiment"] == "POSITIVE"
+    # The duplicate review is sent once, and fallbacks come last
+    assert sorted(text for call in calls for text in call.values()) == ["bad three", "good one", "good two"]
+    assert results[-1][0] == 2
+
+    # Answered reviews come from the cache next time, the failed one is asked again
+    calls.clear()
+    results = dict(collect(reviews))
+    assert results[3]["sentiment"] == "POSITIVE"
+    assert [list(call.values()) for call in calls] == [["bad three"]]
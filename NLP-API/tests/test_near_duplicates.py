@@ -0,0 +1,46 @@
+from near_duplicates import NearDuplicateDetector
+
+FARM = "This budgeting app changed how I track my spending every single month, five stars from me"
+
+GENUINE = [
+    "Sync between my phone and tablet keeps failing since the last update, please fix it soon",
+    "The dark mode is easy on the eyes and the widgets are really useful for quick notes",
+    "Crashes every time I try to export a report to PDF, which makes it useless for work",
+    "Support answered within a day and refunded the subscription I was charged for twice",
+    "I wish there were more themes, but the core features do exactly what I need daily",
+]
+
+PARAPHRASES = [
+    "The app crashes whenever I open the camera and I lose the photo I was taking",
+    "Every time the camera opens the whole app freezes and then closes, the picture is gone",
+    "Opening the camera inside this app makes it crash, so any photo in progress is lost",
+]
+
+
+def test_planted_farm_is_one_cluster():
+    farm = [
+        FARM,
+        FARM.replace("five stars", "5 stars"),
+        FARM.replace("every single month", "every month"),
+        FARM.lower() + "!",
+    ]
+    texts = GENUINE[:2] + farm[:2] + GENUINE[2:] + farm[2:]
+    clusters = NearDuplicateDetector().find_clusters(texts)
+    assert [sorted(cluster) for cluster in clusters] == [[2, 3, 7, 8]]
+
+
+def test_paraphrases_below_the_threshold_are_not_clustered():
+    assert NearDuplicateDetector().find_clusters(GENUINE + PARAPHRASES) == []
+
+
+def test_short_texts_are_never_compared():
+    short = ["Great app, works very well for me"] * 5
+    assert NearDuplicateDetector().find_clusters(short + GENUINE) == []
+    # The same copies count once they reach min_words
+    assert NearDuplicateDetector(min_words=5).find_clusters(short + GENUINE) == [[0, 1, 2, 3, 4]]
+
+
+def test_clusters_need_min_cluster_size_copies():
+    detector = NearDuplicateDetector(min_cluster_size=3)
+    assert detector.find_clusters([FARM, FARM] + GENUINE) == []
+    assert detector.flag([FARM, FARM, FARM] + GENUINE) == {0, 1, 2}
@@ -0,0 +1,136 @@
+import random
+import re
+from collections import Counter
+
+from phrase_matcher import PhraseMatcher
+
+GROUPS = {
+    "overlapping": ["aa", "aaa", "abab", "!!!", "!"],
+    "phrases": ["works well", "love it", "don't buy", "you won't regret", "#ad"],
+    "cased": ["Outstanding", "outstanding", "For promo only"]
+}
+
+FIXED_TEXTS = [
+    "",
+    "aaaaaaa",
+    "abababab ababab",
+    "!!!!!!! wow!!! ok!",
+    "It works well, works wellworks well and I love it love it.",
+    "Don't buy / don't buy / DON'T BUY, you won't regret you won't regret",
+    "#ad #adventure #AD",
+    "Outstanding! outstanding OUTSTANDING for promo only For promo only",
+]
+
+# Words and phrases the corpus is built from: every listed phrase, fragments
+# that only form one across a join, and plain filler
+VOCABULARY = [
+    "aa", "a", "b", "ab", "!", "!!", "?", "works", "well", "love", "it", "don't", "buy",
+    "you", "won't", "regret", "#", "ad", "Outstanding", "outstanding", "For", "for", "promo", "only",
+    "the", "app", "because", "which", "amazing", "awesome", "best", "wow", "sample", "great product",
+    "highly recommend", "received for free", "sponsored"
+]
+
+
+def corpus(size=500, seed=0):
+    rng = random.Random(seed)
+    texts = list(FIXED_TEXTS)
+    for _ in range(size):
+        words = [rng.choice(VOCABULARY) for _ in range(rng.randint(1, 40))]
+        separator = rng.choice([" ", "", " ", "  ", ", "])
+        texts.append(separator.join(words))
+    return texts
+
+
+def test_counts_follow_str_count():
+    matcher = PhraseMatcher(GROUPS)
+    for text in corpus():
+        found = matcher.scan(text)
+        for name, phrases in GROUPS.items():
+            expected = (sum(text.count(p) for p in phrases), sum(1 for p in phrases if p in text))
+            assert found[name] == expected, (name, text)
+
+
+def test_duplicate_phrases_count_once_per_group():
+    matcher = PhraseMatcher({"one": ["best", "best"], "two": ["best", "est"]})
+    assert matcher.scan("best bestest") == {"one": (2, 1), "two": (5, 2)}
+
+
+def legacy_text_rules(review_text):
+    """Rules 3-7 as written before PhraseMatcher, with str.count and substring tests"""
+    superlatives = ["amazing", "incredible", "perfect", "best", "worst", "awful", "horrible",
+                    "excellent", "outstanding", "exceptional", "terrible", "superb", "awesome",
+                    "greatest", "finest", "magnificent", "dreadful", "appalling"]
+    superlative_count = sum(review_text.count(word) for word in superlatives)
+    word_count = len(review_text.split())
+    if word_count > 0 and superlative_count > 2 and (superlative_count / word_count) > 0.12:
+        return True, "Excessive superlatives"
+
+    words = review_text.lower().split()
+    word_counts = Counter(words)
+    bigram_counts = Counter(" ".join(words[i:i + 2]) for i in range(len(words) - 1))
+    if any(count > 3 for word, count in word_counts.items() if len(word) > 3):
+        return True, "Word repetition"
+    if any(count > 2 for count in bigram_counts.values()):
+        return True, "Phrase repetition"
+
+    generic_phrases = ["great product", "highly recommend", "works well", "very good", "very bad",
+                       "love it", "awesome product", "best ever", "worst ever", "changed my life",
+                       "must buy", "waste of money", "don't buy", "changed everything",
+                       "you won't regret", "best purchase", "worst purchase"]
+    if any(phrase in review_text for phrase in generic_phrases) and word_count < 15:
+        return True, "Generic language"
+
+    if (review_text.upper() == review_text and len(review_text) > 15) or \
+       (review_text.count('!') > 3 or review_text.count('?') > 3 or review_text.count('!!!') > 0):
+        return True, "Unnatural formatting"
+
+    promo_indicators = ["sponsored", "received for free", "in exchange for", "for my honest review",
+                        "was provided", "company sent", "promotional", "ambassador", "received complimentary",
+                        "received product", "sample", "hashtag", "#ad", "#sponsored", "#partner", "influencer",
+                        "promo", "for promotional purposes", "for promo only"]
+    if any(indicator in review_text for indicator in promo_indicators):
+        return True, "Promotional content"
+    return None
+
+
+def legacy_pattern_rules(review_text, user):
+    """Rules 9-10 as written before PhraseMatcher; "Outstanding" lowercased as in the matcher"""
+    extreme_positive_words = ["amazing", "awesome", "fantastic", "incredible", "excellent", "wonderful", "wow",
+                              "exceptional", "outstanding"]
+    positive_count = sum(review_text.count(word) for word in extreme_positive_words)
+    if positive_count >= 2 and len(review_text.split()) < 20 \
+            and "because" not in review_text and "which" not in review_text:
+        return True, "Vague positive language"
+    if user and re.compile(r'^[a-z]+[0-9]{2,}$').match(str(user).lower()):
+        return True, "Suspicious username pattern"
+    return None
+
+
+def legacy_is_fake_review(api, review_text, user):
+    review_text = str(review_text).lower() if review_text else ""
+    if len(review_text.strip()) < 5 or len(review_text.split()) < 3:
+        return True, "Too short"
+    verdict = legacy_text_rules(review_text)
+    # Rule 8 (spaCy) didn't change, so it is shared with the current code
+    if verdict is None and api.nlp and review_text.strip():
+        doc = api.parse_review(review_text)
+        if doc is not None:
+            verdict = api.check_structure_rules(doc)
+    if verdict is None:
+        verdict = legacy_pattern_rules(review_text, user)
+    return verdict if verdict is not None else (False, None)
+
+
+def test_is_fake_review_verdicts_match_the_legacy_rules(api):
+    rng = random.Random(1)
+    users = ["anonymous", "user123", "Jane Doe", "john2020", None]
+    texts = corpus(300, seed=2) + [
+        "Amazing app, awesome design and wow what a team",
+        "Amazing and awesome because the sync works",
+        "THIS APP IS THE BEST ONE I HAVE",
+        "Best best best best app, best ever",
+        "Got it as a sample in exchange for my honest review",
+    ]
+    for text in texts:
+        user = rng.choice(users)
+        assert api.is_fake_review(text, user=user) == legacy_is_fake_review(api, text, user), (text, user)
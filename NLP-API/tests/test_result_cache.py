@@ -0,0 +1,77 @@
+import sqlite3
+
+import result_cache
+from result_cache import ResultCache
+
+
+def disk_keys(path):
+    with sqlite3.connect(path) as db:
+        return {row[0] for row in db.execute("SELECT key FROM results")}
+
+
+def age_rows(path, seconds, keys=None):
+    """Move the storage time of the given rows (all when None) seconds into the past"""
+    with sqlite3.connect(path) as db:
+        if keys is None:
+            db.execute("UPDATE results SET stored_at = stored_at - ?", (seconds,))
+        else:
+            db.executemany("UPDATE results SET stored_at = stored_at - ? WHERE key = ?", [(seconds, k) for k in keys])
+
+
+def test_memory_tier_evicts_least_recently_used():
+    cache = ResultCache("model", max_items=3)
+    cache.put_many({"a": 1, "b": 2, "c": 3})
+    assert cache.get("a") == 1  # now the most recently used
+    cache.put("d", 4)
+
+    assert cache.get("b") is None
+    assert cache.get_many(["a", "c", "d"]) == {"a": 1, "c": 3, "d": 4}
+    assert cache.stats()["memory_items"] == 3
+
+
+def test_disk_rows_expire_after_ttl(tmp_path):
+    path = str(tmp_path / "cache.db")
+    reader = ResultCache("model", path=path, ttl=3600)
+    writer = ResultCache("model", path=path, ttl=3600)
+    writer.put_many({"old": 1, "new": 2})
+    age_rows(path, 7200, ["old"])
+
+    # The reader has neither in memory, so both come from disk
+    assert reader.get_many(["old", "new"]) == {"new": 2}
+
+    ResultCache("model", path=path, ttl=3600)
+    assert disk_keys(path) == {"new"}
+
+
+def test_disk_tier_keeps_the_newest_max_disk_items_rows(tmp_path, monkeypatch):
+    path = str(tmp_path / "cache.db")
+    cache = ResultCache("model", path=path, max_disk_items=5, ttl=None)
+    keys = [f"k{i}" for i in range(8)]
+    cache.put_many({key: i for i, key in enumerate(keys)})
+    for age, key in enumerate(reversed(keys)):
+        age_rows(path, age, [key])
+
+    # Pruned when a process opens the file...
+    ResultCache("model", path=path, max_disk_items=5, ttl=None)
+    assert disk_keys(path) == set(keys[3:])
+
+    # ...and every _EVICT_EVERY rows it writes
+    monkeypatch.setattr(result_cache, "_EVICT_EVERY", 2)
+    cache.put_many({"x": 0, "y": 0})
+    assert len(disk_keys(path)) == 5
+    assert {"x", "y"} <= disk_keys(path)
+
+
+def test_invalidate_reaches_the_memory_of_other_workers(tmp_path):
+    path = str(tmp_path / "cache.db")
+    first = ResultCache("model", path=path)
+    second = ResultCache("model", path=path)
+    first.put("key", "stale")
+    assert second.get("key") == "stale"  # now in the second worker's memory too
+
+    first.invalidate("model")
+    assert second.get("key") is None
+    assert second.stats()["generation"] == first.stats()["generation"]
+
+    second.put("key", "fresh")
+    assert first.get("key") == "fresh"
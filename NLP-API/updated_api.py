@@ -1,124 +1,645 @@
-from flask import Flask, request, jsonify
-from transformers import pipeline
+from flask import Flask, request, jsonify, Response, stream_with_context
 from keybert import KeyBERT
+from sklearn.feature_extraction.text import CountVectorizer
 import re
 from collections import Counter
 import spacy
 import numpy as np
+import os
+import time
+import multiprocessing
 from datetime import datetime
+from result_cache import ResultCache
+from review_store import ReviewStore
+from embedding_store import EmbeddingStore
+from phrase_matcher import PhraseMatcher
+from near_duplicates import NearDuplicateDetector
+from corpus_keywords import KeywordRanker
+from complaint_topics import TopicClusterer
+from jobs import JobManager, InMemoryJobBackend, KeyValueJobBackend, JobQueueFull
+from sentiment_backends import load_sentiment_pipeline
+from inference_batcher import InferenceBatcher
+from wire_format import negotiated_response, request_payload, dumps
+from review_pool import ReviewPool
+from metrics import (
+    StageTimer, record_error, render_metrics, REQUEST_SECONDS, REVIEWS_PROCESSED, FAKE_REVIEWS, MODEL_BATCH_SIZE,
+    CHUNKED_REVIEWS
+)
+from model_store import KEYWORD_DIR, SPACY_DIR, load_manifest, require_local_model
 
 app = Flask(__name__)
 
-# Load required models
-sentiment_pipeline = pipeline("sentiment-analysis")
-kw_model = KeyBERT()
+# Sentiment inference backend: torch, torch-int8, onnx or onnx-int8
+SENTIMENT_BACKEND = os.getenv("SENTIMENT_BACKEND", "torch")
+
+# Number of texts sent through the sentiment model per forward pass
+SENTIMENT_BATCH_SIZE = int(os.getenv("SENTIMENT_BATCH_SIZE", "32"))
+
+# Reviews over the sentiment model's token limit are scored as overlapping
+# windows of that limit, each sharing this many tokens with the previous one
+SENTIMENT_WINDOW_OVERLAP = int(os.getenv("SENTIMENT_WINDOW_OVERLAP", "128"))
+
+# Cross-request micro-batching: inputs from concurrent requests are merged into
+# forward passes of up to INFERENCE_MAX_BATCH_SIZE texts, waiting at most
+# INFERENCE_MAX_WAIT_MS for a batch to fill (0 runs whatever is queued right away)
+INFERENCE_MAX_BATCH_SIZE = int(os.getenv("INFERENCE_MAX_BATCH_SIZE", str(SENTIMENT_BATCH_SIZE)))
+INFERENCE_MAX_WAIT_MS = float(os.getenv("INFERENCE_MAX_WAIT_MS", "10"))
+
+# Result cache: in-memory LRU size and optional SQLite file for persistence, whose
+# rows expire after RESULT_CACHE_TTL_DAYS and are capped at RESULT_CACHE_DISK_ITEMS
+RESULT_CACHE_SIZE = int(os.getenv("RESULT_CACHE_SIZE", "50000"))
+RESULT_CACHE_PATH = os.getenv("RESULT_CACHE_PATH")
+RESULT_CACHE_DISK_ITEMS = int(os.getenv("RESULT_CACHE_DISK_ITEMS", "1000000"))
+RESULT_CACHE_TTL_DAYS = float(os.getenv("RESULT_CACHE_TTL_DAYS", "30"))
+
+# SQLite file of analyzed reviews per app; when set, /analyze only analyzes
+# reviews it hasn't seen for that app and reports running totals. Each app keeps
+# the frequencies of its REVIEW_STORE_MAX_KEYWORDS most frequent keywords, and a
+# response lists the top REVIEW_STORE_SUMMARY_KEYWORDS of them
+REVIEW_STORE_PATH = os.getenv("REVIEW_STORE_PATH")
+REVIEW_STORE_MAX_KEYWORDS = int(os.getenv("REVIEW_STORE_MAX_KEYWORDS", "1000"))
+REVIEW_STORE_SUMMARY_KEYWORDS = int(os.getenv("REVIEW_STORE_SUMMARY_KEYWORDS", "50"))
+
+# Directory of the embedding store (embedding_store.py): the keyword model's
+# review and candidate-word embeddings are kept there as float16 and reused by
+# later requests, restarts and other processes instead of being recomputed.
+# Entries older than EMBEDDING_STORE_MAX_AGE_DAYS, and the oldest past
+# EMBEDDING_STORE_MAX_ITEMS, are evicted when the store compacts itself.
+EMBEDDING_STORE_PATH = os.getenv("EMBEDDING_STORE_PATH")
+EMBEDDING_STORE_MAX_ITEMS = int(os.getenv("EMBEDDING_STORE_MAX_ITEMS", "1000000"))
+EMBEDDING_STORE_MAX_AGE_DAYS = float(os.getenv("EMBEDDING_STORE_MAX_AGE_DAYS", "30"))
+
+# Bump when the fake-review rules change so cached verdicts are not reused
+HEURISTICS_VERSION = "2"
+
+# Run a dummy batch through every model at import so the first request isn't
+# the one paying for lazy initialization. gunicorn.conf.py turns this off and
+# warms each worker after fork instead.
+WARMUP_ON_LOAD = os.getenv("WARMUP_ON_LOAD", "1") == "1"
+
+# Responses smaller than this are sent uncompressed even when the client accepts gzip or zstd
+COMPRESS_MIN_BYTES = int(os.getenv("COMPRESS_MIN_BYTES", "1024"))
+
+# Reviews analyzed per chunk by /analyze/stream before their results are sent
+STREAM_CHUNK_SIZE = int(os.getenv("STREAM_CHUNK_SIZE", "64"))
+
+# Background analysis jobs: worker threads, unfinished jobs allowed, reviews per progress step
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+JOB_QUEUE_LIMIT = int(os.getenv("JOB_QUEUE_LIMIT", "32"))
+JOB_CHUNK_SIZE = int(os.getenv("JOB_CHUNK_SIZE", "128"))
+# Keep job records in Redis instead of process memory when set
+JOB_REDIS_URL = os.getenv("JOB_REDIS_URL")
+# Seconds a job record is kept after its last update, so finished results don't pile up
+JOB_RETENTION_SECONDS = int(os.getenv("JOB_RETENTION_SECONDS", "3600"))
+
+# spaCy worker processes and docs per batch for the grammar checks
+SPACY_N_PROCESS = int(os.getenv("SPACY_N_PROCESS", "1"))
+SPACY_BATCH_SIZE = int(os.getenv("SPACY_BATCH_SIZE", "64"))
+
+# Batch-level detection of reviews posted many times with small edits (review
+# farms): minimum estimated Jaccard similarity of their character shingles,
+# minimum number of copies in a request before they are flagged, and minimum
+# words for a review to be compared at all, as short stock phrases ("Great app,
+# works very well") recur among genuine reviews. Off by default, since it
+# flags every copy, the first one included.
+NEAR_DUPLICATE_DETECTION = os.getenv("NEAR_DUPLICATE_DETECTION", "0") == "1"
+NEAR_DUPLICATE_THRESHOLD = float(os.getenv("NEAR_DUPLICATE_THRESHOLD", "0.7"))
+NEAR_DUPLICATE_MIN_CLUSTER = int(os.getenv("NEAR_DUPLICATE_MIN_CLUSTER", "3"))
+NEAR_DUPLICATE_MIN_WORDS = int(os.getenv("NEAR_DUPLICATE_MIN_WORDS", "12"))
+NEAR_DUPLICATE_REASON = "Near-duplicate review"
+
+# Keywords from KeyBERT per review ("keybert"), or ranked over the genuine reviews
+# of the whole request with class-based TF-IDF per sentiment ("corpus", see
+# corpus_keywords.py). A request can set "keyword_mode" to override. Corpus mode
+# reports CORPUS_KEYWORDS_TOP_N keywords per sentiment, of up to
+# CORPUS_KEYWORDS_MAX_NGRAM words, found in at least CORPUS_KEYWORDS_MIN_DF reviews.
+KEYWORD_MODE = os.getenv("KEYWORD_MODE", "keybert")
+KEYWORD_MODES = ("keybert", "corpus")
+CORPUS_KEYWORDS_TOP_N = int(os.getenv("CORPUS_KEYWORDS_TOP_N", "10"))
+CORPUS_KEYWORDS_MIN_DF = int(os.getenv("CORPUS_KEYWORDS_MIN_DF", "2"))
+CORPUS_KEYWORDS_MAX_NGRAM = int(os.getenv("CORPUS_KEYWORDS_MAX_NGRAM", "2"))
+
+# Complaint topics: the genuine negative and neutral reviews of a request are
+# clustered by embedding with mini-batch k-means into up to COMPLAINT_TOPICS_CLUSTERS
+# topics (complaint_topics.py), each labeled with its c-TF-IDF terms, and the top
+# COMPLAINT_TOPICS_SUGGESTIONS topics drive the issue suggestions instead of fixed
+# keywords. Topics need at least COMPLAINT_TOPICS_MIN_REVIEWS reviews. Off by
+# default, as the reviews are embedded once more unless EMBEDDING_STORE_PATH
+# already holds them; a request can set "complaint_topics" to override.
+COMPLAINT_TOPICS = os.getenv("COMPLAINT_TOPICS", "0") == "1"
+COMPLAINT_TOPICS_CLUSTERS = int(os.getenv("COMPLAINT_TOPICS_CLUSTERS", "10"))
+COMPLAINT_TOPICS_MIN_REVIEWS = int(os.getenv("COMPLAINT_TOPICS_MIN_REVIEWS", "3"))
+COMPLAINT_TOPICS_SUGGESTIONS = int(os.getenv("COMPLAINT_TOPICS_SUGGESTIONS", "3"))
+
+# Hybrid engine: the local model scores every review and only the ones it is
+# unsure about are re-scored by the Groq LLM (llm_analysis.py): a top-label score
+# within [HYBRID_UNCERTAIN_LOW, HYBRID_UNCERTAIN_HIGH], or a rating-sentiment
+# mismatch. Off by default; a request can set "hybrid" to override.
+HYBRID_ESCALATION = os.getenv("HYBRID_ESCALATION", "0") == "1"
+HYBRID_UNCERTAIN_LOW = float(os.getenv("HYBRID_UNCERTAIN_LOW", "0.5"))
+HYBRID_UNCERTAIN_HIGH = float(os.getenv("HYBRID_UNCERTAIN_HIGH", "0.7"))
+HYBRID_LLM_MODEL = os.getenv("HYBRID_LLM_MODEL", "llama-3.1-8b-instant")
+
+# Multi-core analysis: requests of at least REVIEW_POOL_MIN_REVIEWS reviews are
+# split into one shard per worker process (review_pool.py), each holding its own
+# copy of the models; 0 workers analyzes in the request thread. Torch threads per
+# worker default to this process's threads divided between the workers.
+REVIEW_POOL_WORKERS = int(os.getenv("REVIEW_POOL_WORKERS", "0"))
+REVIEW_POOL_MIN_REVIEWS = int(os.getenv("REVIEW_POOL_MIN_REVIEWS", "256"))
+REVIEW_POOL_TORCH_THREADS = int(os.getenv("REVIEW_POOL_TORCH_THREADS", "0"))
+
+# Marks a precomputed result that was not supplied by the caller
+_UNSET = object()
+
+# Word and phrase lists used by the fake-review rules, matched against lowercased text
+SUPERLATIVES = ["amazing", "incredible", "perfect", "best", "worst", "awful", "horrible", 
+                "excellent", "outstanding", "exceptional", "terrible", "superb", "awesome",
+                "greatest", "finest", "magnificent", "dreadful", "appalling"]
+
+GENERIC_PHRASES = ["great product", "highly recommend", "works well", "very good", "very bad",
+                   "love it", "awesome product", "best ever", "worst ever", "changed my life",
+                   "must buy", "waste of money", "don't buy", "changed everything",
+                   "you won't regret", "best purchase", "worst purchase"]
+
+PROMO_INDICATORS = ["sponsored", "received for free", "in exchange for", "for my honest review", 
+                    "was provided", "company sent", "promotional", "ambassador", "received complimentary",
+                    "received product", "sample", "hashtag", "#ad", "#sponsored", "#partner", "influencer", "promo",
+                    "for promotional purposes", "for promo only"]
+
+EXTREME_POSITIVE_WORDS = ["amazing", "awesome", "fantastic", "incredible", "excellent", "wonderful", "wow",
+                          "exceptional", "outstanding"]
+
+# Every list above plus the punctuation and connective checks, compiled once so
+# each review is scanned a single time
+rule_matcher = PhraseMatcher({
+    "superlatives": SUPERLATIVES,
+    "generic": GENERIC_PHRASES,
+    "promo": PROMO_INDICATORS,
+    "extreme_positive": EXTREME_POSITIVE_WORDS,
+    "exclamation": ["!"],
+    "question": ["?"],
+    "triple_exclamation": ["!!!"],
+    "specifics": ["because", "which"]
+})
+
+# Usernames like "user123" or "john2020"
+RANDOM_USERNAME_PATTERN = re.compile(r'^[a-z]+[0-9]{2,}$')
+
+duplicate_detector = NearDuplicateDetector(
+    threshold=NEAR_DUPLICATE_THRESHOLD, min_cluster_size=NEAR_DUPLICATE_MIN_CLUSTER,
+    min_words=NEAR_DUPLICATE_MIN_WORDS
+)
+keyword_ranker = KeywordRanker(
+    ngram_range=(1, CORPUS_KEYWORDS_MAX_NGRAM), min_df=CORPUS_KEYWORDS_MIN_DF, top_n=CORPUS_KEYWORDS_TOP_N
+)
+topic_clusterer = TopicClusterer(clusters=COMPLAINT_TOPICS_CLUSTERS, min_reviews=COMPLAINT_TOPICS_MIN_REVIEWS)
+
+# Load required models, only from the directory filled by model_download_and_cache.py
+# Seconds spent loading and warming up each model, reported by /ready
+startup_timings = {}
+
+start = time.perf_counter()
+sentiment_pipeline = load_sentiment_pipeline(SENTIMENT_BACKEND)
+startup_timings["sentiment_load"] = time.perf_counter() - start
+# Longest input the sentiment model takes, special tokens included
+sentiment_max_tokens = min(
+    sentiment_pipeline.tokenizer.model_max_length,
+    getattr(sentiment_pipeline.model.config, "max_position_embeddings", 512)
+)
+
+start = time.perf_counter()
+kw_model = KeyBERT(model=require_local_model(KEYWORD_DIR, "KeyBERT"))
+startup_timings["keybert_load"] = time.perf_counter() - start
+
+start = time.perf_counter()
 try:
-    nlp = spacy.load("en_core_web_sm")
-except:
+    # Rule 8 only needs sentence boundaries and coarse POS tags
+    nlp = spacy.load(require_local_model(SPACY_DIR, "spaCy"), exclude=["ner", "lemmatizer"])
+except Exception as e:
     # Fallback if the model isn't available
+    print(f"Error loading spaCy model: {str(e)}")
+    record_error("spacy_load")
     nlp = None
+startup_timings["spacy_load"] = time.perf_counter() - start
+
+# Revisions recorded by the prefetch step
+model_manifest = load_manifest()
+
+def model_revision(name):
+    """Model and revision of one prefetched model, from the manifest"""
+    entry = model_manifest.get(name, {})
+    return f"{entry.get('model', 'unknown')}@{entry.get('revision', 'unknown')}"
+
+def model_identity():
+    """Describe the loaded models, used to keep cached results tied to them"""
+    spacy_id = f"{nlp.meta['lang']}_{nlp.meta['name']}-{nlp.meta['version']}" if nlp else "none"
+    return "|".join([
+        model_revision("sentiment"),
+        f"sentiment-{SENTIMENT_BACKEND}",
+        model_revision("keywords"),
+        spacy_id,
+        f"heuristics-{HEURISTICS_VERSION}"
+    ])
+
+def warmup_models():
+    """Push a small dummy batch through every model once.
+
+    The first call into each model pays for lazy setup (thread pools, kernel
+    selection, tokenizer caches); doing it here keeps that off the first real
+    request. /ready reports 503 until this has finished.
+    """
+    samples = [
+        "Warmup review, the app works well and loads quickly.",
+        "Warmup review, it keeps crashing after the last update."
+    ]
+
+    start = time.perf_counter()
+    sentiment_pipeline(samples, batch_size=len(samples))
+    startup_timings["sentiment_warmup"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    kw_model.extract_keywords(samples, top_n=5, stop_words='english')
+    startup_timings["keybert_warmup"] = time.perf_counter() - start
+
+    if nlp is not None:
+        start = time.perf_counter()
+        list(nlp.pipe(samples))
+        startup_timings["spacy_warmup"] = time.perf_counter() - start
+
+    if review_pool is not None:
+        start = time.perf_counter()
+        review_pool.start()
+        startup_timings["review_pool_start"] = time.perf_counter() - start
+
+    startup_timings["warmed_up_at"] = time.time()
+    print("Startup timings: " + ", ".join(
+        f"{name} {seconds:.2f}s" for name, seconds in startup_timings.items() if name != "warmed_up_at"
+    ))
+
+result_cache = ResultCache(
+    model_identity(), max_items=RESULT_CACHE_SIZE, path=RESULT_CACHE_PATH,
+    max_disk_items=RESULT_CACHE_DISK_ITEMS, ttl=RESULT_CACHE_TTL_DAYS * 24 * 3600
+)
+review_store = ReviewStore(
+    REVIEW_STORE_PATH, model_identity(), max_keywords=REVIEW_STORE_MAX_KEYWORDS
+) if REVIEW_STORE_PATH else None
+embedding_store = EmbeddingStore(
+    EMBEDDING_STORE_PATH, model_revision("keywords"), kw_model.model.embedding_model.get_sentence_embedding_dimension(),
+    max_items=EMBEDDING_STORE_MAX_ITEMS, max_age=EMBEDDING_STORE_MAX_AGE_DAYS * 24 * 3600
+) if EMBEDDING_STORE_PATH else None
+
+# Schedulers in front of the sentiment and keyword models, shared by all request
+# threads. The batch functions are defined further down, hence the lambdas.
+sentiment_batcher = InferenceBatcher(
+    lambda texts: run_sentiment_batch(texts),
+    max_batch_size=INFERENCE_MAX_BATCH_SIZE, max_wait=INFERENCE_MAX_WAIT_MS / 1000, name="sentiment"
+)
+keyword_batcher = InferenceBatcher(
+    lambda texts: run_keyword_batch(texts),
+    max_batch_size=INFERENCE_MAX_BATCH_SIZE, max_wait=INFERENCE_MAX_WAIT_MS / 1000, name="keywords"
+)
+
+def batcher_stats():
+    return {"sentiment": sentiment_batcher.stats(), "keywords": keyword_batcher.stats()}
+
+# Pool workers import this module too; only the serving process gets a pool
+review_pool = (
+    ReviewPool(REVIEW_POOL_WORKERS, REVIEW_POOL_TORCH_THREADS or None)
+    if REVIEW_POOL_WORKERS > 0 and multiprocessing.current_process().name == "MainProcess" else None
+)
+
+if WARMUP_ON_LOAD:
+    warmup_models()
+
+def is_too_short(review_text):
+    """Rule 1 of is_fake_review, shared so batch callers can skip scoring these reviews"""
+    review_text = str(review_text).lower() if review_text else ""
+    return len(review_text.strip()) < 5 or len(review_text.split()) < 3
+
+def run_sentiment_batch(texts):
+    """One forward pass over texts, results in order with None for texts the model failed on"""
+    MODEL_BATCH_SIZE.labels("sentiment").observe(len(texts))
+    try:
+        return sentiment_pipeline(texts, batch_size=INFERENCE_MAX_BATCH_SIZE)
+    except Exception as e:
+        # One bad text fails the whole forward pass, so retry the batch one by one
+        print(f"Error in batched sentiment pass, scoring individually: {str(e)}")
+        record_error("sentiment_batch")
+        results = []
+        for text in texts:
+            try:
+                results.append(sentiment_pipeline(text)[0])
+            except Exception as e:
+                print(f"Error in sentiment analysis: {str(e)}")
+                record_error("sentiment")
+                results.append(None)
+        return results
+
+def token_lengths(texts):
+    """Sentiment-model token count of each text, special tokens included"""
+    if not texts:
+        return []
+    return sentiment_pipeline.tokenizer(list(texts), return_length=True, verbose=False)["length"]
+
+def score_long_text(text):
+    """Sentiment of a text longer than the model's token limit.
+
+    The text is cut into windows of sentiment_max_tokens tokens overlapping by
+    SENTIMENT_WINDOW_OVERLAP, all windows are scored in one batch, and each
+    label's probability is averaged over the windows weighted by their length.
+    Returns a result shaped like the pipeline's, or None if the model failed.
+    """
+    CHUNKED_REVIEWS.inc()
+    tokenizer = sentiment_pipeline.tokenizer
+    try:
+        encoded = tokenizer(
+            text, truncation=True, max_length=sentiment_max_tokens,
+            stride=min(SENTIMENT_WINDOW_OVERLAP, sentiment_max_tokens // 2), return_overflowing_tokens=True
+        )["input_ids"]
+        windows = [tokenizer.decode(ids, skip_special_tokens=True) for ids in encoded]
+        MODEL_BATCH_SIZE.labels("sentiment").observe(len(windows))
+        # Decoding and re-tokenizing can add a token or two, so truncate to be safe
+        scores = sentiment_pipeline(windows, top_k=None, truncation=True, batch_size=INFERENCE_MAX_BATCH_SIZE)
+    except Exception as e:
+        print(f"Error in windowed sentiment analysis: {str(e)}")
+        record_error("sentiment")
+        return None
+
+    weights = [len(ids) for ids in encoded]
+    totals = Counter()
+    for window_scores, weight in zip(scores, weights):
+        for entry in window_scores:
+            totals[entry["label"]] += entry["score"] * weight
+    label, total = totals.most_common(1)[0]
+    return {"label": label, "score": total / sum(weights)}
+
+def run_sentiment(texts, batch_size=SENTIMENT_BATCH_SIZE):
+    """Sentiment of each text, in order, with None where the model failed.
+
+    Texts are batched in order of token length, so each forward pass pads its
+    inputs to a length close to their own instead of to the longest review in
+    an arbitrary batch. Texts over the model's token limit are scored in
+    windows by score_long_text() rather than failing the batch.
+    """
+    lengths = token_lengths(texts)
+    results = [None] * len(texts)
+    fitting = sorted(
+        (index for index, length in enumerate(lengths) if length <= sentiment_max_tokens), key=lengths.__getitem__
+    )
+    for start in range(0, len(fitting), batch_size):
+        batch = fitting[start:start + batch_size]
+        for index, result in zip(batch, sentiment_batcher.run([texts[index] for index in batch])):
+            results[index] = result
+
+    for index, length in enumerate(lengths):
+        if length > sentiment_max_tokens:
+            results[index] = score_long_text(texts[index])
+    return results
+
+def score_sentiments(texts, batch_size=SENTIMENT_BATCH_SIZE):
+    """Run the sentiment model once per unique text, in batches.
+
+    Returns a dict mapping each text to its pipeline result, or to None when the
+    model failed on that text. Texts already in the result cache skip the model
+    entirely; the rest go through run_sentiment(), whose batches may share a
+    forward pass with other requests.
+    """
+    unique_texts = list(dict.fromkeys(texts))
+    keys = {text: result_cache.make_key("sentiment", text) for text in unique_texts}
+    cached = result_cache.get_many(list(keys.values()))
+    results = {text: cached[key] for text, key in keys.items() if key in cached}
+    pending = [text for text in unique_texts if text not in results]
+    results.update(zip(pending, run_sentiment(pending, batch_size)))
+
+    # Failures are not cached so they get retried on the next request
+    result_cache.put_many({
+        keys[text]: {"label": results[text]["label"], "score": results[text]["score"]}
+        for text in pending if results[text] is not None
+    })
+    return results
+
+def extract_keywords(review_text):
+    """Extract the top KeyBERT keywords of a review"""
+    keywords = kw_model.extract_keywords(review_text, top_n=5, stop_words='english')
+    return [kw[0] for kw in keywords]
+
+def embed_texts(texts):
+    """Keyword-model embeddings of texts as a float32 matrix, reusing and filling the embedding store.
+
+    Vectors computed here are rounded to the store's float16 as well, so a
+    text gets the same keywords whether or not its embedding was stored.
+    """
+    keys = [EmbeddingStore.fingerprint(text) for text in texts]
+    found = embedding_store.get_many(keys)
+    pending = {}
+    for key, text in zip(keys, texts):
+        if key not in found and key not in pending:
+            pending[key] = text
+    if pending:
+        vectors = kw_model.model.embed(list(pending.values())).astype(np.float16).astype(np.float32)
+        computed = dict(zip(pending, vectors))
+        embedding_store.put_many(computed)
+        found.update(computed)
+    if not keys:
+        return np.empty((0, embedding_store.dim), dtype=np.float32)
+    return np.stack([found[key] for key in keys])
+
+def keybert_embeddings(texts):
+    """doc_embeddings and word_embeddings arguments of kw_model.extract_keywords, through the embedding store.
+
+    The candidate words come from a CountVectorizer with KeyBERT's own
+    settings, so the word embeddings line up with the vocabulary it builds.
+    """
+    embeddings = {"doc_embeddings": embed_texts(texts)}
+    try:
+        words = CountVectorizer(stop_words='english').fit(texts).get_feature_names_out()
+    except ValueError:
+        # No candidates; KeyBERT finds none either and returns no keywords
+        return embeddings
+    embeddings["word_embeddings"] = embed_texts(list(words))
+    return embeddings
+
+def extract_keywords_batch(texts):
+    """Extract the top KeyBERT keywords for many reviews in one pass.
+
+    Passing the documents as a list makes KeyBERT fit one shared vectorizer,
+    embed all documents in a single call and embed each candidate word once for
+    the whole batch. Candidates are still restricted to the words of each
+    document, so the per-review keywords match extract_keywords.
+    """
+    if not texts:
+        return []
+
+    embeddings = {}
+    if embedding_store is not None:
+        try:
+            embeddings = keybert_embeddings(list(texts))
+        except Exception as e:
+            print(f"Error in the embedding store, embedding directly: {str(e)}")
+            record_error("embedding_store")
+    keywords = kw_model.extract_keywords(list(texts), top_n=5, stop_words='english', **embeddings)
+
+    # KeyBERT flattens single-document results and returns a bare [] when no
+    # document has any usable candidate
+    if len(texts) == 1:
+        keywords = [keywords]
+    elif not keywords:
+        keywords = [[] for _ in texts]
+    return [[kw[0] for kw in doc_keywords] for doc_keywords in keywords]
 
-def is_fake_review(review_text, rating=None, timestamp=None, user=None):
+def is_fake_review(review_text, rating=None, timestamp=None, user=None, sentiment_result=_UNSET, doc=_UNSET):
+    """Apply the fake-review heuristics to a single review.
+
+    sentiment_result can carry a precomputed pipeline result for the review (None
+    if scoring failed) so the rating mismatch check doesn't run the model again,
+    and doc a precomputed spaCy doc of the lowercased text (None if parsing failed).
+    """
     # Convert to string and lowercase for consistent processing
     review_text = str(review_text).lower() if review_text else ""
-    
+
+    counts = None if is_too_short(review_text) else rule_matcher.scan(review_text)
+
+    verdict = check_text_rules(review_text, rating, sentiment_result, counts)
+    if verdict is None and nlp and len(review_text.strip()) > 0:
+        if doc is _UNSET:
+            doc = parse_review(review_text)
+        if doc is not None:
+            verdict = check_structure_rules(doc)
+    if verdict is None:
+        verdict = check_pattern_rules(review_text, user, counts)
+
+    return verdict if verdict is not None else (False, None)
+
+def check_text_rules(review_text, rating=None, sentiment_result=_UNSET, counts=None):
+    """Rules 1-7 of is_fake_review on the lowercased text, returns a verdict or None.
+
+    counts can carry the rule_matcher.scan result for the text if the caller
+    already has it.
+    """
     # 1. Check for very short or empty reviews
-    if len(review_text.strip()) < 5 or len(review_text.split()) < 3:
+    if is_too_short(review_text):
         return True, "Too short"
     
     # 2. Check rating-sentiment mismatch (if rating is provided)
     if rating is not None:
         try:
             rating = float(rating)
-            sentiment_result = sentiment_pipeline(review_text)[0]
-            sentiment_score = sentiment_result['score']
-            sentiment_label = sentiment_result['label']
-            
-            # Mismatch detection: High rating with negative sentiment or vice versa
-            # More aggressive threshold for detection
-            if (rating >= 4 and sentiment_label == "NEGATIVE" and sentiment_score > 0.6) or \
-               (rating <= 2 and sentiment_label == "POSITIVE" and sentiment_score > 0.6):
+            if sentiment_result is _UNSET:
+                sentiment_result = sentiment_pipeline(review_text)[0]
+            if sentiment_result is None:
+                raise ValueError("sentiment scoring failed for this review")
+            if is_rating_mismatch(rating, sentiment_result):
                 return True, "Rating-sentiment mismatch"
         except Exception as e:
             # Print exception for debugging
             print(f"Error in rating-sentiment check: {str(e)}")
+            record_error("rating_mismatch")
+
+    if counts is None:
+        counts = rule_matcher.scan(review_text)
     
     # 3. Check for excessive use of superlatives and extreme language
-    superlatives = ["amazing", "incredible", "perfect", "best", "worst", "awful", "horrible", 
-                   "excellent", "outstanding", "exceptional", "terrible", "superb", "awesome",
-                   "greatest", "finest", "magnificent", "dreadful", "appalling"]
-    superlative_count = sum(review_text.count(word) for word in superlatives)
-    word_count = len(review_text.split())
+    superlative_count = counts["superlatives"][0]
+    words = review_text.split()
+    word_count = len(words)
     if word_count > 0 and superlative_count > 2 and (superlative_count / word_count) > 0.12:
         return True, "Excessive superlatives"
     
     # 4. Check for repeated words or phrases (common in bot reviews)
-    words = review_text.lower().split()
     word_counts = Counter(words)
     
-    # Get bigrams (word pairs) to detect phrase repetition
-    bigrams = [" ".join(words[i:i+2]) for i in range(len(words)-1)]
-    bigram_counts = Counter(bigrams)
-    
-    if any(count > 3 for word, count in word_counts.items() if len(word) > 3):
+    if any(len(word) > 3 for word, count in word_counts.items() if count > 3):
         return True, "Word repetition"
         
-    if any(count > 2 for bigram, count in bigram_counts.items()):
-        return True, "Phrase repetition"
+    # A word pair can't repeat more often than its first word, so bigrams
+    # (word pairs) only need counting when some word occurs 3+ times
+    if word_counts and max(word_counts.values()) > 2:
+        bigram_counts = Counter(zip(words, words[1:]))
+        if any(count > 2 for bigram, count in bigram_counts.items()):
+            return True, "Phrase repetition"
     
     # 5. Check for overly generic language without specifics - lower threshold
-    generic_phrases = ["great product", "highly recommend", "works well", "very good", "very bad",
-                      "love it", "awesome product", "best ever", "worst ever", "changed my life",
-                      "must buy", "waste of money", "don't buy", "changed everything",
-                      "you won't regret", "best purchase", "worst purchase"]
-    
-    generic_phrase_count = sum(1 for phrase in generic_phrases if phrase in review_text)
+    generic_phrase_count = counts["generic"][1]
     if generic_phrase_count > 0 and word_count < 15:  # Short review with generic phrases
         return True, "Generic language"
     
     # 6. Check for unnatural patterns (all caps, excessive punctuation)
     orig_review = str(review_text)
     if (orig_review.upper() == orig_review and len(orig_review) > 15) or \
-       (review_text.count('!') > 3 or review_text.count('?') > 3 or review_text.count('!!!') > 0):
+       (counts["exclamation"][0] > 3 or counts["question"][0] > 3 or counts["triple_exclamation"][0] > 0):
         return True, "Unnatural formatting"
     
     # 7. Check for promotional/sponsored content indicators
-    promo_indicators = ["sponsored", "received for free", "in exchange for", "for my honest review", 
-                        "was provided", "company sent", "promotional", "ambassador", "received complimentary",
-                        "received product", "sample", "hashtag", "#ad", "#sponsored", "#partner", "influencer", "promo","For promotional purposes", "For promo only"]
-    
-    for indicator in promo_indicators:
-        if indicator in review_text:
-            return True, "Promotional content"
-    
-    # 8. Check for bot-like grammatical patterns using spaCy if available
-    if nlp and len(review_text.strip()) > 0:
-        try:
-            doc = nlp(review_text)
-            
-            # No sentence structure at all (unusual in human writing)
-            sentences = list(doc.sents)
-            if len(sentences) == 0:
-                return True, "No sentence structure"
-            
-            # Check for excessively simple or complex sentences
-            sentence_lengths = [len(sent) for sent in sentences]
-            if len(sentence_lengths) > 0:
-                avg_sentence_length = sum(sentence_lengths) / len(sentence_lengths)
-                if avg_sentence_length > 50 or avg_sentence_length < 3:
-                    return True, "Unusual sentence length"
-            
-            # Check for lack of pronouns (common in bot-generated text)
-            pronoun_count = len([token for token in doc if token.pos_ == "PRON"])
-            if len(doc) > 20 and pronoun_count == 0:
-                return True, "No pronouns used"
-        except Exception as e:
-            print(f"Error in spaCy analysis: {str(e)}")
+    if counts["promo"][0] > 0:
+        return True, "Promotional content"
     
+    return None
+
+def is_rating_mismatch(rating, sentiment_result):
+    """Rule 2 of is_fake_review: a high rating with negative sentiment or vice versa"""
+    sentiment_score = sentiment_result['score']
+    sentiment_label = sentiment_result['label']
+
+    # More aggressive threshold for detection
+    return (rating >= 4 and sentiment_label == "NEGATIVE" and sentiment_score > 0.6) or \
+           (rating <= 2 and sentiment_label == "POSITIVE" and sentiment_score > 0.6)
+
+def parse_review(review_text):
+    """Run spaCy over a single lowercased review, returns None if parsing fails"""
+    try:
+        return nlp(review_text)
+    except Exception as e:
+        print(f"Error in spaCy analysis: {str(e)}")
+        record_error("spacy")
+        return None
+
+def parse_reviews(texts, n_process=SPACY_N_PROCESS, batch_size=SPACY_BATCH_SIZE):
+    """Run spaCy over many lowercased reviews with nlp.pipe, once per unique text.
+
+    Returns a dict mapping each text to its doc, or to None if parsing failed.
+    """
+    unique_texts = list(dict.fromkeys(texts))
+    MODEL_BATCH_SIZE.labels("spacy").observe(len(unique_texts))
+    try:
+        return dict(zip(unique_texts, nlp.pipe(unique_texts, n_process=n_process, batch_size=batch_size)))
+    except Exception as e:
+        print(f"Error in batched spaCy analysis, parsing individually: {str(e)}")
+        record_error("spacy_batch")
+        return {text: parse_review(text) for text in unique_texts}
+
+def check_structure_rules(doc):
+    """Rule 8 of is_fake_review: bot-like grammatical patterns in a spaCy doc"""
+    try:
+        # No sentence structure at all (unusual in human writing)
+        sentences = list(doc.sents)
+        if len(sentences) == 0:
+            return True, "No sentence structure"
+        
+        # Check for excessively simple or complex sentences
+        sentence_lengths = [len(sent) for sent in sentences]
+        if len(sentence_lengths) > 0:
+            avg_sentence_length = sum(sentence_lengths) / len(sentence_lengths)
+            if avg_sentence_length > 50 or avg_sentence_length < 3:
+                return True, "Unusual sentence length"
+        
+        # Check for lack of pronouns (common in bot-generated text)
+        pronoun_count = len([token for token in doc if token.pos_ == "PRON"])
+        if len(doc) > 20 and pronoun_count == 0:
+            return True, "No pronouns used"
+    except Exception as e:
+        print(f"Error in spaCy analysis: {str(e)}")
+        record_error("structure_rules")
+    return None
+
+def check_pattern_rules(review_text, user=None, counts=None):
+    """Rules 9-10 of is_fake_review, returns a verdict or None"""
+    if counts is None:
+        counts = rule_matcher.scan(review_text)
+
     # 9. Check for extremely positive language with no specifics
-    extreme_positive_words = ["amazing", "awesome", "fantastic", "incredible", "excellent", "wonderful", "wow","exceptional","Outstanding"]
-    positive_count = sum(review_text.count(word) for word in extreme_positive_words)
-    if positive_count >= 2 and word_count < 20 and "because" not in review_text and "which" not in review_text:
+    positive_count = counts["extreme_positive"][0]
+    word_count = len(review_text.split())
+    if positive_count >= 2 and word_count < 20 and counts["specifics"][1] == 0:
         return True, "Vague positive language"
     
     # 10. Check for suspiciously formatted usernames
@@ -126,22 +647,29 @@ def is_fake_review(review_text, rating=None, timestamp=None, user=None):
         try:
             username = str(user).lower()
             # Look for patterns like "user123", "john2020", etc.
-            random_pattern = re.compile(r'^[a-z]+[0-9]{2,}$')
-            if random_pattern.match(username):
+            if RANDOM_USERNAME_PATTERN.match(username):
                 return True, "Suspicious username pattern"
         except Exception as e:
             print(f"Error in username analysis: {str(e)}")
+            record_error("username")
     
-    return False, None
+    return None
+
+def analyze_review(review_text, negative, neutral, positive, total_keywords, sentiment_result=_UNSET, keywords=_UNSET):
+    """Analyze a single review for sentiment and keywords.
 
-def analyze_review(review_text, negative, neutral, positive, total_keywords):
-    """Analyze a single review for sentiment and keywords"""
+    sentiment_result and keywords can carry precomputed results (None if that
+    stage failed) instead of running the models here.
+    """
     try:
         # More robust error handling
         if not review_text or len(str(review_text).strip()) == 0:
             return "NEUTRAL", 0.5, [], negative, neutral + 1, positive, total_keywords
         
-        sentiment_result = sentiment_pipeline(review_text)[0]
+        if sentiment_result is _UNSET:
+            sentiment_result = sentiment_pipeline(review_text)[0]
+        if sentiment_result is None:
+            raise ValueError("sentiment scoring failed for this review")
         initial_sentiment = sentiment_result['label']
         score = sentiment_result['score']
 
@@ -166,8 +694,11 @@ def analyze_review(review_text, negative, neutral, positive, total_keywords):
 
         # Extract keywords only if we have meaningful text
         if len(str(review_text).split()) >= 5:
-            keywords = kw_model.extract_keywords(review_text, top_n=5, stop_words='english')
-            keywords_only = [kw[0] for kw in keywords]
+            if keywords is _UNSET:
+                keywords = extract_keywords(review_text)
+            if keywords is None:
+                raise ValueError("keyword extraction failed for this review")
+            keywords_only = list(keywords)
             total_keywords = total_keywords.union(set(keywords_only))
         else:
             keywords_only = []
@@ -175,11 +706,17 @@ def analyze_review(review_text, negative, neutral, positive, total_keywords):
         return sentiment, score, keywords_only, negative, neutral, positive, total_keywords
     except Exception as e:
         print(f"Error in analyze_review: {str(e)}")
+        record_error("analyze_review")
         # Default to neutral in case of errors
         return "NEUTRAL", 0.5, [], negative, neutral + 1, positive, total_keywords
 
-def generate_suggestions(description, sentiment_stats, keywords):
-    """Generate actionable suggestions based on review analysis"""
+def generate_suggestions(description, sentiment_stats, keywords, complaint_topics=None):
+    """Generate actionable suggestions based on review analysis.
+
+    With complaint_topics from rank_complaint_topics, the top topics decide
+    which issues are reported, each matched to a known issue where its terms
+    allow, instead of looking for fixed words among the keywords.
+    """
     negative_pct, neutral_pct, positive_pct = sentiment_stats
     suggestions = []
 
@@ -190,30 +727,40 @@ def generate_suggestions(description, sentiment_stats, keywords):
     if negative_pct > positive_pct:
         suggestions.append("Negative reviews dominate - conduct focused user research to identify key problems.")
         
-    common_complaint_words = ["price", "expensive", "cost", "support", "customer service", 
-                             "help", "slow", "loading", "speed", "performance", "bug", 
-                             "error", "crash", "glitch", "difficult", "complex", 
-                             "confusing", "usability", "update", "outdated"]
-                             
-    detected_issues = [word for word in common_complaint_words if word in keywords]
-    
-    if "price" in detected_issues or "expensive" in detected_issues or "cost" in detected_issues:
-        suggestions.append("Price concerns noted in reviews. Consider revising pricing strategy or communicating value better.")
-        
-    if "support" in detected_issues or "customer service" in detected_issues or "help" in detected_issues:
-        suggestions.append("Customer support issues detected. Improve response times and service quality.")
-        
-    if "slow" in detected_issues or "loading" in detected_issues or "speed" in detected_issues or "performance" in detected_issues:
-        suggestions.append("Performance concerns identified. Optimize application speed and responsiveness.")
-        
-    if "bug" in detected_issues or "error" in detected_issues or "crash" in detected_issues or "glitch" in detected_issues:
-        suggestions.append("Technical issues reported frequently. Prioritize bug fixes and stability improvements.")
-        
-    if "difficult" in detected_issues or "complex" in detected_issues or "confusing" in detected_issues or "usability" in detected_issues:
-        suggestions.append("Usability problems detected. Simplify user interface and improve user experience.")
-        
-    if "update" in detected_issues or "outdated" in detected_issues:
-        suggestions.append("Users mentioning outdated features. Consider releasing updates with new functionality.")
+    issues = [
+        (["price", "expensive", "cost"],
+         "Price concerns noted in reviews. Consider revising pricing strategy or communicating value better."),
+        (["support", "customer service", "help"],
+         "Customer support issues detected. Improve response times and service quality."),
+        (["slow", "loading", "speed", "performance"],
+         "Performance concerns identified. Optimize application speed and responsiveness."),
+        (["bug", "error", "crash", "glitch"],
+         "Technical issues reported frequently. Prioritize bug fixes and stability improvements."),
+        (["difficult", "complex", "confusing", "usability"],
+         "Usability problems detected. Simplify user interface and improve user experience."),
+        (["update", "outdated"],
+         "Users mentioning outdated features. Consider releasing updates with new functionality.")
+    ]
+
+    if complaint_topics is None:
+        for words, suggestion in issues:
+            if any(word in keywords for word in words):
+                suggestions.append(suggestion)
+    else:
+        reported = set()
+        for topic in complaint_topics[:COMPLAINT_TOPICS_SUGGESTIONS]:
+            # Matched at the start of a word, so "crashes" and "bugs" count too
+            terms = [f" {term}" for term in topic["terms"]]
+            matched = next((
+                suggestion for words, suggestion in issues
+                if suggestion not in reported and any(f" {word}" in term for word in words for term in terms)
+            ), None)
+            detail = f'"{topic["label"]}" in {topic["reviews"]} reviews'
+            if matched is not None:
+                reported.add(matched)
+                suggestions.append(f"{matched} Top complaint: {detail}.")
+            else:
+                suggestions.append(f"Recurring complaint: {detail}. Investigate and address it.")
     
     if neutral_pct > 50:
         suggestions.append("High percentage of neutral reviews indicates ambivalence. Work on creating more positive user experiences.")
@@ -230,6 +777,564 @@ def generate_suggestions(description, sentiment_stats, keywords):
 
     return suggestions
 
+def find_near_duplicates(reviews):
+    """Indices of reviews that belong to a cluster of near-identical texts in this batch"""
+    if not NEAR_DUPLICATE_DETECTION:
+        return set()
+    try:
+        return duplicate_detector.flag([review.get("review", "") for review in reviews])
+    except Exception as e:
+        print(f"Error in near-duplicate detection: {str(e)}")
+        record_error("near_duplicates")
+        return set()
+
+def needs_escalation(rating, sentiment_result):
+    """Whether the hybrid engine should ask the LLM about a review instead of trusting the local score"""
+    if sentiment_result is None:
+        return True
+    if HYBRID_UNCERTAIN_LOW <= sentiment_result["score"] <= HYBRID_UNCERTAIN_HIGH:
+        return True
+    try:
+        return rating is not None and is_rating_mismatch(float(rating), sentiment_result)
+    except (TypeError, ValueError):
+        return False
+
+def escalate_sentiments(reviews, review_texts, sentiments):
+    """Re-score the reviews the local model is unsure about with the LLM, in chunks.
+
+    Returns a copy of sentiments (text -> pipeline-shaped result) where each
+    escalated text carries the LLM's label and confidence instead, and the set
+    of those texts. A text the LLM gives no answer for keeps its local result.
+    """
+    candidates = list(dict.fromkeys(
+        str(text) for review, text in zip(reviews, review_texts)
+        if not is_too_short(text) and needs_escalation(review.get("rating", None), sentiments.get(str(text)))
+    ))
+    if not candidates:
+        return sentiments, set()
+
+    try:
+        # Imported on first use so the local-only service doesn't need groq installed
+        import llm_analysis
+        results = llm_analysis.run_sync(llm_analysis.analyze_reviews_batch(
+            [{"review": text} for text in candidates], HYBRID_LLM_MODEL, fallback=lambda text: None
+        ))
+    except Exception as e:
+        print(f"Error escalating reviews to the LLM: {str(e)}")
+        record_error("escalation")
+        return sentiments, set()
+
+    sentiments = dict(sentiments)
+    escalated = set()
+    for text, result in zip(candidates, results):
+        if result is None:
+            continue
+        try:
+            sentiments[text] = {
+                "label": str(result.get("sentiment", "NEUTRAL")).upper(),
+                "score": float(result.get("confidence", 0.5))
+            }
+            escalated.add(text)
+        except (TypeError, ValueError):
+            continue
+    return sentiments, escalated
+
+def escalation_summary(analyzed_reviews):
+    """How many of the analyzed reviews the hybrid engine sent to the LLM"""
+    escalated = sum(1 for entry in analyzed_reviews if entry.get("escalated"))
+    return {
+        "reviews": len(analyzed_reviews),
+        "escalated": escalated,
+        "fraction": round(escalated / len(analyzed_reviews), 4) if analyzed_reviews else 0.0
+    }
+
+def lean_columns(analyzed_reviews):
+    """analyzed_reviews as column arrays for lean responses, without the echoed review text.
+
+    Position i of every column is review i of the request. Fake reasons and
+    keywords are ids into the returned tables; a genuine review's reason is -1.
+    """
+    keyword_ids = {}
+    reason_ids = {}
+    columns = {"sentiment": [], "confidence": [], "is_fake": [], "fake_reason": [], "keywords": []}
+    with_escalation = any("escalated" in entry for entry in analyzed_reviews)
+    if with_escalation:
+        columns["escalated"] = []
+
+    for entry in analyzed_reviews:
+        columns["sentiment"].append(entry["sentiment"])
+        columns["confidence"].append(entry["confidence"])
+        columns["is_fake"].append(entry["is_fake"])
+        columns["fake_reason"].append(
+            reason_ids.setdefault(entry["fake_reason"], len(reason_ids)) if entry["is_fake"] else -1
+        )
+        columns["keywords"].append([keyword_ids.setdefault(keyword, len(keyword_ids)) for keyword in entry["keywords"]])
+        if with_escalation:
+            columns["escalated"].append(entry.get("escalated", False))
+
+    return {"columns": columns, "keyword_table": list(keyword_ids), "fake_reason_table": list(reason_ids)}
+
+def analyze_review_batch(reviews, batch_size=SENTIMENT_BATCH_SIZE, timer=None, near_duplicates=_UNSET,
+                         hybrid=HYBRID_ESCALATION, per_review_keywords=True):
+    """Run the fake-review checks and sentiment analysis over a list of reviews.
+
+    Every distinct review text is scored once in a batched pass, and the same
+    score feeds both the rating mismatch check and the sentiment classification.
+    The sentiment model is uncased, so the lowercased text seen by is_fake_review
+    scores the same as the original. Stage wall times go to timer (a StageTimer).
+
+    near_duplicates can carry the indices flagged by find_near_duplicates when
+    the caller ran it over a larger request that this batch is a chunk of.
+    With hybrid, uncertain reviews are re-scored by the LLM before the checks
+    (see escalate_sentiments) and each entry says whether it was "escalated".
+    Without per_review_keywords, KeyBERT is skipped and every entry's keywords
+    are left empty, for rank_corpus_keywords to fill.
+    """
+    timer = timer if timer is not None else StageTimer()
+    review_texts = [review.get("review", "") for review in reviews]
+    if near_duplicates is _UNSET:
+        with timer.stage("near_duplicates"):
+            near_duplicates = find_near_duplicates(reviews)
+    with timer.stage("sentiment"):
+        sentiments = score_sentiments(
+            [str(text) for text in review_texts if not is_too_short(text)], batch_size
+        )
+    escalated = set()
+    if hybrid:
+        with timer.stage("escalation"):
+            sentiments, escalated = escalate_sentiments(reviews, review_texts, sentiments)
+
+    with timer.stage("heuristics"):
+        # Fake verdicts depend on the rating and user as well as the exact text, since
+        # the phrase and formatting rules are sensitive to whitespace
+        verdict_keys = [
+            result_cache.make_key(
+                "fake", text, review.get("rating", None), review.get("user", "anonymous"),
+                *(("hybrid",) if hybrid else ()), normalize=False
+            )
+            for review, text in zip(reviews, review_texts)
+        ]
+        cached_verdicts = result_cache.get_many(verdict_keys)
+        verdicts = [tuple(cached_verdicts[key]) if key in cached_verdicts else None for key in verdict_keys]
+        lowered = [str(text).lower() if text else "" for text in review_texts]
+
+        # Rules 1-7 first, so only reviews that get past them are parsed by spaCy
+        pending = {}
+        match_counts = {}
+        for index, (review, review_text) in enumerate(zip(reviews, review_texts)):
+            if verdicts[index] is not None:
+                continue
+            if not is_too_short(lowered[index]):
+                match_counts[index] = rule_matcher.scan(lowered[index])
+            verdict = check_text_rules(
+                lowered[index], review.get("rating", None), sentiments.get(str(review_text)), match_counts.get(index)
+            )
+            if verdict is None:
+                pending[index] = None
+            else:
+                verdicts[index] = verdict
+
+    with timer.stage("spacy"):
+        if nlp:
+            docs = parse_reviews([lowered[index] for index in pending if lowered[index].strip()])
+            for index in pending:
+                doc = docs.get(lowered[index])
+                if doc is not None:
+                    pending[index] = check_structure_rules(doc)
+
+    with timer.stage("heuristics"):
+        for index, verdict in pending.items():
+            if verdict is None:
+                verdict = check_pattern_rules(lowered[index], reviews[index].get("user", "anonymous"), match_counts.get(index))
+            verdicts[index] = verdict if verdict is not None else (False, None)
+
+    result_cache.put_many({
+        verdict_keys[index]: list(verdicts[index])
+        for index, key in enumerate(verdict_keys) if key not in cached_verdicts
+    })
+
+    # Depends on the rest of the batch, so applied after caching the per-review
+    # verdicts; a reason found by the per-review rules takes precedence
+    for index in near_duplicates:
+        if not verdicts[index][0]:
+            verdicts[index] = (True, NEAR_DUPLICATE_REASON)
+
+    # Keywords are only extracted for genuine reviews with enough words
+    keyword_texts = [
+        str(text) for text, (is_fake, _) in zip(review_texts, verdicts)
+        if per_review_keywords and not is_fake and sentiments.get(str(text)) is not None
+        and len(str(text).split()) >= 5
+    ]
+    with timer.stage("keywords"):
+        keywords = lookup_keywords(keyword_texts)
+
+    analyzed_reviews = []
+    for review, review_text, (is_fake, reason) in zip(reviews, review_texts, verdicts):
+        user = review.get("user", "anonymous")
+        rating = review.get("rating", None)
+
+        if is_fake:
+            # Add to analyzed reviews but mark as fake
+            analyzed_reviews.append({
+                "user": user,
+                "rating": rating,
+                "review": review_text,
+                "sentiment": "NEUTRAL",  # Default sentiment for fake reviews
+                "confidence": 0.0,
+                "keywords": [],
+                "is_fake": True,
+                "fake_reason": reason
+            })
+            if hybrid:
+                analyzed_reviews[-1]["escalated"] = str(review_text) in escalated
+            continue
+
+        # Analyze genuine review
+        sentiment, score, review_keywords, _, _, _, _ = analyze_review(
+            review_text, 0, 0, 0, set(),
+            sentiment_result=sentiments.get(str(review_text)),
+            keywords=keywords.get(str(review_text), _UNSET) if per_review_keywords else []
+        )
+
+        analyzed_reviews.append({
+            "user": user,
+            "rating": rating,
+            "review": review_text,
+            "sentiment": sentiment,
+            "confidence": round(score, 4),
+            "keywords": review_keywords,
+            "is_fake": False
+        })
+        if hybrid:
+            analyzed_reviews[-1]["escalated"] = str(review_text) in escalated
+
+    REVIEWS_PROCESSED.inc(len(reviews))
+    for reason, count in Counter(reason for is_fake, reason in verdicts if is_fake).items():
+        FAKE_REVIEWS.labels(reason).inc(count)
+    return analyzed_reviews
+
+def run_keyword_batch(texts):
+    """Keywords for each text in order, with None where extraction failed"""
+    MODEL_BATCH_SIZE.labels("keywords").observe(len(texts))
+    try:
+        return extract_keywords_batch(texts)
+    except Exception as e:
+        print(f"Error in batched keyword extraction, extracting individually: {str(e)}")
+        record_error("keywords_batch")
+        results = []
+        for text in texts:
+            try:
+                results.append(extract_keywords(text))
+            except Exception as e:
+                print(f"Error in keyword extraction: {str(e)}")
+                record_error("keywords")
+                results.append(None)
+        return results
+
+def lookup_keywords(texts):
+    """Fetch keywords for each unique text from the cache, batch-extracting and storing the misses.
+
+    Returns a dict mapping each text to its keyword list, or to None when
+    extraction failed.
+    """
+    unique_texts = list(dict.fromkeys(texts))
+    keys = {text: result_cache.make_key("keywords", text) for text in unique_texts}
+    cached = result_cache.get_many(list(keys.values()))
+    results = {text: cached[key] for text, key in keys.items() if key in cached}
+
+    pending = [text for text in unique_texts if text not in results]
+    results.update(zip(pending, keyword_batcher.run(pending)))
+
+    result_cache.put_many({keys[text]: results[text] for text in pending if results[text] is not None})
+    return results
+
+def summarize_reviews(analyzed_reviews, totals=None):
+    """Tally sentiment counts, keywords and fake-review reasons from analyzed reviews.
+
+    Pass the tuple returned by a previous call as totals to keep a running tally.
+    """
+    if totals is None:
+        totals = (0, 0, 0, [], 0, {})
+    negative, neutral, positive, total_keywords, fake_reviews, fake_reasons = totals
+    # Keywords in order of first appearance, so the tally doesn't depend on hash order
+    total_keywords = dict.fromkeys(total_keywords)
+    fake_reasons = dict(fake_reasons)
+
+    for entry in analyzed_reviews:
+        if entry["is_fake"]:
+            fake_reviews += 1
+            reason = entry["fake_reason"]
+            fake_reasons[reason] = fake_reasons.get(reason, 0) + 1
+            continue
+
+        if entry["sentiment"] == "NEGATIVE":
+            negative += 1
+        elif entry["sentiment"] == "POSITIVE":
+            positive += 1
+        else:
+            neutral += 1
+        total_keywords.update(dict.fromkeys(entry["keywords"]))
+
+    return negative, neutral, positive, list(total_keywords), fake_reviews, fake_reasons
+
+def merge_summaries(parts):
+    """Combine the summarize_reviews tuples of consecutive shards of a request, in shard order.
+
+    Gives the same tallies, keyword order included, as one summarize_reviews
+    call over the whole request.
+    """
+    negative = neutral = positive = fake_reviews = 0
+    total_keywords = {}
+    fake_reasons = {}
+    for part_negative, part_neutral, part_positive, part_keywords, part_fake, part_reasons in parts:
+        negative += part_negative
+        neutral += part_neutral
+        positive += part_positive
+        fake_reviews += part_fake
+        total_keywords.update(dict.fromkeys(part_keywords))
+        for reason, count in part_reasons.items():
+            fake_reasons[reason] = fake_reasons.get(reason, 0) + count
+    return negative, neutral, positive, list(total_keywords), fake_reviews, fake_reasons
+
+def analyze_sharded(reviews, timer=None, near_duplicates=_UNSET, hybrid=HYBRID_ESCALATION, per_review_keywords=True):
+    """analyze_review_batch spread over review_pool when the request is large enough.
+
+    The reviews are cut into one contiguous shard per worker, and the shards'
+    entries and tallies are merged back in shard order, so the result doesn't
+    depend on the number of workers or on which one finishes first. Without a
+    pool, for small requests, or if the pool fails, the batch runs here.
+    Returns the entries and their summarize_reviews tallies.
+    """
+    timer = timer if timer is not None else StageTimer()
+    if near_duplicates is _UNSET:
+        with timer.stage("near_duplicates"):
+            near_duplicates = find_near_duplicates(reviews)
+
+    if review_pool is not None and len(reviews) >= max(REVIEW_POOL_MIN_REVIEWS, 1):
+        size = -(-len(reviews) // review_pool.workers)
+        shards = [
+            (reviews[start:start + size], chunk_indices(near_duplicates, start, size))
+            for start in range(0, len(reviews), size)
+        ]
+        try:
+            analyzed_reviews, parts = [], []
+            with timer.stage("pool"):
+                for entries, totals, seconds in review_pool.analyze(
+                    shards, hybrid=hybrid, per_review_keywords=per_review_keywords
+                ):
+                    analyzed_reviews.extend(entries)
+                    parts.append(totals)
+                    # Summed over the workers, next to the wall time of "pool"
+                    for name, stage_seconds in seconds.items():
+                        timer.record(name, stage_seconds)
+        except Exception as e:
+            print(f"Error in the review pool, analyzing in-process: {str(e)}")
+            record_error("review_pool")
+        else:
+            totals = merge_summaries(parts)
+            # The workers' own counters aren't exported
+            REVIEWS_PROCESSED.inc(len(analyzed_reviews))
+            for reason, count in totals[5].items():
+                FAKE_REVIEWS.labels(reason).inc(count)
+            return analyzed_reviews, totals
+
+    analyzed_reviews = analyze_review_batch(
+        reviews, timer=timer, near_duplicates=near_duplicates, hybrid=hybrid, per_review_keywords=per_review_keywords
+    )
+    return analyzed_reviews, summarize_reviews(analyzed_reviews)
+
+def rank_corpus_keywords(texts, sentiments, entries=None):
+    """Corpus keyword mode: rank the keywords of genuine reviews per sentiment in one sparse pass.
+
+    texts and sentiments describe the genuine reviews of a request. Returns
+    KeywordRanker rankings keyed by lowercase sentiment, or None on failure.
+    When their analyzed_reviews entries are given, each entry of a review with
+    enough words gets its top terms within its sentiment as keywords, in place.
+    """
+    try:
+        ranking, keywords = keyword_ranker.rank(texts, sentiments, per_text=5)
+    except Exception as e:
+        print(f"Error in corpus keyword ranking: {str(e)}")
+        record_error("corpus_keywords")
+        return None
+    for entry, review_keywords in zip(entries or [], keywords):
+        if len(str(entry["review"]).split()) >= 5:
+            entry["keywords"] = review_keywords
+    return {label.lower(): ranking.get(label, []) for label in ("NEGATIVE", "NEUTRAL", "POSITIVE")}
+
+def corpus_keywords_of(analyzed_reviews):
+    """rank_corpus_keywords over the genuine entries of analyzed_reviews, filling their keywords"""
+    genuine = [entry for entry in analyzed_reviews if not entry["is_fake"]]
+    return rank_corpus_keywords(
+        [entry["review"] for entry in genuine], [entry["sentiment"] for entry in genuine], genuine
+    )
+
+def ranked_keyword_list(keyword_ranking):
+    """The keywords of a corpus ranking over all sentiments, found in the most reviews first"""
+    reviews = {}
+    for ranked in keyword_ranking.values():
+        for item in ranked:
+            reviews[item["keyword"]] = reviews.get(item["keyword"], 0) + item["reviews"]
+    return sorted(reviews, key=lambda keyword: (-reviews[keyword], keyword))
+
+def review_embeddings(texts):
+    """Keyword-model embeddings of texts, through the embedding store when there is one"""
+    if embedding_store is not None:
+        try:
+            return embed_texts(texts)
+        except Exception as e:
+            print(f"Error in the embedding store, embedding directly: {str(e)}")
+            record_error("embedding_store")
+    return kw_model.model.embed(texts)
+
+def complaint_topics_wanted(data):
+    """Whether to cluster complaint topics for a request ("complaint_topics", else COMPLAINT_TOPICS)"""
+    return bool(data.get("complaint_topics", COMPLAINT_TOPICS))
+
+def rank_complaint_topics(texts, sentiments, confidences):
+    """Cluster the genuine negative and neutral reviews of a request into ranked complaint topics.
+
+    texts, sentiments and confidences describe the genuine reviews; positive
+    ones are left out. A negative review weighs its confidence as negativity
+    and a neutral one 0.5. Returns TopicClusterer topics, or None on failure.
+    """
+    complaints = [
+        (str(text), confidence if sentiment == "NEGATIVE" else 0.5)
+        for text, sentiment, confidence in zip(texts, sentiments, confidences)
+        if sentiment != "POSITIVE" and str(text).strip()
+    ]
+    if len(complaints) < COMPLAINT_TOPICS_MIN_REVIEWS:
+        return []
+    try:
+        complaint_texts = [text for text, _ in complaints]
+        return topic_clusterer.cluster(
+            complaint_texts, review_embeddings(complaint_texts), [negativity for _, negativity in complaints]
+        )
+    except Exception as e:
+        print(f"Error in complaint topic clustering: {str(e)}")
+        record_error("complaint_topics")
+        return None
+
+def complaint_topics_of(analyzed_reviews):
+    """rank_complaint_topics over the genuine entries of analyzed_reviews"""
+    genuine = [entry for entry in analyzed_reviews if not entry["is_fake"]]
+    return rank_complaint_topics(
+        [entry["review"] for entry in genuine], [entry["sentiment"] for entry in genuine],
+        [entry["confidence"] for entry in genuine]
+    )
+
+def analyze_incremental(app, reviews, timer=None, hybrid=HYBRID_ESCALATION, per_review_keywords=True):
+    """Analyze only the reviews not yet stored for this app and update its running totals.
+
+    Returns the entries for all reviews in request order (stored ones as they
+    were first analyzed), the app's totals as a summarize_reviews tuple, the
+    number of reviews those totals cover and how many reviews were new.
+    Stored genuine reviews whose keywords weren't extracted per review (stored
+    in corpus mode) are analyzed again when this request wants them, and
+    stored reviews that fall in a near-duplicate cluster of this request are
+    flagged; both replace the stored entry.
+    """
+    timer = timer if timer is not None else StageTimer()
+    keyword_mode = "keybert" if per_review_keywords else "corpus"
+    fingerprints = [ReviewStore.fingerprint(review) for review in reviews]
+    stored = review_store.lookup(app, fingerprints)
+    stale = {
+        fingerprint for fingerprint, (entry, mode) in stored.items()
+        if per_review_keywords and mode != "keybert" and not entry["is_fake"]
+    }
+
+    # Near-duplicates are judged against the whole request, not just new reviews
+    with timer.stage("near_duplicates"):
+        near_duplicates = find_near_duplicates(reviews)
+
+    new_indices = []
+    seen = set(stored) - stale
+    for index, fingerprint in enumerate(fingerprints):
+        if fingerprint not in seen:
+            seen.add(fingerprint)
+            new_indices.append(index)
+
+    new_entries, _ = analyze_sharded(
+        [reviews[index] for index in new_indices], timer=timer,
+        near_duplicates={position for position, index in enumerate(new_indices) if index in near_duplicates},
+        hybrid=hybrid, per_review_keywords=per_review_keywords
+    )
+    entries = {fingerprints[index]: entry for index, entry in zip(new_indices, new_entries)}
+
+    # Flagged the way analyze_review_batch flags a new one
+    for index in near_duplicates:
+        fingerprint = fingerprints[index]
+        if fingerprint in stored and fingerprint not in entries and not stored[fingerprint][0]["is_fake"]:
+            entries[fingerprint] = {
+                **stored[fingerprint][0], "sentiment": "NEUTRAL", "confidence": 0.0, "keywords": [],
+                "is_fake": True, "fake_reason": NEAR_DUPLICATE_REASON
+            }
+    replaced = {fingerprint for fingerprint in entries if fingerprint in stored}
+    totals = review_store.add(app, entries, keyword_mode, replace=replaced)
+    for fingerprint, (entry, _) in stored.items():
+        entries.setdefault(fingerprint, entry)
+
+    summary_totals = (
+        totals["negative"], totals["neutral"], totals["positive"],
+        list(totals["keywords"])[:REVIEW_STORE_SUMMARY_KEYWORDS],  # most frequent first
+        totals["fake_reviews"], totals["fake_reasons"]
+    )
+    analyzed_reviews = [entries[fingerprint] for fingerprint in fingerprints]
+    new_reviews = sum(1 for index in new_indices if fingerprints[index] not in stored)
+    return analyzed_reviews, summary_totals, totals["reviews_analyzed"], new_reviews
+
+
+def build_summary(description, totals, reviews_analyzed, timer=None, keyword_ranking=None, complaint_topics=None):
+    """Turn the tallies from summarize_reviews into the summary fields of an /analyze response.
+
+    With a keyword_ranking from rank_corpus_keywords, it is reported and its
+    keywords, most widespread first, replace the tallied ones. Complaint
+    topics from rank_complaint_topics are reported and drive the suggestions.
+    """
+    timer = timer if timer is not None else StageTimer()
+    negative, neutral, positive, total_keywords, fake_reviews, fake_reasons = totals
+    if keyword_ranking is not None:
+        total_keywords = ranked_keyword_list(keyword_ranking)
+
+    # Calculate percentage distribution of sentiments
+    total = negative + neutral + positive
+    if total > 0:  # Avoid division by zero
+        negative_pct = round((negative / total) * 100, 2)
+        neutral_pct = round((neutral / total) * 100, 2)
+        positive_pct = round((positive / total) * 100, 2)
+    else:
+        negative_pct = neutral_pct = positive_pct = 0.0
+
+    sentiment_distribution = {
+        "negative": negative_pct,
+        "neutral": neutral_pct,
+        "positive": positive_pct
+    }
+
+    # Generate recommendations
+    with timer.stage("suggestions"):
+        suggestions = generate_suggestions(
+            description, 
+            (negative_pct, neutral_pct, positive_pct), 
+            total_keywords,
+            complaint_topics
+        )
+
+    summary = {
+        "sentiment_distribution": sentiment_distribution,
+        "keywords": list(total_keywords),
+        "suggestions": suggestions,
+        "fake_reviews_detected": fake_reviews,
+        "fake_review_reasons": fake_reasons,
+        "total_reviews_analyzed": reviews_analyzed,
+        "genuine_reviews_count": reviews_analyzed - fake_reviews
+    }
+    if keyword_ranking is not None:
+        summary["keyword_ranking"] = keyword_ranking
+    if complaint_topics is not None:
+        summary["complaint_topics"] = complaint_topics
+    return summary
+
 def first_sentence(text: str) -> str:
     """Extract the first sentence from a text"""
     if not text:
@@ -242,17 +1347,157 @@ def first_sentence(text: str) -> str:
             return text[:idx + 1].strip()   
     return text.strip() 
 
+def chunk_indices(indices, start, size):
+    """The indices falling in reviews[start:start + size], relative to that chunk"""
+    return {index - start for index in indices if start <= index < start + size}
+
+def wants_timings(data):
+    """Whether the caller asked for a per-request timings block (?timings=1 or "timings": true)"""
+    return request.args.get("timings") in ("1", "true") or bool(data.get("timings"))
+
+def keyword_mode_of(data):
+    """The request's "keyword_mode", or KEYWORD_MODE; raises ValueError for an unknown one"""
+    mode = data.get("keyword_mode") or KEYWORD_MODE
+    if mode not in KEYWORD_MODES:
+        raise ValueError(f"Unknown keyword_mode {mode!r}, expected one of {', '.join(KEYWORD_MODES)}")
+    return mode
+
+def wants_lean(data):
+    """Whether the caller asked for per-review results as columns (?lean=1 or "lean": true)"""
+    return request.args.get("lean") in ("1", "true") or bool(data.get("lean"))
+
+def make_lean(result):
+    """Replace the analyzed_reviews of a result with lean_columns, in place"""
+    result.update(lean_columns(result.pop("analyzed_reviews")))
+    return result
+
+def run_analysis_job(data, report_progress, is_cancelled):
+    """Job runner for /jobs: the /analyze pipeline in chunks, reporting progress between them"""
+    reviews = data.get("reviews", [])
+    description = data.get("description", "")
+    hybrid = bool(data.get("hybrid", HYBRID_ESCALATION))
+    corpus_keywords = keyword_mode_of(data) == "corpus"
+    analyzed_reviews = []
+    totals = None
+    timer = StageTimer()
+    start_time = time.perf_counter()
+
+    # Across the whole request, so copies landing in different chunks still match
+    with timer.stage("near_duplicates"):
+        near_duplicates = find_near_duplicates(reviews)
+
+    report_progress(0, len(reviews), "analyzing")
+    for start in range(0, len(reviews), JOB_CHUNK_SIZE):
+        if is_cancelled():
+            return None
+        chunk = analyze_review_batch(
+            reviews[start:start + JOB_CHUNK_SIZE], timer=timer,
+            near_duplicates=chunk_indices(near_duplicates, start, JOB_CHUNK_SIZE), hybrid=hybrid,
+            per_review_keywords=not corpus_keywords
+        )
+        analyzed_reviews.extend(chunk)
+        totals = summarize_reviews(chunk, totals)
+        report_progress(len(analyzed_reviews), len(reviews), "analyzing")
+
+    report_progress(len(analyzed_reviews), len(reviews), "summarizing")
+    keyword_ranking = None
+    if corpus_keywords:
+        with timer.stage("corpus_keywords"):
+            keyword_ranking = corpus_keywords_of(analyzed_reviews)
+    complaint_topics = None
+    if complaint_topics_wanted(data):
+        with timer.stage("complaint_topics"):
+            complaint_topics = complaint_topics_of(analyzed_reviews)
+    summary = build_summary(
+        description, totals or summarize_reviews([]), len(analyzed_reviews), timer, keyword_ranking, complaint_topics
+    )
+    REQUEST_SECONDS.labels("jobs").observe(time.perf_counter() - start_time)
+    result = {
+        "success": True,
+        "uid": data.get("uid", "unknown"),
+        "title": data.get("title", ""),
+        "icon": data.get("icon", ""),
+        "description": first_sentence(description),
+        "analyzed_reviews": analyzed_reviews,
+        **summary
+    }
+    if hybrid:
+        result["escalation"] = escalation_summary(analyzed_reviews)
+    if data.get("lean"):
+        make_lean(result)
+    if data.get("timings"):
+        result["timings"] = timer.as_dict()
+    return result
+
+def make_job_backend():
+    if JOB_REDIS_URL:
+        import redis
+        return KeyValueJobBackend(redis.Redis.from_url(JOB_REDIS_URL), ttl=JOB_RETENTION_SECONDS)
+    return InMemoryJobBackend(ttl=JOB_RETENTION_SECONDS)
+
+job_manager = JobManager(run_analysis_job, backend=make_job_backend(), max_workers=JOB_WORKERS, max_pending=JOB_QUEUE_LIMIT)
+
 @app.route("/", methods=["GET"])
 def home():
     return jsonify({"message": "Brand Analyzer API is running."}), 200
 
+@app.route("/ready", methods=["GET"])
+def ready():
+    """Readiness probe: 200 once the models are loaded and warmed up, 503 before that"""
+    timings = {name: round(seconds, 3) for name, seconds in startup_timings.items() if name != "warmed_up_at"}
+    if "warmed_up_at" not in startup_timings:
+        return jsonify({"ready": False, "timings": timings}), 503
+    return jsonify({"ready": True, "timings": timings, "models": model_manifest}), 200
+
+@app.route("/metrics", methods=["GET"])
+def metrics():
+    """Prometheus metrics: stage and request latency histograms, review, fake and error counters"""
+    body, content_type = render_metrics()
+    return Response(body, content_type=content_type)
+
+@app.route("/cache/stats", methods=["GET"])
+def cache_stats():
+    return jsonify(result_cache.stats()), 200
+
+@app.route("/batching/stats", methods=["GET"])
+def batching_stats():
+    """Batch fill ratio and queueing delay of the inference schedulers"""
+    return jsonify(batcher_stats()), 200
+
+@app.route("/cache/invalidate", methods=["POST"])
+def cache_invalidate():
+    """Drop all cached results, e.g. after swapping a model in place"""
+    result_cache.invalidate(model_identity())
+    if review_store is not None:
+        review_store.invalidate(model_identity())
+    if embedding_store is not None:
+        embedding_store.invalidate(model_revision("keywords"))
+    return jsonify({"success": True, "cache": result_cache.stats()}), 200
+
+@app.route("/store/stats", methods=["GET"])
+def store_stats():
+    if review_store is None:
+        return jsonify({"enabled": False}), 200
+    return jsonify({"enabled": True, **review_store.stats()}), 200
+
+@app.route("/store/forget", methods=["POST"])
+def store_forget():
+    """Drop the stored reviews and totals of one app ({"app": <appId or title>})"""
+    data = request.json or {}
+    if review_store is None:
+        return jsonify({"success": False, "error": "REVIEW_STORE_PATH is not set"}), 400
+    if not data.get("app"):
+        return jsonify({"success": False, "error": "Missing 'app' field"}), 400
+    review_store.forget(data["app"])
+    return jsonify({"success": True, "app": data["app"]}), 200
+
 @app.route("/analyze", methods=["POST"])
 def analyze():
     """Main endpoint for analyzing reviews"""
     try:
-        data = request.json
+        data = request_payload()
 
-        if "reviews" not in data or "description" not in data:
+        if not data or "reviews" not in data or "description" not in data:
             return jsonify({"error": "Missing 'reviews' or 'description' field"}), 400
 
         uid = data.get("uid", "unknown")
@@ -262,80 +1507,39 @@ def analyze():
         description = data.get("description", "")
         brandType = data.get("brandURLType", "")
 
-        # Initialize counters and collections
-        negative = 0
-        neutral = 0
-        positive = 0
-        total_keywords = set()
-        analyzed_reviews = []
-        fake_reviews = 0
-        fake_reasons = {}
-
-        # Process each review
-        for review in reviews:
-            review_text = review.get("review", "")
-            user = review.get("user", "anonymous")
-            rating = review.get("rating", None)
-            timestamp = review.get("timestamp", None)
-
-            # Check if review is fake
-            is_fake, reason = is_fake_review(review_text, rating, timestamp, user)
-            
-            if is_fake:
-                fake_reviews += 1
-                fake_reasons[reason] = fake_reasons.get(reason, 0) + 1
-                
-                # Add to analyzed reviews but mark as fake
-                analyzed_reviews.append({
-                    "user": user,
-                    "rating": rating,
-                    "review": review_text,
-                    "sentiment": "NEUTRAL",  # Default sentiment for fake reviews
-                    "confidence": 0.0,
-                    "keywords": [],
-                    "is_fake": True,
-                    "fake_reason": reason
-                })
-                continue
-
-            # Analyze genuine review
-            sentiment, score, keywords, negative, neutral, positive, total_keywords = analyze_review(
-                review_text, negative, neutral, positive, total_keywords
+        # Process all reviews in one batched pass
+        timer = StageTimer()
+        start_time = time.perf_counter()
+        app_key = data.get("appId") or title
+        hybrid = bool(data.get("hybrid", HYBRID_ESCALATION))
+        try:
+            corpus_keywords = keyword_mode_of(data) == "corpus"
+        except ValueError as e:
+            return jsonify({"success": False, "error": str(e)}), 400
+        incremental = None
+        if review_store is not None and app_key and data.get("incremental", True):
+            # Only unseen reviews are analyzed; the summary covers every stored review of the app
+            analyzed_reviews, totals, reviews_analyzed, new_reviews = analyze_incremental(
+                app_key, reviews, timer, hybrid, per_review_keywords=not corpus_keywords
             )
-
-            analyzed_reviews.append({
-                "user": user,
-                "rating": rating,
-                "review": review_text,
-                "sentiment": sentiment,
-                "confidence": round(score, 4),
-                "keywords": keywords,
-                "is_fake": False
-            })
-
-        # Calculate percentage distribution of sentiments
-        total = negative + neutral + positive
-        if total > 0:  # Avoid division by zero
-            negative_pct = round((negative / total) * 100, 2)
-            neutral_pct = round((neutral / total) * 100, 2)
-            positive_pct = round((positive / total) * 100, 2)
+            incremental = {"app": app_key, "new_reviews": new_reviews, "stored_reviews": reviews_analyzed}
         else:
-            negative_pct = neutral_pct = positive_pct = 0.0
-
-        sentiment_distribution = {
-            "negative": negative_pct,
-            "neutral": neutral_pct,
-            "positive": positive_pct
-        }
-
-        # Generate recommendations
-        suggestions = generate_suggestions(
-            description, 
-            (negative_pct, neutral_pct, positive_pct), 
-            total_keywords
-        )
+            analyzed_reviews, totals = analyze_sharded(
+                reviews, timer=timer, hybrid=hybrid, per_review_keywords=not corpus_keywords
+            )
+            reviews_analyzed = len(analyzed_reviews)
+        keyword_ranking = None
+        if corpus_keywords:
+            # Over this request's reviews, stored ones included
+            with timer.stage("corpus_keywords"):
+                keyword_ranking = corpus_keywords_of(analyzed_reviews)
+        complaint_topics = None
+        if complaint_topics_wanted(data):
+            with timer.stage("complaint_topics"):
+                complaint_topics = complaint_topics_of(analyzed_reviews)
+        elapsed = time.perf_counter() - start_time
 
-        short_description = first_sentence(description)
+        summary = build_summary(description, totals, reviews_analyzed, timer, keyword_ranking, complaint_topics)
 
         # Create response
         response = {
@@ -343,23 +1547,39 @@ def analyze():
             "uid": uid,
             "title": title,
             "icon": icon,
-            "description": short_description,
-            "sentiment_distribution": sentiment_distribution,
-            "keywords": list(total_keywords),
-            "suggestions": suggestions,
+            "description": first_sentence(description),
             "analyzed_reviews": analyzed_reviews,
-            "fake_reviews_detected": fake_reviews,
-            "fake_review_reasons": fake_reasons,
-            "total_reviews_analyzed": len(analyzed_reviews),
-            "genuine_reviews_count": len(analyzed_reviews) - fake_reviews
+            **summary,
+            "debug": {
+                "analysis_seconds": round(elapsed, 4),
+                "reviews_per_second": round(len(reviews) / elapsed, 2) if elapsed > 0 else None,
+                "sentiment_batch_size": SENTIMENT_BATCH_SIZE,
+                "cache": result_cache.stats(),
+                "batching": batcher_stats(),
+                "review_pool": review_pool.stats() if review_pool is not None else None,
+                "embeddings": embedding_store.stats() if embedding_store is not None else None,
+                "incremental": incremental
+            }
         }
+        if hybrid:
+            response["escalation"] = escalation_summary(analyzed_reviews)
+        if wants_lean(data):
+            make_lean(response)
+        if wants_timings(data):
+            # Milliseconds per stage; serialization of this response is only in /metrics
+            response["timings"] = timer.as_dict()
         
         # Debug information
         print(f"Analysis complete for {uid}")
-        print(f"Sentiment distribution: {sentiment_distribution}")
-        print(f"Fake reviews detected: {fake_reviews} out of {len(reviews)}")
-        
-        return jsonify(response)
+        print(f"Sentiment distribution: {summary['sentiment_distribution']}")
+        print(f"Fake reviews detected: {summary['fake_reviews_detected']} out of {len(reviews)}")
+        print(f"Throughput: {response['debug']['reviews_per_second']} reviews/sec")
+
+        with timer.stage("serialization"):
+            # JSON or msgpack, gzip or zstd, as the Accept headers ask
+            body = negotiated_response(response, min_compress_bytes=COMPRESS_MIN_BYTES)
+        REQUEST_SECONDS.labels("analyze").observe(time.perf_counter() - start_time)
+        return body
         
     except Exception as e:
         print(f"Error processing request: {str(e)}")
@@ -368,5 +1588,156 @@ def analyze():
             "error": f"Error processing request: {str(e)}"
         }), 500
 
+@app.route("/analyze/stream", methods=["POST"])
+def analyze_stream():
+    """Streaming variant of /analyze that sends results as newline-delimited JSON.
+
+    Reviews are analyzed in chunks of STREAM_CHUNK_SIZE and each result is sent
+    as soon as its chunk finishes, as one line with the same fields as an
+    analyzed_reviews entry plus its input "index". The last line holds the
+    summary fields of /analyze with "type": "summary". Only running tallies are
+    kept, so memory does not grow with the number of reviews.
+    """
+    data = request_payload()
+
+    if not data or "reviews" not in data or "description" not in data:
+        return jsonify({"error": "Missing 'reviews' or 'description' field"}), 400
+
+    uid = data.get("uid", "unknown")
+    reviews = data.get("reviews", [])
+    title = data.get("title", "")
+    icon = data.get("icon", "")
+    description = data.get("description", "")
+    include_timings = wants_timings(data)
+    hybrid = bool(data.get("hybrid", HYBRID_ESCALATION))
+    try:
+        corpus_keywords = keyword_mode_of(data) == "corpus"
+    except ValueError as e:
+        return jsonify({"success": False, "error": str(e)}), 400
+    topics = complaint_topics_wanted(data)
+
+    def generate():
+        totals = None
+        analyzed = 0
+        escalated = 0
+        # Corpus keywords and complaint topics need every review; entries are
+        # sent before that (in corpus mode without keywords), so only the
+        # texts, sentiments and confidences of genuine ones are kept
+        genuine_texts, genuine_sentiments, genuine_confidences = [], [], []
+        timer = StageTimer()
+        start_time = time.perf_counter()
+        try:
+            # Across the whole request, so copies landing in different chunks still match
+            with timer.stage("near_duplicates"):
+                near_duplicates = find_near_duplicates(reviews)
+
+            for start in range(0, len(reviews), STREAM_CHUNK_SIZE):
+                chunk = analyze_review_batch(
+                    reviews[start:start + STREAM_CHUNK_SIZE], timer=timer,
+                    near_duplicates=chunk_indices(near_duplicates, start, STREAM_CHUNK_SIZE), hybrid=hybrid,
+                    per_review_keywords=not corpus_keywords
+                )
+                totals = summarize_reviews(chunk, totals)
+                if corpus_keywords or topics:
+                    for entry in chunk:
+                        if not entry["is_fake"]:
+                            genuine_texts.append(entry["review"])
+                            genuine_sentiments.append(entry["sentiment"])
+                            genuine_confidences.append(entry["confidence"])
+                with timer.stage("serialization"):
+                    lines = [dumps({"index": start + offset, **entry}) + b"\n" for offset, entry in enumerate(chunk)]
+                yield from lines
+                analyzed += len(chunk)
+                escalated += escalation_summary(chunk)["escalated"]
+
+            keyword_ranking = None
+            if corpus_keywords:
+                with timer.stage("corpus_keywords"):
+                    keyword_ranking = rank_corpus_keywords(genuine_texts, genuine_sentiments)
+            complaint_topics = None
+            if topics:
+                with timer.stage("complaint_topics"):
+                    complaint_topics = rank_complaint_topics(genuine_texts, genuine_sentiments, genuine_confidences)
+            summary = build_summary(
+                description, totals or summarize_reviews([]), analyzed, timer, keyword_ranking, complaint_topics
+            )
+            final = {
+                "type": "summary",
+                "success": True,
+                "uid": uid,
+                "title": title,
+                "icon": icon,
+                "description": first_sentence(description),
+                **summary
+            }
+            if hybrid:
+                final["escalation"] = {
+                    "reviews": analyzed, "escalated": escalated,
+                    "fraction": round(escalated / analyzed, 4) if analyzed else 0.0
+                }
+            if include_timings:
+                final["timings"] = timer.as_dict()
+            yield dumps(final) + b"\n"
+            REQUEST_SECONDS.labels("analyze_stream").observe(time.perf_counter() - start_time)
+            print(f"Streamed analysis complete for {uid}")
+        except Exception as e:
+            # Headers are already sent, so report the failure in-band
+            print(f"Error processing streamed request: {str(e)}")
+            yield dumps({
+                "type": "error",
+                "success": False,
+                "error": f"Error processing request: {str(e)}"
+            }) + b"\n"
+
+    return Response(stream_with_context(generate()), mimetype="application/x-ndjson")
+
+@app.route("/jobs", methods=["POST"])
+def create_job():
+    """Queue an analysis with the /analyze payload and return its job id right away"""
+    data = request_payload()
+
+    if not data or "reviews" not in data or "description" not in data:
+        return jsonify({"error": "Missing 'reviews' or 'description' field"}), 400
+
+    try:
+        keyword_mode_of(data)
+    except ValueError as e:
+        return jsonify({"success": False, "error": str(e)}), 400
+
+    # The job runs outside this request, so carry ?timings=1 and ?lean=1 over in the payload
+    data["timings"] = wants_timings(data)
+    data["lean"] = wants_lean(data)
+
+    try:
+        job_id = job_manager.submit(data)
+    except JobQueueFull as e:
+        return jsonify({"success": False, "error": str(e)}), 429
+
+    return jsonify({"success": True, "job_id": job_id, "status": "queued"}), 202
+
+@app.route("/jobs/<job_id>", methods=["GET"])
+def get_job(job_id):
+    """Report a job's progress, and its /analyze result once done"""
+    record = job_manager.status(job_id)
+    if record is None:
+        return jsonify({"success": False, "error": "Unknown job id"}), 404
+
+    return negotiated_response({
+        "success": True,
+        "job_id": job_id,
+        "status": record["status"],
+        "progress": {"done": record["done"], "total": record["total"], "stage": record["stage"]},
+        "result": record["result"],
+        "error": record["error"]
+    }, min_compress_bytes=COMPRESS_MIN_BYTES)
+
+@app.route("/jobs/<job_id>", methods=["DELETE"])
+def cancel_job(job_id):
+    if job_manager.status(job_id) is None:
+        return jsonify({"success": False, "error": "Unknown job id"}), 404
+    if not job_manager.cancel(job_id):
+        return jsonify({"success": False, "error": "Job already finished"}), 409
+    return jsonify({"success": True, "job_id": job_id, "status": "cancelling"}), 202
+
 if __name__ == "__main__":
     app.run(host="0.0.0.0", port=5001, debug=True)
\ No newline at end of file
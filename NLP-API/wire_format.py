@@ -0,0 +1,138 @@
+import gzip
+import json
+
+from flask import Response, request
+from werkzeug.exceptions import BadRequest
+
+# Optional encoders: without them JSON goes through the stdlib and the
+# corresponding media types and encodings are simply not offered
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+JSON = "application/json"
+MSGPACK = "application/msgpack"
+MSGPACK_TYPES = (MSGPACK, "application/x-msgpack")
+
+# Fast levels: responses are compressed once per request, on the request thread
+GZIP_LEVEL = 5
+ZSTD_LEVEL = 3
+
+_ORJSON_OPTIONS = (orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY) if orjson else 0
+
+
+def _default(value):
+    """Types the encoders don't know natively: sets, tuples and numpy scalars or arrays"""
+    if isinstance(value, (set, frozenset, tuple)):
+        return list(value)
+    if hasattr(value, "tolist"):
+        return value.tolist()
+    raise TypeError(f"Object of type {type(value).__name__} is not serializable")
+
+
+def dumps(payload):
+    """JSON bytes of payload, with orjson when installed"""
+    if orjson is not None:
+        try:
+            return orjson.dumps(payload, default=_default, option=_ORJSON_OPTIONS)
+        except TypeError:
+            # e.g. integers past 64 bits, which the stdlib still handles
+            pass
+    return json.dumps(payload, default=_default, separators=(",", ":")).encode("utf-8")
+
+
+def loads(body):
+    if orjson is not None:
+        return orjson.loads(body)
+    return json.loads(body)
+
+
+def media_types():
+    """Response media types this process can produce, preferred first"""
+    return [JSON, *MSGPACK_TYPES] if msgpack is not None else [JSON]
+
+
+def encodings():
+    """Content codings this process can produce, preferred first"""
+    return (["zstd"] if zstandard is not None else []) + ["gzip", "identity"]
+
+
+def encode(payload, media_type=JSON, encoding="identity"):
+    """Serialize payload as media_type and compress it with encoding, returns the bytes"""
+    if media_type in MSGPACK_TYPES:
+        body = msgpack.packb(payload, default=_default, use_bin_type=True)
+    else:
+        body = dumps(payload)
+    return compress(body, encoding)
+
+
+def compress(body, encoding):
+    if encoding == "gzip":
+        return gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+    if encoding == "zstd":
+        return zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(body)
+    return body
+
+
+def decompress(body, encoding):
+    if encoding == "gzip":
+        return gzip.decompress(body)
+    if encoding == "zstd":
+        if zstandard is None:
+            raise ValueError("zstd request bodies need the zstandard package")
+        return zstandard.ZstdDecompressor().decompressobj().decompress(body)
+    if encoding not in ("", "identity"):
+        raise ValueError(f"Unsupported Content-Encoding: {encoding}")
+    return body
+
+
+def request_payload():
+    """Body of the current request as JSON or msgpack, optionally gzip/zstd-compressed.
+
+    Returns None for an empty body. A body that can't be decoded raises
+    BadRequest (400), as request.json does.
+    """
+    try:
+        body = decompress(request.get_data(), request.headers.get("Content-Encoding", "").strip().lower())
+        if not body:
+            return None
+        if request.mimetype in MSGPACK_TYPES:
+            if msgpack is None:
+                raise ValueError("msgpack request bodies need the msgpack package")
+            return msgpack.unpackb(body, raw=False, strict_map_key=False)
+        return loads(body)
+    except Exception as e:
+        raise BadRequest(f"Could not decode the request body: {str(e)}") from e
+
+
+def negotiated_response(payload, status=200, min_compress_bytes=1024):
+    """Response with payload in the format and coding the client's Accept headers prefer.
+
+    JSON unless msgpack is asked for; zstd over gzip when both are accepted.
+    Bodies under min_compress_bytes are sent uncompressed.
+    """
+    media_type = request.accept_mimetypes.best_match(media_types(), default=JSON)
+    body = encode(payload, media_type)
+
+    encoding = "identity"
+    # No Accept-Encoding at all means the client takes only identity, not anything
+    if len(body) >= min_compress_bytes and request.accept_encodings:
+        encoding = request.accept_encodings.best_match(encodings(), default="identity")
+        body = compress(body, encoding)
+
+    response = Response(body, status=status, mimetype=media_type)
+    if encoding != "identity":
+        response.headers["Content-Encoding"] = encoding
+    response.vary.update(("Accept", "Accept-Encoding"))
+    return response